@@ -0,0 +1,141 @@
+"""
+Blob Store Module
+Content-addressed storage for original uploaded files (deduplicated by SHA-256)
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Optional
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BLOB_DIR = os.getenv("BLOB_STORE_DIR", os.path.join(BASE_DIR, 'data', 'blobs'))
+
+_BLOB_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class BlobStore:
+    """
+    Stores file contents once per SHA-256 digest.
+
+    Blobs live at <root>/<first 2 hex chars>/<digest>, with a small JSON
+    sidecar holding the filename and content type of the first upload.
+    """
+
+    def __init__(self, root: str = BLOB_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def put(self, content: bytes, filename: str = None, content_type: str = None) -> dict:
+        """
+        Store content (no-op if the same bytes are already stored).
+
+        Returns:
+            dict: Blob metadata with 'id', 'filename', 'content_type' and 'size'
+        """
+        blob_id = hashlib.sha256(content).hexdigest()
+        path = self._path(blob_id)
+
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _write_atomic(path, content)
+                _write_atomic(f"{path}.meta.json", json.dumps({
+                    "filename": filename,
+                    "content_type": content_type or "application/octet-stream",
+                    "size": len(content)
+                }, ensure_ascii=False).encode('utf-8'))
+
+        metadata = self.get_metadata(blob_id) or {}
+        # The caller's filename wins for this upload; the stored one is only a default
+        return {
+            "id": blob_id,
+            "filename": filename or metadata.get("filename"),
+            "content_type": content_type or metadata.get("content_type"),
+            "size": len(content)
+        }
+
+    def get_metadata(self, blob_id: str) -> Optional[dict]:
+        """Return stored metadata for blob_id, or None if it does not exist."""
+        if not is_valid_blob_id(blob_id) or not os.path.exists(self._path(blob_id)):
+            return None
+        try:
+            with open(f"{self._path(blob_id)}.meta.json", 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            metadata = {"filename": None, "content_type": "application/octet-stream"}
+        metadata["id"] = blob_id
+        metadata["size"] = os.path.getsize(self._path(blob_id))
+        return metadata
+
+    def read(self, blob_id: str, start: int = 0, end: int = None) -> bytes:
+        """
+        Read a blob, or the inclusive byte range [start, end] of it.
+        """
+        with open(self._path(blob_id), 'rb') as f:
+            f.seek(start)
+            if end is None:
+                return f.read()
+            return f.read(end - start + 1)
+
+    def _path(self, blob_id: str) -> str:
+        return os.path.join(self.root, blob_id[:2], blob_id)
+
+
+def _write_atomic(path: str, data: bytes):
+    # A unique temp file per writer: the lock does not cover other worker processes
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def is_valid_blob_id(blob_id: str) -> bool:
+    """Blob IDs are lowercase SHA-256 hex digests."""
+    return bool(blob_id) and bool(_BLOB_ID_PATTERN.match(blob_id))
+
+
+def parse_range_header(range_header: str, size: int):
+    """
+    Parse a single-range HTTP Range header ("bytes=start-end").
+
+    Args:
+        range_header: Value of the Range request header
+        size: Total size of the resource in bytes
+
+    Returns:
+        tuple: (start, end) inclusive byte offsets, or None if the header is
+               not a valid single byte range (serve the full body then, as
+               RFC 7233 requires for a range whose end is before its start)
+
+    Raises:
+        ValueError: If the range is syntactically valid but not satisfiable
+    """
+    match = re.fullmatch(r'\s*bytes=(\d*)-(\d*)\s*', range_header or '')
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+
+    first, last = match.group(1), match.group(2)
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
@@ -0,0 +1,156 @@
+"""
+Result Cache Module
+Content-addressed LRU cache with TTL eviction and an optional on-disk tier
+"""
+
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, 'data', 'cache')
+
+
+def make_cache_key(*parts) -> str:
+    """
+    Build a stable SHA-256 key from any JSON-serializable parts.
+
+    Args:
+        *parts: Values that identify the cached computation (text, model name, prompt version...)
+
+    Returns:
+        str: Hex digest usable as a cache key and file name
+    """
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache for JSON-serializable results.
+
+    Entries expire after ttl_seconds. When disk_dir is set, entries are also
+    written there so they survive restarts; a memory miss falls back to disk.
+    """
+
+    def __init__(self, name: str, max_entries: int = 256, ttl_seconds: float = 86400,
+                 disk_dir: Optional[str] = None):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None on miss/expiry."""
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+                self._counters["expired"] += 1
+
+        disk_entry = self._read_disk(key)
+        if disk_entry is not None:
+            created_at, value = disk_entry
+            if now - created_at <= self.ttl_seconds:
+                with self._lock:
+                    self._store(key, created_at, value)
+                    self._counters["disk_hits"] += 1
+                return copy.deepcopy(value)
+            self._delete_disk(key)
+            with self._lock:
+                self._counters["expired"] += 1
+
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        """Store a value under key in memory (and on disk if enabled)."""
+        created_at = time.time()
+        value = copy.deepcopy(value)
+
+        with self._lock:
+            self._store(key, created_at, value)
+
+        self._write_disk(key, created_at, value)
+
+    def clear(self):
+        """Drop all in-memory entries (disk entries are left in place)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["hits"] + self._counters["disk_hits"]
+            return {
+                "name": self.name,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_enabled": bool(self.disk_dir),
+                **self._counters,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0
+            }
+
+    def _store(self, key: str, created_at: float, value: Any):
+        # Caller must hold the lock
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry["created_at"], entry["value"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  Cache '{self.name}' could not read disk entry: {str(e)}")
+            return None
+
+    def _write_disk(self, key: str, created_at: float, value: Any):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"created_at": created_at, "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"⚠️  Cache '{self.name}' could not write disk entry: {str(e)}")
+
+    def _delete_disk(self, key: str):
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
@@ -0,0 +1,205 @@
+"""
+Candidate Index Module
+In-memory index of the stored structured CVs (hashed term vectors per
+section) for ranking the whole candidate pool against a job description
+without any LLM call
+"""
+
+import os
+import threading
+import time
+import zlib
+import numpy as np
+from scipy import sparse
+from cache import make_cache_key
+from job_matcher import SECTION_WEIGHTS, BM25_K1, BM25_B, job_terms, section_tokens
+
+
+# Size of the hashed term space (collisions stay rare for pools of tens of thousands of distinct terms)
+CANDIDATE_INDEX_FEATURES = int(os.getenv("CANDIDATE_INDEX_FEATURES", str(2 ** 18)))
+
+# Largest top_k a ranking may ask for
+MAX_RANK_RESULTS = 100
+
+_SECTIONS = list(SECTION_WEIGHTS)
+
+
+def feature_index(term: str, features: int = CANDIDATE_INDEX_FEATURES) -> int:
+    """Column of a normalized term in the hashed feature space (stable across processes)."""
+    return zlib.crc32(term.encode("utf-8")) % features
+
+
+class CandidateIndex:
+    """
+    Term counts of every stored structured CV, as one sparse matrix per
+    section (rows are candidates, columns are hashed terms).
+
+    CVs are added as they are saved; the rows are buffered and appended to
+    the matrices on the next ranking. Identical structured CVs are indexed
+    once, under the most recently saved record ID.
+
+    A ranking scores the whole pool with one sparse matrix-vector product
+    per section: BM25 term weights (length-normalized per section, IDF over
+    the pool) times the hashed job-term vector, weighted by SECTION_WEIGHTS.
+    """
+
+    def __init__(self, features: int = CANDIDATE_INDEX_FEATURES):
+        self.features = features
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._records = []
+        self._counts = {name: sparse.csr_matrix((0, features)) for name in _SECTIONS}
+        self._lengths = np.zeros((0, len(_SECTIONS)))
+        self._pending = []
+        self._weighted = None
+        self._idf = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    def add(self, cv_id: str, structured_cv: dict, candidate_name: str = None) -> bool:
+        """
+        Index one structured CV.
+
+        Returns:
+            bool: False if the same CV was already indexed (its record ID is updated)
+        """
+        if not isinstance(structured_cv, dict):
+            return False
+
+        key = make_cache_key(structured_cv)
+        sections = dict(section_tokens(structured_cv))
+        counts = []
+        for name in _SECTIONS:
+            features = {}
+            for token in sections.get(name, []):
+                column = feature_index(token, self.features)
+                features[column] = features.get(column, 0) + 1
+            counts.append(features)
+        lengths = [len(sections.get(name, [])) for name in _SECTIONS]
+
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None:
+                self._records[row] = {"cv_id": cv_id, "candidate_name": candidate_name}
+                return False
+            self._rows[key] = len(self._records)
+            self._records.append({"cv_id": cv_id, "candidate_name": candidate_name})
+            self._pending.append((counts, lengths))
+            self._weighted = None
+        return True
+
+    def rank(self, job_description: str, top_k: int = 20, terms: dict = None) -> dict:
+        """
+        Rank the indexed candidates against a job description.
+
+        Args:
+            job_description: Job description text
+            top_k: Number of candidates to return (at most MAX_RANK_RESULTS)
+            terms: Precomputed job_terms(job_description) (e.g. from a job profile)
+
+        Returns:
+            dict: {'status': 'success', 'pool_size', 'results': [{'rank', 'cv_id',
+                   'candidate_name', 'score', 'section_scores', 'matched_terms'}],
+                   'elapsed_ms'} or {'status': 'error', 'message'}. Scores are
+                   comparable within one ranking.
+        """
+        start = time.perf_counter()
+        terms = terms if terms is not None else job_terms(job_description)
+        if not terms:
+            return {"status": "error", "message": "The job description has no scorable terms"}
+        top_k = max(1, min(top_k, MAX_RANK_RESULTS))
+
+        with self._lock:
+            self._flush()
+            weighted, idf = self._weighted_matrices()
+            records = [dict(record) for record in self._records]
+
+        columns = np.array([feature_index(term, self.features) for term in terms])
+        query = np.zeros(self.features)
+        np.add.at(query, columns, 1 + np.log([info["count"] for info in terms.values()]))
+        query *= idf
+
+        if not records:
+            contributions = np.zeros((0, len(_SECTIONS)))
+        else:
+            contributions = np.column_stack([
+                SECTION_WEIGHTS[name] * (weighted[name] @ query) for name in _SECTIONS
+            ])
+        totals = contributions.sum(axis=1)
+
+        candidates = np.flatnonzero(totals > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-totals[candidates], top_k - 1)[:top_k]]
+        top = candidates[np.lexsort((candidates, -totals[candidates]))]
+
+        # Which job terms each returned candidate has, in any section
+        surfaces = [info["surface"] for info in terms.values()]
+        present = sum(weighted[name][top][:, columns] for name in _SECTIONS).toarray() if len(top) else None
+
+        results = []
+        for position, row in enumerate(top):
+            results.append({
+                "rank": position + 1,
+                "cv_id": records[row]["cv_id"],
+                "candidate_name": records[row]["candidate_name"],
+                "score": round(float(totals[row]), 3),
+                "section_scores": {
+                    name: round(float(contributions[row, i]), 3)
+                    for i, name in enumerate(_SECTIONS) if contributions[row, i] > 0
+                },
+                "matched_terms": [surfaces[j] for j in np.flatnonzero(present[position] > 0)]
+            })
+
+        return {
+            "status": "success",
+            "pool_size": len(records),
+            "results": results,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+
+    def _flush(self):
+        """Append buffered rows to the count matrices (caller holds the lock)."""
+        if not self._pending:
+            return
+        for i, name in enumerate(_SECTIONS):
+            indptr = [0]
+            indices = []
+            data = []
+            for counts, _ in self._pending:
+                indices.extend(counts[i].keys())
+                data.extend(counts[i].values())
+                indptr.append(len(indices))
+            new_rows = sparse.csr_matrix(
+                (np.array(data, dtype=float), np.array(indices, dtype=np.int64), np.array(indptr)),
+                shape=(len(self._pending), self.features)
+            )
+            self._counts[name] = sparse.vstack([self._counts[name], new_rows], format="csr")
+        self._lengths = np.vstack([self._lengths, [lengths for _, lengths in self._pending]])
+        self._pending = []
+
+    def _weighted_matrices(self):
+        """BM25-weighted matrices and pool IDF, recomputed after new CVs (caller holds the lock)."""
+        if self._weighted is not None:
+            return self._weighted, self._idf
+
+        rows = self._lengths.shape[0]
+        weighted = {}
+        for i, name in enumerate(_SECTIONS):
+            counts = self._counts[name]
+            lengths = self._lengths[:, i]
+            average = lengths[lengths > 0].mean() if np.any(lengths > 0) else 1.0
+            norm = 1 - BM25_B + BM25_B * lengths / average
+            row_norm = np.repeat(norm, np.diff(counts.indptr))
+            matrix = counts.copy()
+            matrix.data = counts.data * (BM25_K1 + 1) / (counts.data + BM25_K1 * row_norm)
+            weighted[name] = matrix
+
+        # Document frequency: candidates having the term in any section
+        present = sum(self._counts[name] for name in _SECTIONS) if rows else sparse.csr_matrix((0, self.features))
+        document_frequency = np.bincount(present.indices, minlength=self.features)
+        idf = np.log(1 + (rows - document_frequency + 0.5) / (document_frequency + 0.5))
+
+        self._weighted, self._idf = weighted, idf
+        return weighted, idf
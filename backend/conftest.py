@@ -0,0 +1,75 @@
+"""
+Shared pytest setup for the backend tests
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+
+# main opens its SQLite store and blob directory on import, and the storage
+# modules read these paths when first imported: point them at a throwaway
+# directory before any test module is collected so backend/data is never touched.
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="cv-backend-tests-")
+os.environ["CV_STORE_PATH"] = os.path.join(_TEST_DATA_DIR, "cv_store.sqlite3")
+os.environ["BLOB_STORE_DIR"] = os.path.join(_TEST_DATA_DIR, "blobs")
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def _respond(text: str, stream: bool):
+    if stream:
+        return [FakeResponse(text[i:i + 7]) for i in range(0, len(text), 7)]
+    return FakeResponse(text)
+
+
+class FakeModel:
+    """Fake Gemini model answering every call with the same text"""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+        self.generation_config = None
+
+    def generate_content(self, parts, generation_config=None, stream=False):
+        self.calls += 1
+        self.generation_config = generation_config
+        return _respond(self.text, stream)
+
+
+class PromptRoutingModel:
+    """Fake model answering each prompt with the payload of the first marker it contains"""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.prompts = []
+
+    def generate_content(self, parts, generation_config=None, stream=False):
+        prompt = parts if isinstance(parts, str) else parts[0]
+        self.prompts.append(prompt)
+        for marker, payload in self.payloads.items():
+            if marker in prompt:
+                return _respond(json.dumps(payload), stream)
+        raise RuntimeError("unexpected prompt")
+
+
+@pytest.fixture
+def fake_model():
+    """FakeModel class: fake_model(text) builds a model (no network)."""
+    return FakeModel
+
+
+@pytest.fixture
+def prompt_routing_model():
+    """PromptRoutingModel class: prompt_routing_model({marker: payload}) builds a model."""
+    return PromptRoutingModel
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_TEST_DATA_DIR, ignore_errors=True)
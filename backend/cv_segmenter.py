@@ -0,0 +1,609 @@
+"""
+CV Segmenter Module
+Rule-based (no LLM) extraction of contact details and sections into the
+structured CV schema, for English, French, Arabic and Spanish CVs
+"""
+
+import re
+import unicodedata
+from typing import Optional
+
+
+NOT_PROVIDED = "Not provided"
+
+# Section headers per structured CV field. Header lines are compared after
+# _normalize_header (lowercase, no accents or punctuation, "&"/"and" dropped).
+SECTION_HEADERS = {
+    "summary": [
+        "summary", "professional summary", "career summary", "profile", "professional profile", "about me",
+        "about", "objective", "career objective", "personal statement",
+        "profil", "profil professionnel", "a propos", "a propos de moi", "objectif", "objectif professionnel",
+        "perfil", "perfil profesional", "resumen", "resumen profesional", "sobre mi", "objetivo",
+        "الملخص", "ملخص", "نبذة", "نبذة عني", "الملف الشخصي", "الهدف", "الهدف الوظيفي"
+    ],
+    "experience": [
+        "experience", "work experience", "professional experience", "experiences", "employment",
+        "employment history", "work history", "career history", "internships", "relevant experience",
+        "experience professionnelle", "experiences professionnelles", "parcours professionnel", "stages",
+        "experiencia", "experiencia laboral", "experiencia profesional", "historial laboral", "practicas",
+        "الخبرة", "الخبرات", "الخبرة المهنية", "الخبرات المهنية", "الخبرة العملية"
+    ],
+    "education": [
+        "education", "academic background", "academic qualifications", "qualifications", "education training",
+        "formation", "formations", "parcours academique", "etudes", "diplomes", "cursus", "formation academique",
+        "educacion", "formacion", "formacion academica", "estudios",
+        "التعليم", "المؤهلات العلمية", "المؤهلات", "التكوين", "الدراسة", "المسار الدراسي"
+    ],
+    "skills": [
+        "skills", "technical skills", "core competencies", "competencies", "key skills", "hard skills",
+        "skills expertise", "competences", "competences techniques", "savoir faire", "connaissances",
+        "competences informatiques", "habilidades", "competencias", "conocimientos", "aptitudes",
+        "المهارات", "المهارات التقنية", "الكفاءات"
+    ],
+    "languages": [
+        "languages", "language skills", "langues", "competences linguistiques", "idiomas", "lenguas", "اللغات"
+    ],
+    "projects": [
+        "projects", "personal projects", "academic projects", "key projects", "selected projects",
+        "projets", "projets academiques", "projets personnels", "realisations",
+        "proyectos", "proyectos personales", "المشاريع", "المشروعات"
+    ],
+    "certifications": [
+        "certifications", "certificates", "licenses certifications", "licenses", "certificats",
+        "certificaciones", "certificados", "الشهادات", "الشهادات المهنية"
+    ],
+    "awards": [
+        "awards", "honors", "honours", "achievements", "awards honors", "awards achievements",
+        "prix", "distinctions", "prix distinctions", "premios", "reconocimientos", "logros",
+        "الجوائز", "الإنجازات", "الانجازات"
+    ],
+    "publications": ["publications", "research", "publicaciones", "المنشورات", "الأبحاث"],
+    "activities": [
+        "activities", "extracurricular activities", "extra curricular activities", "leadership",
+        "memberships", "student organizations", "associations", "vie associative", "activites",
+        "activites extrascolaires", "activites parascolaires", "engagement associatif",
+        "actividades", "actividades extracurriculares", "الأنشطة", "النشاطات", "الأنشطة اللاصفية"
+    ],
+    "volunteer": [
+        "volunteer", "volunteering", "volunteer experience", "volunteer work", "community service",
+        "benevolat", "voluntariado", "التطوع", "العمل التطوعي"
+    ],
+}
+
+# Skill line labels ("Languages: English, French") mapped to skills categories.
+# Checked in order, so "programming languages" is technical, not languages.
+_SKILL_LABELS = [
+    ("technical", ("programming", "programmation", "programacion", "technical", "techniques", "tecnicas",
+                   "hard skills", "التقنية", "البرمجة")),
+    ("soft_skills", ("soft", "savoir etre", "qualites", "personal", "interpersonal", "blandas", "الشخصية")),
+    ("languages", ("languages", "langues", "idiomas", "اللغات", "لغات")),
+    ("tools", ("tools", "outils", "herramientas", "software", "logiciels", "platforms", "plateformes",
+               "الادوات")),
+]
+
+_CONNECTORS = {"and", "et", "y", "&"}
+
+_MONTHS = (
+    "january|february|march|april|may|june|july|august|september|october|november|december|"
+    "jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec|"
+    "janvier|fevrier|mars|avril|mai|juin|juillet|aout|septembre|octobre|novembre|decembre|janv|fevr|avr|juil|"
+    "enero|febrero|marzo|abril|mayo|junio|julio|agosto|setiembre|octubre|noviembre|diciembre|ene|abr|ago|dic|"
+    "يناير|فبراير|مارس|ابريل|مايو|يونيو|يوليو|اغسطس|سبتمبر|اكتوبر|نوفمبر|ديسمبر|"
+    "جانفي|فيفري|افريل|ماي|جوان|جويلية|اوت"
+)
+_PRESENT = (
+    "present|current|now|today|ongoing|aujourd'hui|aujourd’hui|actuel|actuellement|en cours|"
+    "presente|actualidad|actual|hoy|حاليا|الان|حتى الان"
+)
+_DATE = rf"(?:(?:{_MONTHS})\.?\s+\d{{4}}|\d{{1,2}}[/.-]\d{{4}}|(?:19|20)\d{{2}})"
+
+# Patterns run on _fold()ed text (lowercase, accents stripped, same length as the original)
+DATE_RANGE_PATTERN = re.compile(
+    rf"(?<![\w])({_DATE})\s*(?:-|–|—|to|until|a|au|à|hasta|al|الى|إلى)\s*({_DATE}|{_PRESENT})(?![\w])"
+)
+DATE_PATTERN = re.compile(rf"(?<![\w/.-])({_DATE})(?![\w/])")
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+URL_PATTERN = re.compile(
+    r"(?:https?://|www\.)[^\s,;|()]+|\b(?:[\w-]+\.)*(?:linkedin|github|gitlab|behance)\.com/[^\s,;|()]+"
+)
+PHONE_PATTERN = re.compile(r"(?<![\w])\+?\(?\d[\d\s().-]{6,}\d(?![\w])")
+_YEAR_RANGE_PATTERN = re.compile(r"^(?:19|20)\d{2}\s*[-–]\s*(?:19|20)\d{2}$")
+_BULLET_PATTERN = re.compile(r"^\s*(?:[•·\-–—*▪●◦○■□►▸➢➤✓✔❖♦]|\d{1,2}[.)])\s*")
+_LOCATION_LABEL_PATTERN = re.compile(r"^(?:address|adresse|location|localisation|direccion|ubicacion|العنوان)\s*:\s*(.+)$")
+_GPA_PATTERN = re.compile(r"(?:gpa|cgpa|moyenne|mention|promedio|nota media)\s*[:\-]?\s*(\d+(?:[.,]\d+)?(?:\s*/\s*\d+(?:[.,]\d+)?)?)")
+_TECH_LABEL_PATTERN = re.compile(
+    r"^(?:technologies|technology|tech stack|stack|tools|outils|technos|tecnologias|herramientas|التقنيات)\s*:\s*(.+)$"
+)
+_INSTITUTION_WORDS = (
+    "university", "universite", "universidad", "college", "school", "ecole", "escuela", "institute",
+    "institut", "instituto", "academy", "academie", "academia", "faculty", "faculte", "facultad",
+    "lycee", "liceo", "polytechnique", "جامعة", "معهد", "كلية", "مدرسة", "اكاديمية"
+)
+_ROLE_SEPARATORS = re.compile(r"\s+(?:at|@|chez|en|في|-|–|—|\|)\s+|\s*,\s+")
+_SKILL_SEPARATORS = re.compile(r"\s*(?:[,;|•·،、]|\s-\s)\s*")
+
+
+def segment_cv(text: str) -> dict:
+    """
+    Build a structured CV from plain text with header dictionaries and regexes only.
+
+    Args:
+        text: The raw CV text
+
+    Returns:
+        dict: Structured CV with the same fields as the LLM structure parser
+              (summary, contact, experience, education, skills, projects, ...)
+    """
+    lines = [line.strip() for line in (text or "").splitlines()]
+    sections = find_sections(text)
+
+    structured = {
+        "summary": NOT_PROVIDED,
+        "contact": extract_contact(text),
+        "experience": [],
+        "education": [],
+        "skills": {"technical": [], "languages": [], "tools": [], "soft_skills": [], "other": []},
+        "projects": [],
+        "certifications": [],
+        "awards": [],
+        "publications": [],
+        "activities": [],
+        "volunteer": [],
+        "other_sections": {}
+    }
+
+    first_header = sections[0]["start_line"] if sections else len(lines)
+    summary_parts = []
+
+    for section in sections:
+        body = lines[section["start_line"] + 1:section["end_line"]]
+        key = section["key"]
+
+        if key == "summary":
+            summary_parts.append(" ".join(line for line in body if line))
+        elif key == "experience":
+            structured["experience"].extend(_parse_experience(body, len(structured["experience"])))
+        elif key == "education":
+            structured["education"].extend(_parse_education(body, len(structured["education"])))
+        elif key in ("skills", "languages"):
+            _parse_skills(body, structured["skills"], default="languages" if key == "languages" else "technical")
+        elif key == "projects":
+            structured["projects"].extend(_parse_projects(body, len(structured["projects"])))
+        elif key in ("certifications", "awards", "publications"):
+            structured[key].extend(_parse_listed(body, key, len(structured[key])))
+        elif key in ("activities", "volunteer"):
+            structured[key].extend(_parse_involvement(body, key, len(structured[key])))
+        else:
+            items = structured["other_sections"].setdefault(section["header"], [])
+            offset = sum(len(v) for v in structured["other_sections"].values()) - len(items)
+            for line in body:
+                if line:
+                    items.append({"id": f"other_{offset + len(items) + 1}", "content": _strip_bullet(line)})
+
+    if not summary_parts:
+        # Untitled summary: long sentences in the header block above the first section
+        summary_parts = [
+            line for line in lines[:first_header]
+            if len(line.split()) >= 12 and not EMAIL_PATTERN.search(line) and not URL_PATTERN.search(line)
+        ]
+    summary = " ".join(part for part in summary_parts if part).strip()
+    if summary:
+        structured["summary"] = summary
+
+    return structured
+
+
+def find_sections(text: str) -> list:
+    """
+    Locate section headers.
+
+    Returns:
+        list: Dicts with 'key' (structured CV field, or "other"), 'header'
+              (the header as written), 'start_line' (header line index) and
+              'end_line' (index of the next header, or the line count)
+    """
+    lines = [line.strip() for line in (text or "").splitlines()]
+    sections = []
+
+    for index, line in enumerate(lines):
+        key = detect_header(line)
+        if key is None and sections and _looks_like_unknown_header(line):
+            key = "other"
+        if key is not None:
+            sections.append({"key": key, "header": _clean_header(line), "start_line": index})
+
+    for position, section in enumerate(sections):
+        section["end_line"] = sections[position + 1]["start_line"] if position + 1 < len(sections) else len(lines)
+
+    return sections
+
+
+def detect_header(line: str) -> Optional[str]:
+    """Return the structured CV field a header line introduces, or None."""
+    cleaned = _clean_header(line)
+    if not cleaned or len(cleaned.split()) > 5 or len(cleaned) > 60:
+        return None
+    return _header_lookup().get(_normalize_header(cleaned))
+
+
+def extract_contact(text: str) -> dict:
+    """
+    Extract contact fields from the CV text.
+
+    Returns:
+        dict: name, email, phone, location, linkedin, github and portfolio
+              ("Not provided" when not found)
+    """
+    lines = [line.strip() for line in (text or "").splitlines()]
+    sections = find_sections(text)
+    first_header = sections[0]["start_line"] if sections else len(lines)
+    # Contact details sit in the block above the first section header
+    head = [line for line in lines[:first_header] if line][:12] or [line for line in lines if line][:3]
+
+    contact = {field: NOT_PROVIDED for field in
+               ("name", "email", "phone", "location", "linkedin", "github", "portfolio")}
+
+    email = EMAIL_PATTERN.search(text or "")
+    if email:
+        contact["email"] = email.group(0)
+
+    for url in URL_PATTERN.findall(text or ""):
+        url = url.rstrip('.')
+        lowered = url.lower()
+        if "linkedin.com" in lowered:
+            contact["linkedin"] = _set_once(contact["linkedin"], url)
+        elif "github.com" in lowered:
+            contact["github"] = _set_once(contact["github"], url)
+        elif "@" not in url:
+            contact["portfolio"] = _set_once(contact["portfolio"], url)
+
+    for line in head + lines:
+        for candidate in PHONE_PATTERN.findall(line):
+            digits = re.sub(r"\D", "", candidate)
+            if 8 <= len(digits) <= 15 and not _YEAR_RANGE_PATTERN.match(candidate.strip()) \
+                    and not DATE_RANGE_PATTERN.search(_fold(candidate)):
+                contact["phone"] = _set_once(contact["phone"], candidate.strip())
+
+    for line in head:
+        if _is_contact_line(line) or detect_header(line):
+            continue
+        words = line.split()
+        if contact["name"] == NOT_PROVIDED:
+            if 1 < len(words) <= 5 and not any(char.isdigit() for char in line):
+                contact["name"] = line
+            continue
+        label = _LOCATION_LABEL_PATTERN.match(_fold(line))
+        if label:
+            contact["location"] = line[label.start(1):].strip()
+            break
+        if "," in line and len(words) <= 6 and not any(char.isdigit() for char in line):
+            contact["location"] = line
+            break
+
+    return contact
+
+
+def _parse_experience(lines: list, offset: int) -> list:
+    entries = []
+    for block in _split_entries(lines):
+        start, end, headers = _entry_dates_and_headers(block["headers"])
+        title, company, rest = _split_role(headers)
+        location = NOT_PROVIDED
+        if rest and len(rest[0].split()) <= 5:
+            location, rest = rest[0], rest[1:]
+        bullets = block["bullets"]
+        entries.append({
+            "id": f"exp_{offset + len(entries) + 1}",
+            "title": title,
+            "company": company,
+            "location": location,
+            "startDate": start,
+            "endDate": end,
+            "description": " ".join(rest + bullets) or NOT_PROVIDED,
+            "bullets": bullets
+        })
+    return entries
+
+
+def _parse_education(lines: list, offset: int) -> list:
+    entries = []
+    for block in _split_entries(lines):
+        start, end, headers = _entry_dates_and_headers(block["headers"])
+        institution, degree, rest = NOT_PROVIDED, NOT_PROVIDED, []
+        gpa = NOT_PROVIDED
+
+        for line in headers + block["bullets"]:
+            match = _GPA_PATTERN.search(_fold(line))
+            if match and gpa == NOT_PROVIDED:
+                gpa = line[match.start(1):match.end(1)]
+
+        for line in headers:
+            if _GPA_PATTERN.search(_fold(line)):
+                continue
+            parts = [part for part in re.split(r"\s+[-–—|]\s+|\s*,\s+", line) if part]
+            for part in parts:
+                if institution == NOT_PROVIDED and any(word in _fold(part) for word in _INSTITUTION_WORDS):
+                    institution = part
+                elif degree == NOT_PROVIDED:
+                    degree = part
+                else:
+                    rest.append(part)
+
+        location = NOT_PROVIDED
+        if rest and len(rest[0].split()) <= 4:
+            location, rest = rest[0], rest[1:]
+        entries.append({
+            "id": f"edu_{offset + len(entries) + 1}",
+            "degree": degree,
+            "institution": institution,
+            "location": location,
+            "startDate": start,
+            "endDate": end,
+            "gpa": gpa,
+            "description": " ".join(rest) or NOT_PROVIDED,
+            "achievements": block["bullets"]
+        })
+    return entries
+
+
+def _parse_skills(lines: list, skills: dict, default: str = "technical"):
+    for line in lines:
+        line = _strip_bullet(line)
+        if not line:
+            continue
+        category, values = default, line
+        if ":" in line:
+            label, values = line.split(":", 1)
+            category = _skill_category(label, default)
+        for item in _SKILL_SEPARATORS.split(values):
+            item = item.strip(" .")
+            if item and item not in skills[category]:
+                skills[category].append(item)
+
+
+def _parse_projects(lines: list, offset: int) -> list:
+    projects = []
+    for block in _split_entries(lines):
+        _, _, headers = _entry_dates_and_headers(block["headers"])
+        technologies, description, link = [], [], NOT_PROVIDED
+
+        for line in headers[1:] + block["bullets"]:
+            tech = _TECH_LABEL_PATTERN.match(_fold(line))
+            if tech:
+                technologies.extend(item.strip() for item in _SKILL_SEPARATORS.split(line[tech.start(1):]) if item.strip())
+            else:
+                description.append(line)
+
+        name = headers[0] if headers else (block["bullets"][0] if block["bullets"] else NOT_PROVIDED)
+        parenthetical = re.search(r"\(([^)]+)\)\s*$", name)
+        if parenthetical:
+            technologies = [item.strip() for item in parenthetical.group(1).split(",") if item.strip()] + technologies
+            name = name[:parenthetical.start()].strip()
+
+        for line in block["headers"] + block["bullets"]:
+            url = URL_PATTERN.search(line)
+            if url:
+                link = url.group(0)
+                break
+
+        projects.append({
+            "id": f"proj_{offset + len(projects) + 1}",
+            "name": name,
+            "description": " ".join(description) or NOT_PROVIDED,
+            "technologies": technologies,
+            "link": link
+        })
+    return projects
+
+
+def _parse_listed(lines: list, key: str, offset: int) -> list:
+    """Certifications, awards and publications: one entry per line."""
+    prefix = {"certifications": "cert", "awards": "award", "publications": "pub"}[key]
+    entries = []
+
+    for line in lines:
+        line = _strip_bullet(line)
+        if not line:
+            continue
+        date, line = _pop_date(line)
+        url = URL_PATTERN.search(line)
+        link = url.group(0) if url else NOT_PROVIDED
+        if url:
+            line = (line[:url.start()] + line[url.end():]).strip(" -–|,")
+        parts = [part for part in re.split(r"\s+[-–—|]\s+|\s*,\s+", line) if part]
+        name = parts[0] if parts else line
+        second = parts[1] if len(parts) > 1 else NOT_PROVIDED
+        entry_id = f"{prefix}_{offset + len(entries) + 1}"
+
+        if key == "certifications":
+            entries.append({"id": entry_id, "name": name, "issuer": second, "date": date,
+                            "credential": link})
+        elif key == "awards":
+            entries.append({"id": entry_id, "name": name, "issuer": second, "date": date,
+                            "description": " ".join(parts[2:]) or NOT_PROVIDED})
+        else:
+            entries.append({"id": entry_id, "title": name, "authors": NOT_PROVIDED, "venue": second,
+                            "date": date, "link": link})
+    return entries
+
+
+def _parse_involvement(lines: list, key: str, offset: int) -> list:
+    """Activities and volunteering: role + organization blocks like experience."""
+    prefix = "act" if key == "activities" else "vol"
+    role_field = "title" if key == "activities" else "role"
+    entries = []
+
+    for experience in _parse_experience(lines, 0):
+        entries.append({
+            "id": f"{prefix}_{offset + len(entries) + 1}",
+            "organization": experience["company"] if experience["company"] != NOT_PROVIDED else experience["title"],
+            role_field: experience["title"] if experience["company"] != NOT_PROVIDED else NOT_PROVIDED,
+            "startDate": experience["startDate"],
+            "endDate": experience["endDate"],
+            "description": experience["description"]
+        })
+    return entries
+
+
+def _split_entries(lines: list) -> list:
+    """
+    Group section lines into entries of header lines and bullet lines.
+
+    A new entry starts at a non-bullet line that follows bullets, at a
+    second dated line, or after a blank line once the entry has a date
+    or bullets.
+    """
+    entries = []
+    current = None
+    blank_before = False
+
+    for raw in lines:
+        if not raw:
+            blank_before = True
+            continue
+
+        is_bullet = bool(_BULLET_PATTERN.match(raw)) and not DATE_RANGE_PATTERN.match(_fold(raw))
+        line = _strip_bullet(raw)
+        dated = bool(DATE_RANGE_PATTERN.search(_fold(line)) or DATE_PATTERN.search(_fold(line)))
+
+        if current is not None and not is_bullet:
+            continues_bullet = current["bullets"] and line[:1].islower()
+            if continues_bullet and not blank_before:
+                current["bullets"][-1] += " " + line
+                blank_before = False
+                continue
+            if _is_detail_line(line):
+                # "Technologies: ..." / "GPA: ..." lines belong to the entry above
+                current["headers"].append(line)
+                blank_before = False
+                continue
+            if current["bullets"] or (dated and current["dated"]) or \
+                    (blank_before and current["dated"]):
+                current = None
+
+        if current is None:
+            current = {"headers": [], "bullets": [], "dated": False}
+            entries.append(current)
+
+        if is_bullet:
+            current["bullets"].append(line)
+        else:
+            current["headers"].append(line)
+            current["dated"] = current["dated"] or dated
+        blank_before = False
+
+    return entries
+
+
+def _entry_dates_and_headers(headers: list):
+    """Pull the date range out of an entry's header lines."""
+    start, end = NOT_PROVIDED, NOT_PROVIDED
+    cleaned = []
+
+    for line in headers:
+        if start == NOT_PROVIDED and end == NOT_PROVIDED:
+            match = DATE_RANGE_PATTERN.search(_fold(line))
+            if match:
+                start = line[match.start(1):match.end(1)]
+                end = line[match.start(2):match.end(2)]
+                line = _remove_span(line, match.start(), match.end())
+            else:
+                date, line = _pop_date(line)
+                if date != NOT_PROVIDED:
+                    end = date
+        if line:
+            cleaned.append(line)
+
+    return start, end, cleaned
+
+
+def _split_role(headers: list):
+    """Split "Title - Company" / "Title at Company" or two header lines."""
+    if not headers:
+        return NOT_PROVIDED, NOT_PROVIDED, []
+
+    parts = [part for part in _ROLE_SEPARATORS.split(headers[0], maxsplit=2) if part]
+    if len(parts) >= 2:
+        return parts[0], parts[1], parts[2:] + headers[1:]
+    if len(headers) >= 2:
+        return headers[0], headers[1], headers[2:]
+    return headers[0], NOT_PROVIDED, []
+
+
+def _pop_date(line: str):
+    match = DATE_RANGE_PATTERN.search(_fold(line)) or DATE_PATTERN.search(_fold(line))
+    if not match:
+        return NOT_PROVIDED, line
+    return line[match.start():match.end()], _remove_span(line, match.start(), match.end())
+
+
+def _remove_span(line: str, start: int, end: int) -> str:
+    remaining = line[:start] + " " + line[end:]
+    remaining = re.sub(r"[(\[]\s*[)\]]", "", remaining)
+    return re.sub(r"\s{2,}", " ", remaining).strip(" -–—|,:()")
+
+
+def _skill_category(label: str, default: str) -> str:
+    folded = _fold(label)
+    for category, words in _SKILL_LABELS:
+        if any(word in folded for word in words):
+            return category
+    return default
+
+
+def _looks_like_unknown_header(line: str) -> bool:
+    """Short all-caps lines (e.g. "HOBBIES") introduce sections we have no field for."""
+    cleaned = _clean_header(line)
+    letters = [char for char in cleaned if char.isalpha()]
+    return (
+        len(letters) >= 3
+        and len(cleaned.split()) <= 4
+        and all(char.isupper() for char in letters)
+        and not any(char.isdigit() for char in cleaned)
+        and not _is_contact_line(cleaned)
+    )
+
+
+def _is_detail_line(line: str) -> bool:
+    folded = _fold(line)
+    return bool(_TECH_LABEL_PATTERN.match(folded) or _GPA_PATTERN.match(folded))
+
+
+def _is_contact_line(line: str) -> bool:
+    return bool(EMAIL_PATTERN.search(line) or URL_PATTERN.search(line)
+                or re.search(r"\d[\d\s().-]{6,}\d", line))
+
+
+def _clean_header(line: str) -> str:
+    return _strip_bullet(line or "").strip().rstrip(":：").strip()
+
+
+def _strip_bullet(line: str) -> str:
+    return _BULLET_PATTERN.sub("", line, count=1).strip()
+
+
+def _normalize_header(text: str) -> str:
+    folded = _fold(text)
+    words = re.sub(r"[^\w\s]", " ", folded).split()
+    return " ".join(word for word in words if word not in _CONNECTORS)
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents (Arabic hamza forms become bare alef) without changing length."""
+    return "".join(unicodedata.normalize("NFKD", char)[0].lower()[0] for char in text)
+
+
+def _set_once(current: str, value: str) -> str:
+    return value if current == NOT_PROVIDED else current
+
+
+_HEADER_LOOKUP = {}
+
+
+def _header_lookup() -> dict:
+    """Normalized header -> field, built on first use from SECTION_HEADERS."""
+    if not _HEADER_LOOKUP:
+        for key, aliases in SECTION_HEADERS.items():
+            for alias in aliases:
+                _HEADER_LOOKUP[_normalize_header(alias)] = key
+    return _HEADER_LOOKUP
@@ -3,36 +3,20 @@ CV Structure Parser Module
 Parses CV text into structured fields using AI (Gemini)
 """
 
-from google import generativeai as genai
 import json
-import re
+import os
+from cache import ResultCache, make_cache_key, CACHE_DIR
+from parser import clean_text
+from gemini_client import get_model, get_model_name, generate_text, json_generation_config
+from json_repair import loads_with_repair, call_with_stage_retry
+from cv_segmenter import segment_cv, find_sections, extract_contact, NOT_PROVIDED
 
+# Bump whenever the structure prompt changes so stale cache entries are not reused
+STRUCTURE_PROMPT_VERSION = "2"
 
-def parse_cv_to_structured_data(cv_text: str, api_key: str) -> dict:
-    """
-    Parse CV text into structured data format using Gemini AI.
-    
-    Args:
-        cv_text: The raw CV text
-        api_key: Gemini API key
-    
-    Returns:
-        dict: Structured CV data with fields like summary, experience, skills, etc.
-    """
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.0-flash-exp")
-    
-    prompt = f"""
-Parse this CV/resume into a structured JSON format. Extract and organize all information.
-
-CV Text:
-{cv_text}
-
-Return ONLY valid JSON (no markdown) with this structure:
-
-{{
+STRUCTURE_SCHEMA = """{
     "summary": "Professional summary or objective statement (if present)",
-    "contact": {{
+    "contact": {
         "name": "Full name",
         "email": "email@example.com",
         "phone": "phone number",
@@ -40,9 +24,9 @@ Return ONLY valid JSON (no markdown) with this structure:
         "linkedin": "LinkedIn URL",
         "github": "GitHub URL",
         "portfolio": "Portfolio URL"
-    }},
+    },
     "experience": [
-        {{
+        {
             "id": "exp_1",
             "title": "Job title",
             "company": "Company name",
@@ -51,10 +35,10 @@ Return ONLY valid JSON (no markdown) with this structure:
             "endDate": "End date or Present",
             "description": "Full description of responsibilities and achievements",
             "bullets": ["Bullet point 1", "Bullet point 2"]
-        }}
+        }
     ],
     "education": [
-        {{
+        {
             "id": "edu_1",
             "degree": "Degree name",
             "institution": "School/University name",
@@ -64,84 +48,83 @@ Return ONLY valid JSON (no markdown) with this structure:
             "gpa": "GPA if mentioned",
             "description": "Additional details",
             "achievements": ["Achievement 1", "Achievement 2"]
-        }}
+        }
     ],
-    "skills": {{
+    "skills": {
         "technical": ["skill1", "skill2"],
         "languages": ["language1", "language2"],
         "tools": ["tool1", "tool2"],
         "soft_skills": ["skill1", "skill2"],
         "other": ["other skill 1", "other skill 2"]
-    }},
+    },
     "projects": [
-        {{
+        {
             "id": "proj_1",
             "name": "Project name",
             "description": "Project description",
             "technologies": ["tech1", "tech2"],
             "link": "Project URL if available"
-        }}
+        }
     ],
     "certifications": [
-        {{
+        {
             "id": "cert_1",
             "name": "Certification name",
             "issuer": "Issuing organization",
             "date": "Date obtained",
             "credential": "Credential ID or URL"
-        }}
+        }
     ],
     "awards": [
-        {{
+        {
             "id": "award_1",
             "name": "Award name",
             "issuer": "Issuing organization",
             "date": "Date",
             "description": "Description"
-        }}
+        }
     ],
     "publications": [
-        {{
+        {
             "id": "pub_1",
             "title": "Publication title",
             "authors": "Authors",
             "venue": "Conference/Journal name",
             "date": "Date",
             "link": "URL if available"
-        }}
+        }
     ],
     "activities": [
-        {{
+        {
             "id": "act_1",
             "organization": "Organization name (e.g., IEEE, club, association)",
             "title": "Role/Position",
             "startDate": "Start date",
             "endDate": "End date or Present",
             "description": "Description of involvement and achievements"
-        }}
+        }
     ],
     "volunteer": [
-        {{
+        {
             "id": "vol_1",
             "organization": "Organization name",
             "role": "Role/Position",
             "startDate": "Start date",
             "endDate": "End date or Present",
             "description": "Description"
-        }}
+        }
     ],
-    "other_sections": {{
+    "other_sections": {
         "section_name_1": [
-            {{
+            {
                 "id": "other_1",
                 "content": "Any content that doesn't fit standard categories"
-            }}
+            }
         ]
-    }}
-}}
+    }
+}"""
 
-Guidelines:
-- Extract ALL information from the CV accurately, including unusual or non-standard sections
+STRUCTURE_GUIDELINES = """- Extract ALL information from the CV accurately, including unusual or non-standard sections
 - Use "Not provided" for missing fields
 - Generate unique IDs for each entry (exp_1, exp_2, edu_1, etc.)
 - Preserve the original wording and details
@@ -151,26 +134,162 @@ Guidelines:
 - Activities should include: clubs, associations, memberships, extracurricular activities, leadership roles
 - Common activity section names: "Vie Associative", "Extracurricular Activities", "Leadership", "Memberships", "Student Organizations"
 - If you find sections that don't match the standard fields above, add them to "other_sections" with the section name as the key
-- Capture EVERY section header you see in the CV, even if it's unique or uncommon
+- Capture EVERY section header you see in the CV, even if it's unique or uncommon"""
+
+_structure_cache = ResultCache(
+    "structure_parse",
+    max_entries=int(os.getenv("STRUCTURE_CACHE_SIZE", "256")),
+    ttl_seconds=float(os.getenv("STRUCTURE_CACHE_TTL", "604800")),
+    disk_dir=os.path.join(CACHE_DIR, 'structure')
+    if os.getenv("STRUCTURE_CACHE_DISK", "false").lower() == "true" else None
+)
+
+
+def get_structure_cache_stats() -> dict:
+    """Return hit/miss counters of the structure parse cache."""
+    return _structure_cache.stats()
+
+
+def parse_cv_locally(cv_text: str) -> dict:
+    """
+    Parse CV text with the rule-based segmenter only (no API call).
+    
+    Returns:
+        dict: Same shape as parse_cv_to_structured_data, with source "rule_based"
+    """
+    return {
+        "status": "success",
+        "structured_data": segment_cv(cv_text),
+        "original_text": cv_text,
+        "model": None,
+        "source": "rule_based"
+    }
+
+
+def _segmenter_hints(cv_text: str):
+    """
+    Contact fields and section headers found by the rule-based segmenter,
+    formatted for the prompt (empty string if nothing was found).
+    
+    Returns:
+        tuple: (prompt text, contact dict)
+    """
+    contact = extract_contact(cv_text)
+    found_contact = {field: value for field, value in contact.items() if value != NOT_PROVIDED}
+    headers = [
+        f'"{section["header"]}" -> {"other_sections" if section["key"] == "other" else section["key"]}'
+        for section in find_sections(cv_text)
+    ]
+    
+    if not found_contact and not headers:
+        return "", contact
+    
+    hints = ["Pre-extracted by a rule-based parser (copy these as-is unless the CV text clearly "
+             "contradicts them, and focus on the remaining fields):"]
+    if found_contact:
+        hints.append(f"- Contact: {json.dumps(found_contact, ensure_ascii=False)}")
+    if headers:
+        hints.append(f"- Section headers in reading order: {'; '.join(headers)}")
+    return "\n".join(hints), contact
+
+
+def _fill_contact_gaps(parsed: dict, contact: dict):
+    """Use rule-based contact values where the model returned nothing."""
+    parsed_contact = parsed.get("contact")
+    if not isinstance(parsed_contact, dict):
+        parsed["contact"] = dict(contact)
+        return
+    for field, value in contact.items():
+        if value != NOT_PROVIDED and parsed_contact.get(field) in (None, "", NOT_PROVIDED):
+            parsed_contact[field] = value
+
+
+def parse_cv_to_structured_data(cv_text: str, api_key: str, use_cache: bool = True,
+                                fallback_to_local: bool = True) -> dict:
+    """
+    Parse CV text into structured data format using Gemini AI.
+    
+    Contact details and section headers found by the rule-based segmenter
+    are passed to the model as pre-filled hints.
+    
+    Args:
+        cv_text: The raw CV text
+        api_key: Gemini API key
+        use_cache: Reuse a previous parse of the same text if available
+        fallback_to_local: Return the rule-based parse instead of an error
+                           when the API call or its output fails
+    
+    Returns:
+        dict: Structured CV data with fields like summary, experience, skills, etc.
+    """
+    cache_key = make_cache_key(get_model_name("structure"), STRUCTURE_PROMPT_VERSION, clean_text(cv_text))
+    
+    if use_cache:
+        cached = _structure_cache.get(cache_key)
+        if cached is not None:
+            print("⚡ Structure parse cache hit")
+            return {
+                "status": "success",
+                "structured_data": cached,
+                "original_text": cv_text,
+                "cached": True,
+                "token_usage": {}
+            }
+    
+    hints, local_contact = _segmenter_hints(cv_text)
+    
+    prompt = f"""
+Parse this CV/resume into a structured JSON format. Extract and organize all information.
+
+CV Text:
+{cv_text}
+
+{hints}
+
+Return ONLY valid JSON (no markdown) with this structure:
+
+{STRUCTURE_SCHEMA}
+
+Guidelines:
+{STRUCTURE_GUIDELINES}
 """
     
+    responses = []
+    usage = {}
+    repair = {}
+    
+    def generate(attempt):
+        # JSON mode without a response schema: other_sections uses the section
+        # names as keys, which the schema subset cannot describe
+        responses.append(generate_text(model, prompt, generation_config=json_generation_config(),
+                                       stage="structure", usage=usage))
+        return responses[-1]
+    
+    def build(response_text):
+        parsed = loads_with_repair(response_text, repair)
+        if not isinstance(parsed, dict):
+            raise TypeError(f"Expected a JSON object, got {type(parsed).__name__}")
+        return parsed
+    
     try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # Remove any markdown code blocks
-        json_match = re.search(r'```(?:json)?\s*(.*?)\s*```', response_text, re.DOTALL)
-        if json_match:
-            response_text = json_match.group(1).strip()
-        
-        parsed = json.loads(response_text)
+        model = get_model("structure", api_key)
+        parsed = call_with_stage_retry("structure", generate, build)
+        _fill_contact_gaps(parsed, local_contact)
+        if repair.get("repair") != "truncated":
+            _structure_cache.set(cache_key, parsed)
         
         # Add metadata
         result = {
             "status": "success",
             "structured_data": parsed,
-            "original_text": cv_text
+            "original_text": cv_text,
+            "model": get_model_name("structure"),
+            "token_usage": usage
         }
+        if repair.get("repair") == "truncated":
+            # The last, incomplete value was dropped: serve it but don't cache it
+            print("⚠️  Structure response was truncated; result not cached")
+            result["repaired"] = "truncated"
         
         print(f"✅ Successfully parsed CV into structured data")
         print(f"   - Experience entries: {len(parsed.get('experience', []))}")
@@ -180,10 +299,10 @@ Guidelines:
         
         return result
         
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, TypeError) as e:
         print(f"❌ JSON parsing error: {str(e)}")
-        print(f"Raw response: {response_text[:300]}")
-        return {
+        print(f"Raw response: {(responses[-1] if responses else '')[:300]}")
+        error = {
             "status": "error",
             "message": "Failed to parse CV structure",
             "original_text": cv_text
@@ -191,17 +310,30 @@ Guidelines:
     
     except Exception as e:
         print(f"❌ Error parsing CV structure: {str(e)}")
-        return {
+        error = {
             "status": "error",
             "message": f"Error: {str(e)}",
             "original_text": cv_text
         }
+    
+    if not fallback_to_local:
+        return error
+    
+    print("🧩 Falling back to the rule-based CV segmenter")
+    result = parse_cv_locally(cv_text)
+    result["fallback_reason"] = error["message"]
+    result["token_usage"] = usage
+    return result
 
 
 def apply_suggestion_to_structured_cv(structured_cv: dict, suggestion: dict) -> dict:
     """
     Apply a suggestion to the structured CV data.
     
+    Only the containers along the suggestion's fieldPath are copied; the
+    rest of the updated CV is shared with the original, which is left
+    unchanged.
+    
     Args:
         structured_cv: The structured CV data
         suggestion: Suggestion with targetField and improvedValue
@@ -211,39 +343,131 @@ def apply_suggestion_to_structured_cv(structured_cv: dict, suggestion: dict) ->
     """
     target_field = suggestion.get('targetField')
     improved_value = suggestion.get('improvedValue')
-    field_path = suggestion.get('fieldPath', [])
+    field_path = suggestion.get('fieldPath') or [target_field]
     
     if not target_field or not improved_value:
         return structured_cv
     
-    # Create a copy to avoid mutating the original
-    updated_cv = json.loads(json.dumps(structured_cv))
-    
-    # Navigate to the target field using the field_path
-    current = updated_cv
-    
     try:
-        # If field_path is provided, navigate through nested structure
-        if field_path:
-            for i, key in enumerate(field_path[:-1]):
-                if isinstance(current, list):
-                    current = current[int(key)]
-                else:
-                    current = current[key]
-            
-            # Update the final field
-            final_key = field_path[-1]
-            if isinstance(current, list):
-                current[int(final_key)] = improved_value
-            else:
-                current[final_key] = improved_value
-        else:
-            # Simple field update
-            updated_cv[target_field] = improved_value
-        
+        updated_cv, _ = _set_path(structured_cv, field_path, improved_value, set())
         print(f"✅ Applied suggestion to field: {target_field}")
         return updated_cv
         
-    except (KeyError, IndexError, TypeError) as e:
+    except (KeyError, IndexError, TypeError, ValueError) as e:
         print(f"❌ Error applying suggestion: {str(e)}")
         return structured_cv
+
+
+def apply_suggestions_to_structured_cv(structured_cv: dict, suggestions: list, atomic: bool = True) -> dict:
+    """
+    Apply several suggestions in one pass.
+    
+    Containers along each fieldPath are copied once for the whole batch
+    (a container already copied for an earlier suggestion is updated in
+    place), so the original CV is never modified.
+    
+    Args:
+        structured_cv: The structured CV data
+        suggestions: Suggestions with fieldPath (or targetField) and improvedValue
+        atomic: If any suggestion cannot be applied, apply none of them
+    
+    Returns:
+        dict: {'updated_cv', 'patch' (RFC 6902 operations turning structured_cv
+              into updated_cv), 'results' (one {'suggestionId', 'path', 'status',
+              'message'} per suggestion; status is applied, skipped, failed or
+              rolled_back), 'applied', 'failed'}
+    """
+    updated_cv = structured_cv
+    copied = set()
+    patch = []
+    results = []
+    changed_paths = set()
+    
+    for suggestion in suggestions:
+        if not isinstance(suggestion, dict):
+            results.append({"suggestionId": None, "path": None, "status": "failed",
+                            "message": "Suggestion must be an object"})
+            continue
+        field_path = suggestion.get('fieldPath') or ([suggestion['targetField']] if suggestion.get('targetField') else [])
+        pointer = _json_pointer(field_path)
+        result = {"suggestionId": suggestion.get('suggestionId'), "path": pointer}
+        results.append(result)
+        
+        if not field_path or 'improvedValue' not in suggestion:
+            result.update(status="failed", message="Suggestion has no fieldPath or improvedValue")
+            continue
+        if pointer in changed_paths:
+            result.update(status="skipped", message="Another suggestion in this batch already changed this field")
+            continue
+        
+        try:
+            updated_cv, existed = _set_path(updated_cv, field_path, suggestion['improvedValue'], copied)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            result.update(status="failed", message=f"Field path not found: {str(e)}")
+            continue
+        
+        changed_paths.add(pointer)
+        patch.append({"op": "replace" if existed else "add", "path": pointer, "value": suggestion['improvedValue']})
+        result["status"] = "applied"
+    
+    failed = sum(1 for result in results if result["status"] == "failed")
+    if failed and atomic:
+        for result in results:
+            if result["status"] == "applied":
+                result.update(status="rolled_back", message="Not applied because another suggestion failed")
+        updated_cv, patch = structured_cv, []
+    
+    applied = sum(1 for result in results if result["status"] == "applied")
+    print(f"✅ Applied {applied}/{len(suggestions)} suggestions ({failed} failed)")
+    return {"updated_cv": updated_cv, "patch": patch, "results": results, "applied": applied, "failed": failed}
+
+
+def _set_path(root, field_path: list, value, copied: set):
+    """
+    Set root[path...] = value without modifying containers that are not in
+    `copied` (the ids of containers this update owns); those along the path
+    are shallow-copied first.
+    
+    Returns:
+        tuple: (new root, whether the final key already existed)
+    """
+    root = _owned_copy(root, copied)
+    current = root
+    for key in field_path[:-1]:
+        key = _list_index(key) if isinstance(current, list) else key
+        child = _owned_copy(current[key], copied)
+        current[key] = child
+        current = child
+    
+    final_key = field_path[-1]
+    if isinstance(current, list):
+        final_key = _list_index(final_key)
+        current[final_key]  # IndexError if the entry does not exist
+        existed = True
+    elif isinstance(current, dict):
+        existed = final_key in current
+    else:
+        raise TypeError(f"cannot set {final_key!r} on a {type(current).__name__}")
+    current[final_key] = value
+    return root, existed
+
+
+def _list_index(key) -> int:
+    # Negative indexes would silently count from the end and are not valid JSON Pointers
+    index = int(key)
+    if index < 0:
+        raise IndexError(f"negative list index {index}")
+    return index
+
+
+def _owned_copy(container, copied: set):
+    if not isinstance(container, (dict, list)) or id(container) in copied:
+        return container
+    container = dict(container) if isinstance(container, dict) else list(container)
+    copied.add(id(container))
+    return container
+
+
+def _json_pointer(field_path: list) -> str:
+    """RFC 6901 pointer for a fieldPath (e.g. ["experience", 0, "description"] -> /experience/0/description)."""
+    return "".join("/" + str(part).replace("~", "~0").replace("/", "~1") for part in field_path)
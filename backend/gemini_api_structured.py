@@ -3,50 +3,32 @@ Enhanced Gemini API Module for Structured CV Analysis
 Generates suggestions that target specific fields in the structured CV data
 """
 
-from google import generativeai as genai
+import hashlib
 import json
-import re
+import os
 from PIL import Image
+from cache import ResultCache, make_cache_key
+from gemini_client import get_model, get_model_name, generate_text, json_generation_config, add_usage
+from cv_structure_parser import STRUCTURE_SCHEMA, STRUCTURE_GUIDELINES
+from json_repair import loads_with_repair, call_with_stage_retry
+from json_stream import JSONArrayItemStream
+from keyword_matcher import KeywordMatcher, normalize_token, tokenize
+from prompt_builder import build_cv_prompt_data, compact_cv
+from parser import clean_text
 
+# Bump whenever the analysis prompt or result mapping changes
+ANALYSIS_PROMPT_VERSION = "2"
+COMBINED_PROMPT_VERSION = "1"
+SECTIONED_PROMPT_VERSION = "2"
+INCREMENTAL_PROMPT_VERSION = "1"
 
-def analyze_structured_cv_with_gemini(structured_cv: dict, job_description: str, api_key: str, cv_images: list = None):
-    """
-    Analyze structured CV data with Gemini and return field-targeted suggestions.
-    
-    Args:
-        structured_cv: The structured CV data (from cv_structure_parser)
-        job_description: The job description to match against (optional)
-        api_key: Gemini API key
-        cv_images: Optional list of PIL Image objects showing CV layout
-    
-    Returns:
-        dict: Analysis with field-targeted suggestions
-    """
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.0-flash-exp")
-    
-    # Convert structured CV to readable format for AI
-    cv_json = json.dumps(structured_cv, indent=2)
-    
-    # Build prompt based on whether job description is provided
-    job_context = f"""
-Job Description:
-{job_description}
-
-Analyze this structured CV against the job description and provide detailed feedback on job relevance and keyword matching.
-""" if job_description and job_description.strip() else """
-No specific job description provided. Analyze the CV for general quality, formatting, and best practices.
-"""
-    
-    prompt = f"""
-Analyze this structured CV and provide detailed, field-targeted feedback with STRICT, REALISTIC scoring.
+# Number of page images sent to Gemini for visual analysis
+MAX_ANALYSIS_IMAGES = 3
 
-Structured CV Data:
-{cv_json}
-
-{job_context}
+# Approximate token budget for the unchanged part of the CV in incremental re-scoring prompts
+INCREMENTAL_CONTEXT_TOKEN_BUDGET = int(os.getenv("INCREMENTAL_CONTEXT_TOKEN_BUDGET", "800"))
 
-LANGUAGE REQUIREMENT:
+ANALYSIS_RUBRIC = """LANGUAGE REQUIREMENT:
 - **CRITICAL**: Detect the language of the CV from the content
 - **All recommendations, suggestions, and improved text MUST be in the SAME language as the CV**
 - If CV is in French, respond in French
@@ -130,45 +112,46 @@ FIELD-TARGETED SUGGESTIONS REQUIREMENTS:
 - Identify at least 3-5 critical/high severity issues if they exist
 - Don't suggest changes to text that's already strong (9-10/10 quality)
 - Be specific about WHY each change matters (recruiter impact, ATS compatibility, clarity)
-- **All explanations, problems, and suggestions must be in the CV's language**
-
-Return your response as **valid JSON** with this EXACT structure (no markdown):
+- **All explanations, problems, and suggestions must be in the CV's language**"""
 
-{{
-    "formatting": {{
+# Pieces of the analysis output format, shared by the full analysis prompt
+# and the smaller prompts of the sectioned mode
+_FORMAT_SCORES = """    "formatting": {
         "score": <number 0-10>,
         "issues": ["Specific issue with exact location (IN CV LANGUAGE), e.g., 'Inconsistent date formatting in Experience section - mix of MM/YYYY and Month Year'"],
         "suggestions": ["Actionable fix with example (IN CV LANGUAGE), e.g., 'Standardize all dates to MM/YYYY format throughout CV'"]
-    }},
-    "content": {{
+    },
+    "content": {
         "score": <number 0-10>,
         "strengths": ["Specific strength with concrete example from CV (IN CV LANGUAGE), e.g., 'Strong quantification in Python project: 15% efficiency improvement'"],
         "weaknesses": ["Specific weakness with location (IN CV LANGUAGE), e.g., 'Experience section lacks metrics - 4 out of 6 bullets have no quantification'"],
         "suggestions": ["Concrete improvement with before/after example (IN CV LANGUAGE)"]
-    }},
-    "general": {{
+    },
+    "general": {
         "overall_score": <number 0-10>,
         "summary": "Honest 2-3 sentence assessment explaining the score (IN CV LANGUAGE). Mention specific strengths and the main areas holding the CV back.",
         "top_priorities": [
-            {{
+            {
                 "priority": 1,
                 "action": "Specific, actionable task with exact location (IN CV LANGUAGE) (e.g., 'Add quantified metrics to all 5 bullet points in Software Developer role at TechCorp')",
                 "impact": "High|Medium|Low",
                 "time_estimate": "5 mins|15 mins|30 mins|1 hour",
                 "category": "Formatting|Content|Keywords|ATS"
-            }}
+            }
         ]
-    }},
-    "sections": [
-        {{
+    }"""
+
+_FORMAT_SECTIONS = """    "sections": [
+        {
             "name": "Experience|Education|Skills|Summary|etc",
             "quality_score": <number 0-10>,
             "feedback": "Specific, honest feedback with examples from section (IN CV LANGUAGE). Identify what's weak and why.",
             "suggestions": ["Concrete suggestion with example (IN CV LANGUAGE): 'Replace vague bullet \"Worked with databases\" with \"Optimized PostgreSQL queries reducing load time from 3s to 0.8s for 10K+ daily users\"'"]
-        }}
-    ],
-    "field_suggestions": [
-        {{
+        }
+    ]"""
+
+_FORMAT_FIELD_SUGGESTIONS = """    "field_suggestions": [
+        {
             "suggestionId": <unique number>,
             "targetField": "summary|experience|education|skills|etc",
             "fieldPath": ["experience", 0, "description"] or ["summary"] or ["contact", "email"],
@@ -180,28 +163,29 @@ Return your response as **valid JSON** with this EXACT structure (no markdown):
             "problem": "Clear, specific explanation of what's wrong (IN CV LANGUAGE) (e.g., 'Lacks quantification and uses weak passive voice')",
             "explanation": "Why this change matters for recruiters/ATS (IN CV LANGUAGE) (e.g., 'Quantified achievements increase interview callbacks by 40% and show measurable impact')",
             "impact": "High|Medium|Low"
-        }}
-    ],
-    "quick_wins": [
-        {{
+        }
+    ]"""
+
+_FORMAT_QUICK_WINS = """    "quick_wins": [
+        {
             "change": "Specific change with exact location and current issue (IN CV LANGUAGE) (e.g., 'Change \"Responsible for managing\" to \"Managed 5-person team, delivering 3 projects on time\"')",
             "where": "Exact section and position (IN CV LANGUAGE) (e.g., 'Experience section, 2nd bullet under current role')",
             "targetField": "field name if applicable",
             "fieldPath": ["path", "to", "field"],
             "effort": "5 mins|15 mins",
             "impact": "High|Medium"
-        }}
-    ],
-    "ats_analysis": {{
+        }
+    ]"""
+
+_FORMAT_ATS = """    "ats_analysis": {
         "relevance_score": <number 0-100>,
         "keyword_matches": ["Specific keywords found with count (IN CV LANGUAGE), e.g., 'Python (mentioned 3x)', 'SQL (2x)'"],
         "missing_keywords": ["Critical keywords from job description that are absent (IN CV LANGUAGE), e.g., 'Docker', 'CI/CD', 'Agile'"],
         "recommendations": ["Specific placement suggestions (IN CV LANGUAGE), e.g., 'Add Docker keyword to DevOps project description in Experience section'"]
-    }}
-}}
+    }"""
 
-IMPORTANT Guidelines for field_suggestions:
-- Provide 8-15 high-impact, field-targeted suggestions (prioritize critical/high severity first)
+_FIELD_SUGGESTION_GUIDELINES = """IMPORTANT Guidelines for field_suggestions:
+- Provide {count} high-impact, field-targeted suggestions (prioritize critical/high severity first)
 - Each suggestion must target a SPECIFIC field with exact fieldPath
 - Use fieldPath array notation:
   * Simple fields: ["summary"] or ["contact", "email"]
@@ -212,98 +196,289 @@ IMPORTANT Guidelines for field_suggestions:
 - improvedValue must be COMPLETE replacement text, ready to use as-is (IN CV LANGUAGE)
 - Focus on changes that matter: quantification, action verbs, clarity, keywords, impact
 - Don't waste suggestions on already-strong content (only suggest if score <8/10)
-- **MAINTAIN THE SAME LANGUAGE AS THE CV IN ALL TEXT FIELDS**
+- **MAINTAIN THE SAME LANGUAGE AS THE CV IN ALL TEXT FIELDS**"""
 
-REMEMBER: 
+_FORMAT_REMINDERS = """REMEMBER: 
 - **Average CVs score 5-6/10, not 8/10**
 - **Only exceptional CVs deserve 9-10/10**
 - **Be specific with exact field locations and complete replacement text**
 - **Prioritize high-severity issues that actually hurt job prospects**
 - **Every criticism must be constructive with concrete fix**
 - **Compare against real market standards, not idealized perfection**
-- **🌍 ALL RECOMMENDATIONS MUST BE IN THE SAME LANGUAGE AS THE CV 🌍**
-"""
-    
-    try:
-        # Generate content with or without images
-        if cv_images and len(cv_images) > 0:
-            content_parts = [prompt]
-            for i, img in enumerate(cv_images[:3]):
-                if isinstance(img, str):
-                    img = Image.open(img)
-                content_parts.append(img)
-            print(f"   🖼️  Sending {len(content_parts) - 1} images to Gemini for visual analysis...")
-            response = model.generate_content(content_parts)
-        else:
-            response = model.generate_content(prompt)
-        
-        response_text = response.text.strip()
-        
-        # Remove any markdown code blocks
-        json_match = re.search(r'```(?:json)?\s*(.*?)\s*```', response_text, re.DOTALL)
-        if json_match:
-            response_text = json_match.group(1).strip()
-        
-        parsed = json.loads(response_text)
-        
-        # Convert to frontend-compatible structure
-        ats_analysis = parsed.get("ats_analysis", {})
-        
-        # Validate keywords (similar to original implementation)
-        cv_text = json.dumps(structured_cv).lower()
-        validated_keyword_matches = []
-        validated_missing_keywords = []
-        
-        def is_keyword_in_text(keyword, text):
-            escaped_keyword = re.escape(keyword.lower())
-            pattern = rf'\b{escaped_keyword}\b'
-            return bool(re.search(pattern, text.lower()))
-        
-        for keyword in ats_analysis.get("keyword_matches", []):
-            if is_keyword_in_text(keyword, cv_text):
-                validated_keyword_matches.append(keyword)
-            else:
-                validated_missing_keywords.append(keyword)
-        
-        for keyword in ats_analysis.get("missing_keywords", []):
-            if not is_keyword_in_text(keyword, cv_text):
-                validated_missing_keywords.append(keyword)
-            else:
-                validated_keyword_matches.append(keyword)
-        
-        validated_keyword_matches = list(set(validated_keyword_matches))
-        validated_missing_keywords = list(set(validated_missing_keywords))
-        
-        analysis_result = {
-            'status': 'success',
-            'analysis': {
-                'overall_score': int(parsed["general"]["overall_score"] * 10),
-                'ats_score': ats_analysis.get("relevance_score", int((parsed["content"]["score"] + parsed["formatting"]["score"]) * 5)),
-                'readability_score': 80 + (parsed["formatting"]["score"] - 5) * 4,
-                'summary': parsed["general"]["summary"],
-                'critical_issues': parsed["formatting"]["issues"] + parsed["content"]["weaknesses"],
-                'field_suggestions': parsed.get("field_suggestions", []),  # NEW: Field-targeted suggestions
-                'section_analysis': parsed.get("sections", []),
-                'quick_wins': parsed.get("quick_wins", []),
-                'top_priorities': parsed["general"]["top_priorities"],
-                'grammar_and_clarity': {"issues": parsed["formatting"]["issues"]},
-                'job_match_analysis': {
-                    "relevance_score": ats_analysis.get("relevance_score", parsed["content"]["score"] * 10),
-                    "keyword_matches": validated_keyword_matches,
-                    "missing_keywords": validated_missing_keywords,
-                    "recommendations": ats_analysis.get("recommendations", [])
-                },
-                'global_analysis': {
-                    "formatting_score": parsed["formatting"]["score"],
-                    "content_score": parsed["content"]["score"]
+- **🌍 ALL RECOMMENDATIONS MUST BE IN THE SAME LANGUAGE AS THE CV 🌍**"""
+
+
+def _output_format(parts: list, suggestion_count: str = None) -> str:
+    """JSON skeleton made of the given format pieces, followed by the guidelines."""
+    output_format = "{\n" + ",\n".join(parts) + "\n}\n\n"
+    if suggestion_count:
+        output_format += _FIELD_SUGGESTION_GUIDELINES.format(count=suggestion_count) + "\n\n"
+    return output_format + _FORMAT_REMINDERS
+
+
+ANALYSIS_OUTPUT_FORMAT = _output_format(
+    [_FORMAT_SCORES, _FORMAT_SECTIONS, _FORMAT_FIELD_SUGGESTIONS, _FORMAT_QUICK_WINS, _FORMAT_ATS], "8-15"
+)
+SECTION_OUTPUT_FORMAT = _output_format([_FORMAT_SECTIONS, _FORMAT_FIELD_SUGGESTIONS, _FORMAT_QUICK_WINS], "2-5")
+OVERVIEW_OUTPUT_FORMAT = _output_format([_FORMAT_SCORES, _FORMAT_ATS])
+
+# Sectioned mode: one small call per group of CV fields, run concurrently,
+# plus an overview call for the scores. Suggestion IDs are
+# <group position> * SECTION_SUGGESTION_ID_BLOCK + n, so they do not depend
+# on which call finishes first.
+ANALYSIS_SECTION_GROUPS = (
+    ("profile", ("summary", "contact")),
+    ("experience", ("experience",)),
+    ("education", ("education",)),
+    ("skills", ("skills",)),
+    ("projects", ("projects",)),
+    ("other", ("certifications", "awards", "publications", "activities", "volunteer", "other_sections")),
+)
+SECTION_SUGGESTION_ID_BLOCK = 100
+
+_SEVERITY_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# Response schema for ANALYSIS_OUTPUT_FORMAT. The schema subset has no
+# mixed-type arrays, so fieldPath items are strings here and numeric
+# segments are turned back into list indexes by _normalize_field_path.
+ANALYSIS_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "formatting": {
+            "type": "object",
+            "properties": {"score": {"type": "number"}, "issues": _STRING_LIST, "suggestions": _STRING_LIST},
+            "required": ["score", "issues", "suggestions"]
+        },
+        "content": {
+            "type": "object",
+            "properties": {
+                "score": {"type": "number"},
+                "strengths": _STRING_LIST,
+                "weaknesses": _STRING_LIST,
+                "suggestions": _STRING_LIST
+            },
+            "required": ["score", "strengths", "weaknesses", "suggestions"]
+        },
+        "general": {
+            "type": "object",
+            "properties": {
+                "overall_score": {"type": "number"},
+                "summary": {"type": "string"},
+                "top_priorities": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "priority": {"type": "integer"},
+                            "action": {"type": "string"},
+                            "impact": {"type": "string"},
+                            "time_estimate": {"type": "string"},
+                            "category": {"type": "string"}
+                        },
+                        "required": ["priority", "action", "impact"]
+                    }
                 }
+            },
+            "required": ["overall_score", "summary", "top_priorities"]
+        },
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "quality_score": {"type": "number"},
+                    "feedback": {"type": "string"},
+                    "suggestions": _STRING_LIST
+                },
+                "required": ["name", "quality_score", "feedback"]
             }
+        },
+        "field_suggestions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "suggestionId": {"type": "integer"},
+                    "targetField": {"type": "string"},
+                    "fieldPath": _STRING_LIST,
+                    "fieldId": {"type": "string"},
+                    "originalValue": {"type": "string"},
+                    "improvedValue": {"type": "string"},
+                    "issue_type": {"type": "string", "enum": ["grammar", "clarity", "impact", "keyword", "formatting"]},
+                    "severity": {"type": "string", "enum": ["critical", "high", "medium", "low"]},
+                    "problem": {"type": "string"},
+                    "explanation": {"type": "string"},
+                    "impact": {"type": "string", "enum": ["High", "Medium", "Low"]}
+                },
+                "required": ["suggestionId", "targetField", "fieldPath", "originalValue", "improvedValue", "severity"]
+            }
+        },
+        "quick_wins": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "change": {"type": "string"},
+                    "where": {"type": "string"},
+                    "targetField": {"type": "string"},
+                    "fieldPath": _STRING_LIST,
+                    "effort": {"type": "string"},
+                    "impact": {"type": "string"}
+                },
+                "required": ["change", "where"]
+            }
+        },
+        "ats_analysis": {
+            "type": "object",
+            "properties": {
+                "relevance_score": {"type": "integer"},
+                "keyword_matches": _STRING_LIST,
+                "missing_keywords": _STRING_LIST,
+                "recommendations": _STRING_LIST
+            },
+            "required": ["relevance_score", "keyword_matches", "missing_keywords", "recommendations"]
         }
+    },
+    "required": ["formatting", "content", "general", "sections", "field_suggestions", "quick_wins", "ats_analysis"]
+}
+
+
+def _schema_subset(keys: list) -> dict:
+    properties = ANALYSIS_RESPONSE_SCHEMA["properties"]
+    return {"type": "object", "properties": {key: properties[key] for key in keys}, "required": list(keys)}
+
+
+SECTION_RESPONSE_SCHEMA = _schema_subset(["sections", "field_suggestions", "quick_wins"])
+OVERVIEW_RESPONSE_SCHEMA = _schema_subset(["formatting", "content", "general", "ats_analysis"])
+
+_analysis_cache = ResultCache(
+    "analysis",
+    max_entries=int(os.getenv("ANALYSIS_CACHE_SIZE", "128")),
+    ttl_seconds=float(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+)
+
+
+def get_analysis_cache_stats() -> dict:
+    """Return hit/miss counters of the analysis result cache."""
+    return _analysis_cache.stats()
+
+
+def _image_fingerprint(img) -> str:
+    """Hash a page image (encoded blob, PIL Image or file path) by its content."""
+    digest = hashlib.sha256()
+    if isinstance(img, dict):
+        digest.update(img.get('mime_type', '').encode('utf-8'))
+        digest.update(img['data'])
+    elif isinstance(img, str):
+        with open(img, 'rb') as f:
+            digest.update(f.read())
+    else:
+        digest.update(f"{img.mode}:{img.size}".encode('utf-8'))
+        digest.update(img.tobytes())
+    return digest.hexdigest()
+
+
+def _analysis_cache_key(structured_cv: dict, job_description: str, cv_images: list) -> str:
+    """Canonical key for (structured CV, normalized job description, page images)."""
+    normalized_job = " ".join((job_description or "").split())
+    image_hashes = [_image_fingerprint(img) for img in (cv_images or [])[:MAX_ANALYSIS_IMAGES]]
+    return make_cache_key(get_model_name("analysis"), ANALYSIS_PROMPT_VERSION, structured_cv, normalized_job, image_hashes)
+
+
+def _combined_cache_key(cv_text: str, job_description: str, cv_images: list) -> str:
+    """Canonical key for the single-call mode (cleaned CV text instead of structured CV)."""
+    normalized_job = " ".join((job_description or "").split())
+    image_hashes = [_image_fingerprint(img) for img in (cv_images or [])[:MAX_ANALYSIS_IMAGES]]
+    return make_cache_key("combined", get_model_name("combined"), COMBINED_PROMPT_VERSION,
+                          clean_text(cv_text), normalized_job, image_hashes)
+
+
+def analyze_structured_cv_with_gemini(structured_cv: dict, job_description: str, api_key: str,
+                                      cv_images: list = None, use_cache: bool = True,
+                                      on_suggestion=None):
+    """
+    Analyze structured CV data with Gemini and return field-targeted suggestions.
+    
+    Args:
+        structured_cv: The structured CV data (from cv_structure_parser)
+        job_description: The job description to match against (optional)
+        api_key: Gemini API key
+        cv_images: Optional list of page images showing CV layout: encoded
+                   {'mime_type', 'data'} blobs (from parser), PIL Images or paths
+        use_cache: Reuse a previous identical analysis if available
+        on_suggestion: Optional callback receiving each field suggestion as
+                       soon as it has been streamed (not called on cache hits)
+    
+    Returns:
+        dict: Analysis with field-targeted suggestions
+    """
+    cache_key = _analysis_cache_key(structured_cv, job_description, cv_images)
+    
+    if use_cache:
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            print("⚡ Analysis cache hit")
+            cached['cached'] = True
+            cached['token_usage'] = {}  # Nothing was billed for this result
+            return cached
+    
+    model = get_model("analysis", api_key)
+    
+    # Compact CV data (no placeholders or empty fields), within the token budget
+    cv_json = build_cv_prompt_data(structured_cv)
+    
+    # Build prompt based on whether job description is provided
+    job_context = _build_job_context(job_description)
+    
+    prompt = f"""
+Analyze this structured CV and provide detailed, field-targeted feedback with STRICT, REALISTIC scoring.
+
+Structured CV Data:
+{cv_json}
+
+{job_context}
+
+{ANALYSIS_RUBRIC}
+
+Return your response as **valid JSON** with this EXACT structure (no markdown):
+
+{ANALYSIS_OUTPUT_FORMAT}
+"""
+    
+    responses = []
+    usage = {}
+    
+    def generate(attempt):
+        # Generate content with or without images. Only the first attempt is
+        # streamed to on_suggestion so a retry does not repeat suggestions.
+        responses.append(generate_text(
+            model,
+            _build_content_parts(prompt, cv_images),
+            generation_config=json_generation_config(ANALYSIS_RESPONSE_SCHEMA),
+            on_text=_suggestion_streamer(on_suggestion) if attempt == 0 else None,
+            stage="analysis",
+            usage=usage
+        ))
+        return responses[-1]
+    
+    repair = {}
+    try:
+        analysis_result = call_with_stage_retry(
+            "analysis",
+            generate,
+            lambda response_text: _build_analysis_result(loads_with_repair(response_text, repair), structured_cv)
+        )
+        analysis_result['token_usage'] = usage
+        _cache_unless_truncated(cache_key, analysis_result, repair)
         
-        print(f"✅ Generated {len(parsed.get('field_suggestions', []))} field-targeted suggestions")
+        print(f"✅ Generated {len(analysis_result['analysis']['field_suggestions'])} field-targeted suggestions")
         return analysis_result
         
-    except json.JSONDecodeError as e:
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        response_text = responses[-1] if responses else ""
         print(f"❌ JSON parsing error: {str(e)}")
         print(f"Raw response: {response_text[:300]}")
         return {
@@ -318,3 +493,799 @@ REMEMBER:
             "status": "error",
             "message": f"Gemini API error: {str(e)}"
         }
+
+
+def parse_and_analyze_cv_with_gemini(cv_text: str, job_description: str, api_key: str,
+                                     cv_images: list = None, use_cache: bool = True,
+                                     on_suggestion=None) -> dict:
+    """
+    Single-call mode: one Gemini request returns both the structured CV and
+    the field-targeted analysis, instead of parse_cv_to_structured_data
+    followed by analyze_structured_cv_with_gemini.
+    
+    Args:
+        cv_text: The raw CV text
+        job_description: The job description to match against (optional)
+        api_key: Gemini API key
+        cv_images: Optional list of page images showing CV layout
+        use_cache: Reuse a previous identical result if available
+        on_suggestion: Optional callback receiving each streamed field suggestion
+    
+    Returns:
+        dict: {'status': 'success', 'structured_data': {...}, 'analysis_result': {...}}
+              where analysis_result has the same shape as analyze_structured_cv_with_gemini,
+              or {'status': 'error', 'message': ...}
+    """
+    cache_key = _combined_cache_key(cv_text, job_description, cv_images)
+    
+    if use_cache:
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            print("⚡ Combined parse + analysis cache hit")
+            cached['analysis_result']['cached'] = True
+            cached['analysis_result']['token_usage'] = {}
+            return cached
+    
+    model = get_model("combined", api_key)
+    
+    prompt = f"""
+Parse this CV/resume into structured JSON AND analyze it, in a single response.
+
+CV Text:
+{cv_text}
+
+{_build_job_context(job_description)}
+
+STEP 1 - STRUCTURE
+Build a "structured_cv" object with this structure:
+
+{STRUCTURE_SCHEMA}
+
+Structure guidelines:
+{STRUCTURE_GUIDELINES}
+
+STEP 2 - ANALYSIS
+Analyze the structured_cv from STEP 1 and provide detailed, field-targeted feedback with STRICT, REALISTIC scoring.
+Every fieldPath, fieldId and originalValue must refer to the structured_cv exactly as you returned it in STEP 1.
+
+{ANALYSIS_RUBRIC}
+
+The "analysis" object must have this EXACT structure:
+
+{ANALYSIS_OUTPUT_FORMAT}
+
+Return ONLY valid JSON (no markdown) with exactly two top-level keys:
+{{"structured_cv": <STEP 1 object>, "analysis": <STEP 2 object>}}
+"""
+    
+    responses = []
+    usage = {}
+    
+    def generate(attempt):
+        # structured_cv has free-form keys (other_sections), so JSON mode without a schema
+        responses.append(generate_text(
+            model,
+            _build_content_parts(prompt, cv_images),
+            generation_config=json_generation_config(),
+            on_text=_suggestion_streamer(on_suggestion) if attempt == 0 else None,
+            stage="combined",
+            usage=usage
+        ))
+        return responses[-1]
+    
+    repair = {}
+    
+    def build(response_text):
+        parsed = loads_with_repair(response_text, repair)
+        structured_cv = parsed["structured_cv"]
+        analysis_result = _build_analysis_result(parsed["analysis"], structured_cv)
+        analysis_result['model'] = get_model_name("combined")
+        return {
+            "status": "success",
+            "structured_data": structured_cv,
+            "analysis_result": analysis_result
+        }
+    
+    try:
+        result = call_with_stage_retry("combined", generate, build)
+        result['analysis_result']['token_usage'] = usage
+        if _cache_unless_truncated(cache_key, result, repair):
+            result['analysis_result']['repaired'] = "truncated"
+        
+        print(f"✅ Single-call parse + analysis: {len(result['analysis_result']['analysis']['field_suggestions'])} field-targeted suggestions")
+        return result
+    
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        print(f"❌ Combined response parsing error: {str(e)}")
+        print(f"Raw response: {(responses[-1] if responses else '')[:300]}")
+        return {
+            "status": "error",
+            "message": "Failed to parse Gemini response"
+        }
+    
+    except Exception as e:
+        print(f"❌ Gemini API error: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Gemini API error: {str(e)}"
+        }
+
+
+def get_analysis_sections(structured_cv: dict) -> list:
+    """Names of the ANALYSIS_SECTION_GROUPS that have content in structured_cv."""
+    return [
+        name for name, fields in ANALYSIS_SECTION_GROUPS
+        if compact_cv(_section_subset(structured_cv, fields))
+    ]
+
+
+def analyze_cv_section_with_gemini(section: str, structured_cv: dict, job_description: str, api_key: str,
+                                   use_cache: bool = True, on_suggestion=None) -> dict:
+    """
+    Analyze one group of CV fields (sectioned mode).
+    
+    Only the fields of the group are sent, under their top-level keys, so
+    the fieldPaths the model writes are valid for the full structured CV.
+    
+    Args:
+        section: Group name from ANALYSIS_SECTION_GROUPS (e.g. "experience")
+        structured_cv: The full structured CV
+        job_description: The job description to match against (optional)
+        api_key: Gemini API key
+        use_cache: Reuse a previous identical section analysis if available
+        on_suggestion: Optional callback receiving each streamed field suggestion
+                       (with its final suggestionId)
+    
+    Returns:
+        dict: {'status': 'success', 'section', 'sections', 'field_suggestions', 'quick_wins'}
+              or {'status': 'error', 'section', 'message'}
+    """
+    position, fields = _section_group(section)
+    subset = _section_subset(structured_cv, fields)
+    normalized_job = " ".join((job_description or "").split())
+    cache_key = make_cache_key("section", get_model_name("analysis"), SECTIONED_PROMPT_VERSION,
+                               section, subset, normalized_job)
+    
+    if use_cache:
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            print(f"⚡ Section analysis cache hit ({section})")
+            return dict(cached, cached=True, token_usage={})
+    
+    model = get_model("analysis", api_key)
+    allowed_paths = ", ".join(f'"{field}"' for field in fields)
+    
+    prompt = f"""
+Analyze the {section} part of this structured CV and provide detailed, field-targeted feedback with STRICT, REALISTIC scoring.
+Only this part of the CV is shown. Every fieldPath must start with one of: {allowed_paths}.
+
+Structured CV Data ({section}):
+{build_cv_prompt_data(subset)}
+
+{_build_job_context(job_description)}
+
+{ANALYSIS_RUBRIC}
+
+Return your response as **valid JSON** with this EXACT structure (no markdown):
+
+{SECTION_OUTPUT_FORMAT}
+"""
+    
+    usage = {}
+    
+    def generate(attempt):
+        streamer = None
+        if on_suggestion is not None and attempt == 0:
+            prepare = _section_suggestion_preparer(position, fields, structured_cv)
+            streamer = _suggestion_streamer(lambda item: _call_if_valid(on_suggestion, prepare(item)))
+        return generate_text(
+            model,
+            prompt,
+            generation_config=json_generation_config(SECTION_RESPONSE_SCHEMA),
+            on_text=streamer,
+            stage="analysis_section",
+            usage=usage
+        )
+    
+    repair = {}
+    
+    def build(response_text):
+        parsed = loads_with_repair(response_text, repair)
+        prepare = _section_suggestion_preparer(position, fields, structured_cv)
+        suggestions = [prepare(item) for item in parsed.get("field_suggestions", [])]
+        return {
+            "status": "success",
+            "section": section,
+            "sections": parsed.get("sections", []),
+            "field_suggestions": [item for item in suggestions if item is not None],
+            "quick_wins": [_normalize_suggestion(w) for w in parsed.get("quick_wins", [])],
+            "token_usage": usage
+        }
+    
+    try:
+        result = call_with_stage_retry(f"analysis/{section}", generate, build)
+        _cache_unless_truncated(cache_key, result, repair)
+        print(f"✅ Section {section}: {len(result['field_suggestions'])} field-targeted suggestions")
+        return result
+    
+    except Exception as e:
+        print(f"❌ Section analysis failed ({section}): {str(e)}")
+        return {
+            "status": "error",
+            "section": section,
+            "message": f"Gemini API error: {str(e)}"
+        }
+
+
+def analyze_cv_overview_with_gemini(structured_cv: dict, job_description: str, api_key: str,
+                                    cv_images: list = None, use_cache: bool = True) -> dict:
+    """
+    Scores, summary, priorities and ATS analysis for the whole CV without
+    field suggestions (the short call of the sectioned mode).
+    
+    Returns:
+        dict: {'status': 'success', 'overview': {...}} or {'status': 'error', 'message': ...}
+    """
+    normalized_job = " ".join((job_description or "").split())
+    image_hashes = [_image_fingerprint(img) for img in (cv_images or [])[:MAX_ANALYSIS_IMAGES]]
+    cache_key = make_cache_key("overview", get_model_name("analysis"), SECTIONED_PROMPT_VERSION,
+                               structured_cv, normalized_job, image_hashes)
+    
+    if use_cache:
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            print("⚡ Overview analysis cache hit")
+            return dict(cached, cached=True, token_usage={})
+    
+    model = get_model("analysis", api_key)
+    
+    prompt = f"""
+Score this structured CV with STRICT, REALISTIC scoring. Field-level suggestions are produced separately; focus on the overall assessment.
+
+Structured CV Data:
+{build_cv_prompt_data(structured_cv)}
+
+{_build_job_context(job_description)}
+
+{ANALYSIS_RUBRIC}
+
+Return your response as **valid JSON** with this EXACT structure (no markdown):
+
+{OVERVIEW_OUTPUT_FORMAT}
+"""
+    
+    usage = {}
+    repair = {}
+    try:
+        result = call_with_stage_retry(
+            "analysis/overview",
+            lambda attempt: generate_text(
+                model,
+                _build_content_parts(prompt, cv_images),
+                generation_config=json_generation_config(OVERVIEW_RESPONSE_SCHEMA),
+                stage="analysis_overview",
+                usage=usage
+            ),
+            _overview_builder(usage, repair)
+        )
+        _cache_unless_truncated(cache_key, result, repair)
+        return result
+    
+    except Exception as e:
+        print(f"❌ Overview analysis failed: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Gemini API error: {str(e)}"
+        }
+
+
+def merge_sectioned_analysis(structured_cv: dict, overview_result: dict, section_results: list) -> dict:
+    """
+    Combine the overview and per-section results into the analysis_result
+    shape of analyze_structured_cv_with_gemini.
+    
+    Sections are merged in ANALYSIS_SECTION_GROUPS order whatever order the
+    calls finished in, and suggestions are ordered by severity (stable).
+    Each section_analysis entry records the group it came from ('group').
+    
+    Args:
+        structured_cv: The full structured CV
+        overview_result: Successful result of analyze_cv_overview_with_gemini
+        section_results: Results of analyze_cv_section_with_gemini (any order)
+    
+    Returns:
+        dict: Analysis result, with 'failed_sections' listing sections whose call
+              failed and 'token_usage' summed over the calls made for it
+    """
+    parsed = dict(overview_result["overview"])
+    usage = {}
+    parsed["sections"], parsed["field_suggestions"], parsed["quick_wins"] = [], [], []
+    
+    by_section = {result.get("section"): result for result in section_results}
+    failed = []
+    for name, _ in ANALYSIS_SECTION_GROUPS:
+        result = by_section.get(name)
+        if result is None:
+            continue
+        if not result.get("cached"):
+            add_usage(usage, result.get("token_usage"))
+        if result.get("status") != "success":
+            failed.append(name)
+            continue
+        parsed["sections"].extend(dict(entry, group=name) for entry in result["sections"])
+        parsed["field_suggestions"].extend(result["field_suggestions"])
+        parsed["quick_wins"].extend(result["quick_wins"])
+    
+    parsed["field_suggestions"].sort(key=lambda s: _SEVERITY_ORDER.get(str(s.get("severity", "")).lower(), 4))
+    
+    analysis_result = _build_analysis_result(parsed, structured_cv)
+    analysis_result['analysis_mode'] = 'sectioned'
+    if not overview_result.get("cached"):
+        add_usage(usage, overview_result.get("token_usage"))
+    analysis_result['token_usage'] = usage
+    if failed:
+        analysis_result['failed_sections'] = failed
+    if any(result.get("repaired") == "truncated" for result in [overview_result, *section_results]):
+        analysis_result['repaired'] = "truncated"
+    return analysis_result
+
+
+def diff_analysis_sections(previous_cv: dict, structured_cv: dict) -> list:
+    """
+    Names of the ANALYSIS_SECTION_GROUPS whose content differs between two
+    versions of a structured CV (empty and "Not provided" values ignored).
+    """
+    return [
+        name for name, fields in ANALYSIS_SECTION_GROUPS
+        if compact_cv(_section_subset(previous_cv, fields)) != compact_cv(_section_subset(structured_cv, fields))
+    ]
+
+
+def update_cv_overview_with_gemini(structured_cv: dict, previous_analysis: dict, changed_sections: list,
+                                   job_description: str, api_key: str, use_cache: bool = True) -> dict:
+    """
+    Re-score a CV after some of its sections changed (incremental mode).
+    
+    The changed sections are sent in full, the rest of the CV shortened to
+    INCREMENTAL_CONTEXT_TOKEN_BUDGET tokens, with the previous scores as a
+    baseline.
+    
+    Args:
+        structured_cv: The edited structured CV
+        previous_analysis: analysis_result of the previously analyzed version
+        changed_sections: Names from diff_analysis_sections
+        job_description: The job description to match against (optional)
+        api_key: Gemini API key
+        use_cache: Reuse a previous identical re-scoring if available
+    
+    Returns:
+        dict: {'status': 'success', 'overview': {...}} or {'status': 'error', 'message': ...}
+    """
+    changed_fields = [field for name, fields in ANALYSIS_SECTION_GROUPS if name in changed_sections for field in fields]
+    changed = _section_subset(structured_cv, changed_fields)
+    rest = {key: value for key, value in structured_cv.items() if key not in changed_fields}
+    previous = _overview_from_analysis(previous_analysis["analysis"])
+    baseline = {
+        "formatting_score": previous["formatting"]["score"],
+        "content_score": previous["content"]["score"],
+        "overall_score": previous["general"]["overall_score"],
+        "ats_relevance_score": previous["ats_analysis"]["relevance_score"],
+        "summary": previous["general"]["summary"]
+    }
+    normalized_job = " ".join((job_description or "").split())
+    cache_key = make_cache_key("overview_update", get_model_name("analysis"), INCREMENTAL_PROMPT_VERSION,
+                               baseline, changed, rest, normalized_job)
+    
+    if use_cache:
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            print("⚡ Incremental overview cache hit")
+            return dict(cached, cached=True, token_usage={})
+    
+    model = get_model("analysis", api_key)
+    
+    prompt = f"""
+This CV was scored before; since then only these parts changed: {", ".join(changed_sections)}.
+Re-score the whole CV with STRICT, REALISTIC scoring, starting from the previous assessment and adjusting it
+for the changes. Field-level suggestions are produced separately; focus on the overall assessment.
+
+Previous assessment:
+{json.dumps(baseline, ensure_ascii=False)}
+
+Changed parts of the CV (complete):
+{build_cv_prompt_data(changed)}
+
+Unchanged rest of the CV (shortened, for context):
+{build_cv_prompt_data(rest, token_budget=INCREMENTAL_CONTEXT_TOKEN_BUDGET)}
+
+{_build_job_context(job_description)}
+
+{ANALYSIS_RUBRIC}
+
+Return your response as **valid JSON** with this EXACT structure (no markdown):
+
+{OVERVIEW_OUTPUT_FORMAT}
+"""
+    
+    usage = {}
+    repair = {}
+    try:
+        result = call_with_stage_retry(
+            "analysis/overview_update",
+            lambda attempt: generate_text(
+                model,
+                prompt,
+                generation_config=json_generation_config(OVERVIEW_RESPONSE_SCHEMA),
+                stage="analysis_overview",
+                usage=usage
+            ),
+            _overview_builder(usage, repair)
+        )
+        _cache_unless_truncated(cache_key, result, repair)
+        return result
+    
+    except Exception as e:
+        print(f"❌ Incremental overview failed: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Gemini API error: {str(e)}"
+        }
+
+
+def merge_incremental_analysis(structured_cv: dict, previous_analysis: dict, overview_result: dict,
+                               section_results: list, changed_sections: list, reserved_ids=None) -> dict:
+    """
+    Merge the re-analysis of the changed sections into a previous analysis_result.
+    
+    Unchanged sections keep their previous section scores, field suggestions
+    and quick wins. A changed section whose call failed keeps its previous
+    results and is listed in 'stale_sections', as is "overview" when the
+    scores could not be updated. New suggestions never reuse a suggestionId
+    of the previous analysis or of reserved_ids, so IDs a client has already
+    applied stay unambiguous.
+    
+    Args:
+        structured_cv: The edited structured CV
+        previous_analysis: analysis_result of the previously analyzed version
+        overview_result: Result of update_cv_overview_with_gemini
+        section_results: Results of analyze_cv_section_with_gemini for the changed sections
+        changed_sections: Names from diff_analysis_sections
+        reserved_ids: Every suggestionId handed out before (e.g. all suggestions
+                      registered on an editing session, including earlier rounds)
+    
+    Returns:
+        dict: Analysis result with analysis_mode 'incremental' and 'incremental':
+              {'changed_sections', 'reused_sections', 'stale_sections'}
+    """
+    previous = previous_analysis["analysis"]
+    previous_groups = _group_previous_analysis(previous)
+    by_section = {result.get("section"): result for result in section_results}
+    present = set(get_analysis_sections(structured_cv))
+    
+    used_ids = {s.get("suggestionId") for s in previous.get("field_suggestions", [])} | set(reserved_ids or ())
+    new_ids = [s.get("suggestionId") for result in section_results if result.get("status") == "success"
+               for s in result["field_suggestions"]]
+    next_id = max([i for i in used_ids | set(new_ids) if isinstance(i, int)] + [0]) + 1
+    
+    results = []
+    stale = []
+    for name, _ in ANALYSIS_SECTION_GROUPS:
+        result = by_section.get(name)
+        if name in changed_sections and result is not None and result.get("status") == "success":
+            suggestions = []
+            for suggestion in result["field_suggestions"]:
+                if suggestion.get("suggestionId") in used_ids:
+                    suggestion = dict(suggestion, suggestionId=next_id)
+                    next_id += 1
+                suggestions.append(suggestion)
+            results.append(dict(result, field_suggestions=suggestions))
+            continue
+        if name in changed_sections and name not in present:
+            continue  # The section was emptied; its previous results no longer apply
+        if name in changed_sections:
+            stale.append(name)
+        results.append({"status": "success", "section": name, "cached": True, **previous_groups.get(name, {
+            "sections": [], "field_suggestions": [], "quick_wins": []
+        })})
+    
+    if overview_result.get("status") != "success":
+        overview_result = {"status": "success", "overview": _overview_from_analysis(previous), "cached": True}
+        stale.append("overview")
+    
+    analysis_result = merge_sectioned_analysis(structured_cv, overview_result, results)
+    analysis_result.pop('failed_sections', None)
+    
+    # Entries that belong to no section group (e.g. a "Languages" section) are kept as they were
+    unassigned = previous_groups.get(None)
+    if unassigned:
+        analysis = analysis_result['analysis']
+        analysis['section_analysis'].extend(unassigned["sections"])
+        analysis['field_suggestions'].extend(unassigned["field_suggestions"])
+        analysis['quick_wins'].extend(unassigned["quick_wins"])
+    
+    analysis_result['analysis_mode'] = 'incremental'
+    analysis_result['incremental'] = {
+        "changed_sections": list(changed_sections),
+        "reused_sections": [name for name in get_analysis_sections(structured_cv) if name not in changed_sections],
+        "stale_sections": stale
+    }
+    return analysis_result
+
+
+def _build_job_context(job_description: str) -> str:
+    """Prompt section describing the target job (or its absence)."""
+    if job_description and job_description.strip():
+        return f"""
+Job Description:
+{job_description}
+
+Analyze this structured CV against the job description and provide detailed feedback on job relevance and keyword matching.
+"""
+    return """
+No specific job description provided. Analyze the CV for general quality, formatting, and best practices.
+"""
+
+
+def _build_content_parts(prompt: str, cv_images: list):
+    """Prompt plus up to MAX_ANALYSIS_IMAGES page images, as accepted by generate_content."""
+    if not cv_images:
+        return prompt
+    
+    content_parts = [prompt]
+    for img in cv_images[:MAX_ANALYSIS_IMAGES]:
+        if isinstance(img, str):
+            img = Image.open(img)
+        content_parts.append(img)
+    print(f"   🖼️  Sending {len(content_parts) - 1} images to Gemini for visual analysis...")
+    return content_parts
+
+
+def _normalize_field_path(field_path) -> list:
+    """Turn numeric path segments ("0") back into list indexes (0)."""
+    if not isinstance(field_path, list):
+        return field_path
+    return [int(part) if isinstance(part, str) and part.isdigit() else part for part in field_path]
+
+
+def _normalize_suggestion(suggestion: dict) -> dict:
+    if isinstance(suggestion, dict) and 'fieldPath' in suggestion:
+        suggestion['fieldPath'] = _normalize_field_path(suggestion['fieldPath'])
+    return suggestion
+
+
+def _overview_builder(usage: dict, repair: dict):
+    """Response parser of the overview calls (scores, summary and ATS analysis)."""
+    def build(response_text):
+        parsed = loads_with_repair(response_text, repair)
+        for key in ("formatting", "content", "general"):
+            if not isinstance(parsed.get(key), dict):
+                raise KeyError(key)
+        return {"status": "success", "overview": parsed, "token_usage": usage}
+    return build
+
+
+def _cache_unless_truncated(cache_key: str, result: dict, repair: dict) -> bool:
+    """
+    Cache a model result unless its JSON was truncated and closed by repair.
+    
+    A truncated result lost its last, incomplete value, so it is flagged with
+    repaired="truncated" and served once instead of being cached for the full TTL.
+    
+    Returns:
+        True if the result was flagged instead of cached
+    """
+    if repair.get("repair") == "truncated":
+        print("⚠️  Model response was truncated; result not cached")
+        result["repaired"] = "truncated"
+        return True
+    _analysis_cache.set(cache_key, result)
+    return False
+
+
+def _overview_from_analysis(analysis: dict) -> dict:
+    """Overview JSON (OVERVIEW_OUTPUT_FORMAT) recovered from a previous analysis_result['analysis']."""
+    formatting_issues = analysis.get("grammar_and_clarity", {}).get("issues", [])
+    scores = analysis.get("global_analysis", {})
+    job_match = analysis.get("job_match_analysis", {})
+    return {
+        "formatting": {"score": scores.get("formatting_score", 5), "issues": formatting_issues, "suggestions": []},
+        "content": {
+            "score": scores.get("content_score", 5),
+            "strengths": [],
+            "weaknesses": analysis.get("critical_issues", [])[len(formatting_issues):],
+            "suggestions": []
+        },
+        "general": {
+            "overall_score": analysis.get("overall_score", 50) / 10,
+            "summary": analysis.get("summary", ""),
+            "top_priorities": analysis.get("top_priorities", [])
+        },
+        "ats_analysis": {
+            "relevance_score": analysis.get("ats_score", job_match.get("relevance_score", 50)),
+            "keyword_matches": job_match.get("keyword_matches", []),
+            "missing_keywords": job_match.get("missing_keywords", []),
+            "recommendations": job_match.get("recommendations", [])
+        }
+    }
+
+
+# Section names the model uses for each group besides its field names (EN/FR)
+_SECTION_NAME_ALIASES = {
+    "profile": ("profil", "about", "objective", "resume", "coordonnee"),
+    "experience": ("work", "employment", "emploi", "professional", "professionnelle"),
+    "education": ("formation", "diplome", "etude", "academic"),
+    "skills": ("competence", "technical"),
+    "projects": ("projet",),
+    "other": ("certificat", "distinction", "benevolat", "activite", "volunteering")
+}
+
+
+def _group_previous_analysis(analysis: dict) -> dict:
+    """
+    Split a previous analysis by section group.
+    
+    Returns:
+        dict: group name (None when unknown) -> {'sections', 'field_suggestions', 'quick_wins'}
+    """
+    groups = {}
+    
+    def bucket(group):
+        return groups.setdefault(group, {"sections": [], "field_suggestions": [], "quick_wins": []})
+    
+    for entry in analysis.get("section_analysis", []):
+        group = entry.get("group") if isinstance(entry, dict) else None
+        bucket(group or _group_of_section_name(entry.get("name", "") if isinstance(entry, dict) else ""))["sections"].append(entry)
+    for key in ("field_suggestions", "quick_wins"):
+        for item in analysis.get(key, []):
+            field_path = (item.get("fieldPath") or [item.get("targetField")]) if isinstance(item, dict) else [None]
+            bucket(_group_of_field(field_path[0]))[key].append(item)
+    return groups
+
+
+def _group_of_field(field):
+    for name, fields in ANALYSIS_SECTION_GROUPS:
+        if field in fields:
+            return name
+    return None
+
+
+def _group_of_section_name(section_name: str):
+    tokens = set(tokenize(str(section_name)))
+    for name, fields in ANALYSIS_SECTION_GROUPS:
+        names = {normalize_token(word) for word in (name,) + fields + _SECTION_NAME_ALIASES.get(name, ())}
+        if tokens & names:
+            return name
+    return None
+
+
+def _section_group(section: str):
+    for position, (name, fields) in enumerate(ANALYSIS_SECTION_GROUPS, start=1):
+        if name == section:
+            return position, fields
+    raise ValueError(f"Unknown analysis section: {section}")
+
+
+def _section_subset(structured_cv: dict, fields: tuple) -> dict:
+    return {field: structured_cv[field] for field in fields if field in structured_cv}
+
+
+def _field_path_exists(structured_cv: dict, field_path: list) -> bool:
+    current = structured_cv
+    for part in field_path:
+        if isinstance(current, dict) and part in current:
+            current = current[part]
+        elif isinstance(current, list) and isinstance(part, int) and 0 <= part < len(current):
+            current = current[part]
+        else:
+            return False
+    return True
+
+
+def _section_suggestion_preparer(position: int, fields: tuple, structured_cv: dict):
+    """
+    Return a function that normalizes one section suggestion and gives it its
+    final ID, or returns None if its fieldPath is outside the section or
+    does not exist in the CV. Call it on suggestions in response order.
+    """
+    counter = [0]
+    
+    def prepare(suggestion):
+        if not isinstance(suggestion, dict) or "improvedValue" not in suggestion:
+            return None
+        suggestion = _normalize_suggestion(suggestion)
+        path = suggestion.get("fieldPath")
+        if not path or path[0] not in fields or not _field_path_exists(structured_cv, path):
+            return None
+        counter[0] += 1
+        suggestion["suggestionId"] = position * SECTION_SUGGESTION_ID_BLOCK + counter[0]
+        return suggestion
+    
+    return prepare
+
+
+def _call_if_valid(callback, suggestion):
+    if suggestion is not None:
+        callback(suggestion)
+
+
+def _is_applicable_suggestion(suggestion) -> bool:
+    # A suggestion cut short by a truncated response (or without a target) cannot be applied
+    return isinstance(suggestion, dict) and bool(suggestion.get("fieldPath")) and "improvedValue" in suggestion
+
+
+def _suggestion_streamer(on_suggestion):
+    """
+    Build an on_text callback for generate_text that reports every completed
+    field_suggestions item to on_suggestion (None if there is no listener).
+    """
+    if on_suggestion is None:
+        return None
+    
+    stream = JSONArrayItemStream("field_suggestions")
+    
+    def on_text(chunk: str):
+        for suggestion in stream.feed(chunk):
+            if not _is_applicable_suggestion(suggestion):
+                continue  # Dropped from the final analysis too
+            try:
+                on_suggestion(_normalize_suggestion(suggestion))
+            except Exception as e:
+                print(f"⚠️  Suggestion listener failed: {str(e)}")
+    
+    return on_text
+
+
+def _build_analysis_result(parsed: dict, structured_cv: dict) -> dict:
+    """
+    Map the model's analysis JSON onto the analysis_result shape used by the frontend.
+    
+    Args:
+        parsed: Analysis JSON returned by the model (ANALYSIS_OUTPUT_FORMAT)
+        structured_cv: The structured CV the suggestions refer to
+    
+    Returns:
+        dict: {'status': 'success', 'analysis': {...}}
+    """
+    ats_analysis = parsed.get("ats_analysis", {})
+    
+    # Check the model's keyword lists against the CV's values: one pass over
+    # the text for all keywords, ignoring case, accents and plural forms
+    reported_matches = ats_analysis.get("keyword_matches", [])
+    reported_missing = ats_analysis.get("missing_keywords", [])
+    occurrences = KeywordMatcher(reported_matches + reported_missing).scan_values(structured_cv)
+    
+    validated_keyword_matches = [k for k, found in occurrences.items() if found["count"]]
+    validated_missing_keywords = [k for k, found in occurrences.items() if not found["count"]]
+    keyword_counts = {k: found["count"] for k, found in occurrences.items() if found["count"]}
+    
+    analysis_result = {
+        'status': 'success',
+        'model': get_model_name("analysis"),
+        'analysis': {
+            'overall_score': int(parsed["general"]["overall_score"] * 10),
+            'ats_score': ats_analysis.get("relevance_score", int((parsed["content"]["score"] + parsed["formatting"]["score"]) * 5)),
+            'readability_score': 80 + (parsed["formatting"]["score"] - 5) * 4,
+            'summary': parsed["general"]["summary"],
+            'critical_issues': parsed["formatting"]["issues"] + parsed["content"]["weaknesses"],
+            'field_suggestions': [
+                _normalize_suggestion(s) for s in parsed.get("field_suggestions", []) if _is_applicable_suggestion(s)
+            ],  # NEW: Field-targeted suggestions
+            'section_analysis': parsed.get("sections", []),
+            'quick_wins': [_normalize_suggestion(w) for w in parsed.get("quick_wins", [])],
+            'top_priorities': parsed["general"]["top_priorities"],
+            'grammar_and_clarity': {"issues": parsed["formatting"]["issues"]},
+            'job_match_analysis': {
+                "relevance_score": ats_analysis.get("relevance_score", parsed["content"]["score"] * 10),
+                "keyword_matches": validated_keyword_matches,
+                "missing_keywords": validated_missing_keywords,
+                "keyword_counts": keyword_counts,
+                "recommendations": ats_analysis.get("recommendations", [])
+            },
+            'global_analysis': {
+                "formatting_score": parsed["formatting"]["score"],
+                "content_score": parsed["content"]["score"]
+            }
+        }
+    }
+    
+    return analysis_result
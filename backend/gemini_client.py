@@ -0,0 +1,185 @@
+"""
+Gemini Client Module
+Shared registry that configures the Gemini SDK once and reuses model objects
+(and their transport connections) across requests
+"""
+
+from google import generativeai as genai
+import os
+import threading
+import time
+
+
+DEFAULT_MODEL_NAME = "gemini-2.0-flash-exp"
+
+# Pipeline stages reported by the health check and warmed up at startup.
+# Each stage uses GEMINI_<STAGE>_MODEL, falling back to GEMINI_MODEL.
+KNOWN_STAGES = ("structure", "analysis", "combined", "job_profile")
+
+# Ask Gemini for application/json output (plus a response schema where the
+# stage has one) instead of free text that may be wrapped in markdown
+GEMINI_JSON_MODE = os.getenv("GEMINI_JSON_MODE", "true").lower() == "true"
+
+_lock = threading.Lock()
+_configured_api_key = None
+_models = {}
+_token_usage = {}
+
+
+def get_model_name(stage: str) -> str:
+    """
+    Model name used for a pipeline stage.
+
+    Args:
+        stage: Stage name such as "structure" or "analysis"
+
+    Returns:
+        str: GEMINI_<STAGE>_MODEL if set, else GEMINI_MODEL, else the default
+    """
+    return (
+        os.getenv(f"GEMINI_{stage.upper()}_MODEL")
+        or os.getenv("GEMINI_MODEL")
+        or DEFAULT_MODEL_NAME
+    )
+
+
+def get_stage_models() -> dict:
+    """Return the model name configured for every known stage."""
+    return {stage: get_model_name(stage) for stage in KNOWN_STAGES}
+
+
+def get_model(stage: str, api_key: str) -> genai.GenerativeModel:
+    """
+    Return the shared GenerativeModel for a stage, configuring the SDK on
+    first use (or when the API key changes).
+
+    Args:
+        stage: Stage name such as "structure" or "analysis"
+        api_key: Gemini API key
+
+    Returns:
+        genai.GenerativeModel: Cached model instance
+    """
+    global _configured_api_key
+    model_name = get_model_name(stage)
+
+    with _lock:
+        if api_key != _configured_api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+            _models.clear()
+
+        model = _models.get(model_name)
+        if model is None:
+            model = genai.GenerativeModel(model_name)
+            _models[model_name] = model
+        return model
+
+
+def warm_up(api_key: str) -> dict:
+    """
+    Create every stage model and make one cheap call (token count) per model
+    so the first real request doesn't pay for channel setup.
+
+    Returns:
+        dict: Per-model warm-up latency in ms, or the error message
+    """
+    results = {}
+    for model_name, stage in {get_model_name(stage): stage for stage in KNOWN_STAGES}.items():
+        start = time.perf_counter()
+        try:
+            get_model(stage, api_key).count_tokens("warm-up")
+            results[model_name] = {"status": "ok", "ms": round((time.perf_counter() - start) * 1000)}
+        except Exception as e:
+            results[model_name] = {"status": "error", "message": str(e)}
+
+    print(f"🔥 Gemini warm-up: {results}")
+    return results
+
+
+def json_generation_config(response_schema: dict = None) -> dict:
+    """
+    Generation config for JSON output.
+
+    Args:
+        response_schema: Optional OpenAPI-style schema dict the output must follow
+
+    Returns:
+        dict: Config for generate_content, or None when GEMINI_JSON_MODE is off
+    """
+    if not GEMINI_JSON_MODE:
+        return None
+    config = {"response_mime_type": "application/json"}
+    if response_schema:
+        config["response_schema"] = response_schema
+    return config
+
+
+def generate_text(model: genai.GenerativeModel, contents, generation_config: dict = None,
+                  on_text=None, stage: str = None, usage: dict = None) -> str:
+    """
+    Run generate_content and return the full response text.
+
+    Args:
+        model: Model from get_model
+        contents: Prompt or list of content parts
+        generation_config: Optional generation config (see json_generation_config)
+        on_text: Optional callback receiving each text chunk as it arrives;
+                 when given, the response is streamed
+        stage: Stage name the call's tokens are counted under (see get_token_usage)
+        usage: Optional dict the call's token counts are added to (see add_usage)
+
+    Returns:
+        str: The complete response text
+    """
+    if on_text is None:
+        response = model.generate_content(contents, generation_config=generation_config)
+        _record_usage(stage, usage, getattr(response, "usage_metadata", None))
+        return response.text
+
+    chunks = []
+    metadata = None
+    for chunk in model.generate_content(contents, generation_config=generation_config, stream=True):
+        # Every chunk carries the running counts; the last one has the totals
+        metadata = getattr(chunk, "usage_metadata", None) or metadata
+        try:
+            text = chunk.text
+        except ValueError:
+            # Chunks carrying only finish metadata have no text parts
+            continue
+        chunks.append(text)
+        on_text(text)
+    _record_usage(stage, usage, metadata)
+    return "".join(chunks)
+
+
+def add_usage(total: dict, usage: dict) -> dict:
+    """
+    Add the token counts of usage to total (both {'calls', 'prompt_tokens',
+    'completion_tokens'} dicts; missing keys count as 0).
+
+    Returns:
+        dict: total
+    """
+    for key in ("calls", "prompt_tokens", "completion_tokens"):
+        total[key] = total.get(key, 0) + (usage or {}).get(key, 0)
+    return total
+
+
+def get_token_usage() -> dict:
+    """Return the calls and prompt/completion tokens counted so far, per stage."""
+    with _lock:
+        return {stage: dict(counts) for stage, counts in _token_usage.items()}
+
+
+def _record_usage(stage: str, usage: dict, metadata):
+    call_usage = {
+        "calls": 1,
+        "prompt_tokens": getattr(metadata, "prompt_token_count", 0) or 0,
+        "completion_tokens": getattr(metadata, "candidates_token_count", 0) or 0
+    }
+    if usage is not None:
+        add_usage(usage, call_usage)
+    if stage:
+        with _lock:
+            add_usage(_token_usage.setdefault(stage, {}), call_usage)
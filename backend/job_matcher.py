@@ -0,0 +1,155 @@
+"""
+Job Matcher Module
+Local relevance score of a structured CV against a job description:
+BM25F-style term weighting over CV sections, vectorized with NumPy.
+No Gemini call is made, so it is available instantly and offline.
+"""
+
+import time
+import numpy as np
+from keyword_matcher import TOKEN_PATTERN, normalize_token, tokenize, iter_text_values
+
+
+# How much a job term counts when found in each section (contact is not scored)
+SECTION_WEIGHTS = {
+    "skills": 1.5,
+    "experience": 1.2,
+    "projects": 1.0,
+    "summary": 1.0,
+    "certifications": 0.8,
+    "education": 0.6,
+    "publications": 0.5,
+    "awards": 0.4,
+    "activities": 0.4,
+    "volunteer": 0.4,
+    "other_sections": 0.4
+}
+
+# BM25 term-frequency saturation and section length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Matched/missing terms returned with a score
+TOP_TERMS = 15
+
+# Function words and generic job-ad vocabulary (EN/FR) that say nothing about fit
+_STOPWORD_LIST = """
+a an and are as at be by for from has have in is it of on or that the to with will you your we our
+this their they who what which about across all also any can must should would may not more other
+such than through using use within etc including include ideal candidate role position job team
+work working experience year years strong ability skill knowledge plus preferred required
+requirement responsibilities excellent good great new based level looking join company opportunity
+le la les un une des de du et en au aux pour par avec sur dans est sont vous nous votre vos notre
+nos ce cette ces qui que ou etre avoir plus son sa ses leur leurs tout tous toutes ainsi afin comme
+tres bonne bon poste profil candidat equipe experience competence connaissance maitrise capacite
+ans annee annees requis souhaite mission entreprise
+"""
+_STOPWORDS = frozenset(normalize_token(word) for word in _STOPWORD_LIST.split())
+
+
+def job_terms(job_description: str) -> dict:
+    """
+    Scorable terms of a job description.
+
+    Returns:
+        dict: normalized term -> {'surface': first spelling in the text, 'count': int},
+              in order of first appearance
+    """
+    terms = {}
+    for surface in TOKEN_PATTERN.findall(job_description or ""):
+        term = normalize_token(surface)
+        if term in _STOPWORDS or term.isdigit() or len(term) < 2:
+            continue
+        entry = terms.setdefault(term, {"surface": surface, "count": 0})
+        entry["count"] += 1
+    return terms
+
+
+def section_tokens(structured_cv: dict) -> list:
+    """
+    Normalized tokens of each scored section of a structured CV.
+
+    Returns:
+        list: (section name, tokens) for the non-empty SECTION_WEIGHTS sections
+    """
+    sections = []
+    for name in SECTION_WEIGHTS:
+        tokens = [token for _, text in iter_text_values(structured_cv.get(name)) for token in tokenize(text)]
+        if tokens:
+            sections.append((name, tokens))
+    return sections
+
+
+def score_job_match(structured_cv: dict, job_description: str, idf: dict = None, terms: dict = None) -> dict:
+    """
+    Score how well a structured CV covers the terms of a job description.
+
+    Each job term is weighted by 1 + log(its count in the job description),
+    times idf[term] when a corpus IDF is given. Its frequency in each CV
+    section is length-normalized (BM25 b), multiplied by the section weight
+    and summed (BM25F), then saturated with k1 so that one solid mention
+    counts fully and repetition adds nothing more. The score is the
+    weighted share of job terms covered, from 0 to 100.
+
+    Args:
+        structured_cv: Structured CV data
+        job_description: Job description text
+        idf: Optional normalized term -> IDF weights from a CV corpus
+        terms: Precomputed job_terms(job_description) (e.g. from a job profile)
+
+    Returns:
+        dict: {'status': 'success', 'score', 'matched_terms', 'missing_terms',
+               'section_matches', 'method', 'elapsed_ms'} or {'status': 'error', 'message'}
+    """
+    start = time.perf_counter()
+    terms = terms if terms is not None else job_terms(job_description)
+    if not terms:
+        return {"status": "error", "message": "The job description has no scorable terms"}
+
+    vocabulary = list(terms)
+    column = {term: i for i, term in enumerate(vocabulary)}
+    sections = section_tokens(structured_cv)
+
+    query = 1 + np.log(np.array([terms[term]["count"] for term in vocabulary], dtype=float))
+    if idf:
+        query *= np.array([idf.get(term, 1.0) for term in vocabulary])
+
+    if sections:
+        tf = np.zeros((len(sections), len(vocabulary)))
+        for row, (_, tokens) in enumerate(sections):
+            for token in tokens:
+                i = column.get(token)
+                if i is not None:
+                    tf[row, i] += 1
+        lengths = np.array([len(tokens) for _, tokens in sections], dtype=float)
+        weights = np.array([SECTION_WEIGHTS[name] for name, _ in sections])
+        length_norm = 1 - BM25_B + BM25_B * lengths / lengths.mean()
+        weighted_tf = weights @ (tf / length_norm[:, None])
+    else:
+        tf = np.zeros((0, len(vocabulary)))
+        weighted_tf = np.zeros(len(vocabulary))
+
+    coverage = np.minimum(1.0, weighted_tf * (BM25_K1 + 1) / (weighted_tf + BM25_K1))
+    contribution = query * coverage
+    score = int(round(100 * contribution.sum() / query.sum()))
+
+    counts = tf.sum(axis=0)
+    matched = [i for i in np.argsort(-contribution, kind="stable") if counts[i] > 0][:TOP_TERMS]
+    missing = [i for i in np.argsort(-query, kind="stable") if counts[i] == 0][:TOP_TERMS]
+
+    return {
+        "status": "success",
+        "score": score,
+        "matched_terms": [
+            {
+                "term": terms[vocabulary[i]]["surface"],
+                "count": int(counts[i]),
+                "sections": [name for row, (name, _) in enumerate(sections) if tf[row, i] > 0]
+            }
+            for i in matched
+        ],
+        "missing_terms": [terms[vocabulary[i]]["surface"] for i in missing],
+        "section_matches": {name: int(np.count_nonzero(tf[row])) for row, (name, _) in enumerate(sections)},
+        "method": "bm25f",
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)
+    }
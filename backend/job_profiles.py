@@ -0,0 +1,186 @@
+"""
+Job Profiles Module
+Turns a job description into a reusable profile (skills, keywords and a
+compact prompt fragment) once per posting, so that every CV analyzed
+against it reuses the same extraction
+"""
+
+import json
+from cache import make_cache_key
+from gemini_client import get_model, get_model_name, generate_text, json_generation_config
+from json_repair import loads_with_repair, call_with_stage_retry
+from job_matcher import job_terms
+from keyword_matcher import KeywordMatcher
+
+
+JOB_PROFILE_VERSION = "1"
+
+# Keywords kept for rule-based profiles (most frequent job terms)
+MAX_PROFILE_KEYWORDS = 25
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+JOB_PROFILE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "seniority": {"type": "string"},
+        "required_skills": _STRING_LIST,
+        "nice_to_have_skills": _STRING_LIST,
+        "responsibilities": _STRING_LIST,
+        "keywords": _STRING_LIST
+    },
+    "required": ["title", "seniority", "required_skills", "nice_to_have_skills", "responsibilities", "keywords"]
+}
+
+
+def normalize_job_description(job_description: str) -> str:
+    """Job description with whitespace collapsed (the form profiles are keyed on)."""
+    return " ".join((job_description or "").split())
+
+
+def job_profile_hash(job_description: str, use_gemini: bool = True) -> str:
+    """
+    Key identifying the profile of a job description: the same posting
+    registered twice maps to the same stored profile.
+    """
+    extractor = get_model_name("job_profile") if use_gemini else "rule_based"
+    return make_cache_key("job_profile", JOB_PROFILE_VERSION, extractor, normalize_job_description(job_description))
+
+
+def build_job_profile(job_description: str, api_key: str = None, use_gemini: bool = True) -> dict:
+    """
+    Extract a reusable profile from a job description.
+
+    With Gemini, one call extracts the title, seniority, required and
+    nice-to-have skills, responsibilities and ATS keywords. Without it (or
+    if the call fails) the profile falls back to the most frequent job terms.
+
+    Args:
+        job_description: Job description text
+        api_key: Gemini API key
+        use_gemini: Extract the profile with Gemini
+
+    Returns:
+        dict: Profile with 'title', 'seniority', 'required_skills',
+              'nice_to_have_skills', 'responsibilities', 'keywords',
+              'terms' (job_matcher.job_terms), 'prompt_fragment' and 'source'
+    """
+    normalized = normalize_job_description(job_description)
+    terms = job_terms(normalized)
+    profile = {
+        "profile_version": JOB_PROFILE_VERSION,
+        "job_description": job_description,
+        "terms": terms
+    }
+
+    extracted = None
+    if use_gemini and api_key:
+        try:
+            extracted = _extract_with_gemini(normalized, api_key)
+            profile["source"] = "gemini"
+            profile["model"] = get_model_name("job_profile")
+        except Exception as e:
+            print(f"⚠️  Job profile extraction failed, using job terms instead: {str(e)}")
+            profile["fallback_reason"] = str(e)
+
+    if extracted is None:
+        keywords = sorted(terms.values(), key=lambda term: -term["count"])[:MAX_PROFILE_KEYWORDS]
+        extracted = {
+            "title": next((line.strip() for line in job_description.splitlines() if line.strip()), "")[:80],
+            "seniority": "",
+            "required_skills": [],
+            "nice_to_have_skills": [],
+            "responsibilities": [],
+            "keywords": [term["surface"] for term in keywords]
+        }
+        profile["source"] = "rule_based"
+
+    profile.update(extracted)
+    profile["prompt_fragment"] = _prompt_fragment(profile, normalized)
+    return profile
+
+
+def match_profile_skills(profile: dict, structured_cv: dict) -> dict:
+    """
+    Which of the profile's required and nice-to-have skills appear in the CV.
+
+    Returns:
+        dict: {'required_skills': {'matched', 'missing'}, 'nice_to_have_skills': {'matched', 'missing'}}
+    """
+    required = profile.get("required_skills", [])
+    nice_to_have = profile.get("nice_to_have_skills", [])
+    found = KeywordMatcher(required + nice_to_have).scan_values(structured_cv)
+
+    def split(skills):
+        skills = list(dict.fromkeys(skills))
+        return {
+            "matched": [skill for skill in skills if found[skill]["count"]],
+            "missing": [skill for skill in skills if not found[skill]["count"]]
+        }
+
+    return {"required_skills": split(required), "nice_to_have_skills": split(nice_to_have)}
+
+
+def _extract_with_gemini(job_description: str, api_key: str) -> dict:
+    model = get_model("job_profile", api_key)
+    prompt = f"""
+Extract a hiring profile from this job description. Keep skill and keyword names exactly as written
+in the job description (same language), one skill per item.
+
+Job Description:
+{job_description}
+
+Return ONLY valid JSON (no markdown) with this structure:
+{{
+  "title": "Job title",
+  "seniority": "Junior / Mid / Senior / Lead, or empty if not stated",
+  "required_skills": ["Skills and qualifications the posting requires"],
+  "nice_to_have_skills": ["Skills listed as a plus / preferred"],
+  "responsibilities": ["Main responsibilities, at most 6, each under 15 words"],
+  "keywords": ["Terms an ATS would screen for (technologies, methods, certifications, domains)"]
+}}
+"""
+
+    def build(response_text):
+        parsed = loads_with_repair(response_text)
+        return {
+            "title": str(parsed["title"]),
+            "seniority": str(parsed.get("seniority", "")),
+            "required_skills": [str(item) for item in parsed["required_skills"]],
+            "nice_to_have_skills": [str(item) for item in parsed.get("nice_to_have_skills", [])],
+            "responsibilities": [str(item) for item in parsed.get("responsibilities", [])],
+            "keywords": [str(item) for item in parsed.get("keywords", [])]
+        }
+
+    return call_with_stage_retry(
+        "job_profile",
+        lambda attempt: generate_text(
+            model,
+            prompt,
+            generation_config=json_generation_config(JOB_PROFILE_SCHEMA),
+            stage="job_profile"
+        ),
+        build
+    )
+
+
+def _prompt_fragment(profile: dict, normalized_job_description: str) -> str:
+    """
+    Compact job context used in analysis prompts instead of the full text.
+    Rule-based profiles have no extracted structure and keep the full text.
+    """
+    if profile["source"] != "gemini":
+        return normalized_job_description
+
+    title = profile["title"] + (f" ({profile['seniority']})" if profile["seniority"] else "")
+    lines = [f"Target role: {title}"]
+    for label, key in (
+        ("Required skills", "required_skills"),
+        ("Nice to have", "nice_to_have_skills"),
+        ("Main responsibilities", "responsibilities"),
+        ("ATS keywords", "keywords")
+    ):
+        if profile[key]:
+            lines.append(f"{label}: {json.dumps(profile[key], ensure_ascii=False)}")
+    return "\n".join(lines)
@@ -0,0 +1,260 @@
+"""
+JSON Repair Module
+Recovers JSON from noisy or truncated model output before a stage is
+treated as failed, and retries only the stage whose output was unusable
+"""
+
+import json
+import os
+import re
+import threading
+
+
+# Extra model calls allowed for a stage whose output could not be recovered
+GEMINI_STAGE_RETRIES = max(0, int(os.getenv("GEMINI_STAGE_RETRIES", "1")))
+
+_FENCE_PATTERN = re.compile(r'```[a-zA-Z]*')
+_CLOSERS = {'{': '}', '[': ']'}
+
+_lock = threading.Lock()
+_counters = {
+    "parsed_clean": 0,
+    "fences_stripped": 0,
+    "trailing_text": 0,
+    "unescaped_quotes": 0,
+    "truncated": 0,
+    "unrecoverable": 0,
+    "stage_retries": 0,
+    "stage_retry_recovered": 0,
+    "stage_failures": 0
+}
+
+
+def _count(name: str):
+    with _lock:
+        _counters[name] += 1
+
+
+def _record(report: dict, counter: str, repair):
+    _count(counter)
+    if report is not None:
+        report["repair"] = repair
+
+
+def get_repair_stats() -> dict:
+    """Return how often each repair (and each stage retry) was needed."""
+    with _lock:
+        stats = dict(_counters)
+    repaired = stats["fences_stripped"] + stats["trailing_text"] + stats["unescaped_quotes"] + stats["truncated"]
+    stats["recovered_without_retry"] = repaired
+    return stats
+
+
+def loads_with_repair(text: str, report: dict = None):
+    """
+    Parse JSON from a model response, repairing the usual failure shapes.
+
+    Repairs tried in order: markdown fences (also repeated or unbalanced
+    ones), prose before/after the JSON value, unescaped double quotes inside
+    strings, and output truncated mid-value (the incomplete trailing element
+    is dropped and open containers are closed).
+
+    Args:
+        text: Raw response text
+        report: Optional dict whose 'repair' key is set to the repair that
+                was needed (None, "fences", "trailing_text", "unescaped_quotes"
+                or "truncated"). A "truncated" result lost its last,
+                incomplete value and must not be cached as a complete one.
+
+    Returns:
+        The parsed JSON value
+
+    Raises:
+        json.JSONDecodeError: The original parse error if nothing worked
+    """
+    try:
+        value = json.loads(text)
+        _record(report, "parsed_clean", None)
+        return value
+    except json.JSONDecodeError as e:
+        original_error = e
+
+    candidate = text
+    if '```' in candidate:
+        candidate = _FENCE_PATTERN.sub('', candidate).strip()
+        try:
+            value = json.loads(candidate)
+            _record(report, "fences_stripped", "fences")
+            return value
+        except json.JSONDecodeError:
+            pass
+
+    start = _find_json_start(candidate)
+    if start is None:
+        _count("unrecoverable")
+        raise original_error
+    candidate = candidate[start:]
+
+    try:
+        value, _ = json.JSONDecoder().raw_decode(candidate)
+        _record(report, "trailing_text", "trailing_text")
+        return value
+    except json.JSONDecodeError:
+        pass
+
+    quoted = _escape_inner_quotes(candidate)
+    if quoted != candidate:
+        try:
+            value, _ = json.JSONDecoder().raw_decode(quoted)
+            _record(report, "unescaped_quotes", "unescaped_quotes")
+            return value
+        except json.JSONDecodeError:
+            pass
+
+    for source in (candidate, quoted):
+        value = _close_truncated(source)
+        if value is not None:
+            _record(report, "truncated", "truncated")
+            return value
+
+    _count("unrecoverable")
+    raise original_error
+
+
+def call_with_stage_retry(stage: str, generate, build):
+    """
+    Run one model stage, retrying only that stage if its output is unusable.
+
+    Args:
+        stage: Stage name (for logging)
+        generate: Callable (attempt) -> response text; attempt is 0 for the first call
+        build: Callable (response text) -> result; raises ValueError, KeyError
+               or TypeError when the output cannot be used
+
+    Returns:
+        Whatever build returns
+
+    Raises:
+        The last build error once GEMINI_STAGE_RETRIES retries are used up
+    """
+    for attempt in range(GEMINI_STAGE_RETRIES + 1):
+        if attempt:
+            _count("stage_retries")
+            print(f"🔁 Retrying {stage} stage (attempt {attempt + 1}/{GEMINI_STAGE_RETRIES + 1})")
+        text = generate(attempt)
+        try:
+            result = build(text)
+        except (ValueError, KeyError, TypeError):
+            if attempt == GEMINI_STAGE_RETRIES:
+                _count("stage_failures")
+                raise
+            continue
+        if attempt:
+            _count("stage_retry_recovered")
+        return result
+
+
+def _find_json_start(text: str):
+    positions = [pos for pos in (text.find('{'), text.find('[')) if pos != -1]
+    return min(positions) if positions else None
+
+
+def _escape_inner_quotes(text: str) -> str:
+    """
+    Escape double quotes that sit inside a string value.
+
+    A quote only closes a string when the next non-space character can
+    follow a string (, : } ] or the end of the text); any other quote is
+    taken to be part of the text.
+    """
+    out = []
+    in_string = False
+    escaped = False
+    length = len(text)
+
+    for i, char in enumerate(text):
+        if not in_string:
+            if char == '"':
+                in_string = True
+            out.append(char)
+            continue
+
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char == '"':
+            j = i + 1
+            while j < length and text[j] in ' \t\r\n':
+                j += 1
+            if j >= length or text[j] in ',:}]':
+                in_string = False
+            else:
+                out.append('\\"')
+                continue
+        elif char == '\n':
+            out.append('\\n')
+            continue
+        out.append(char)
+
+    return ''.join(out)
+
+
+def _close_truncated(text: str):
+    """
+    Parse JSON that stops mid-document.
+
+    If the text ends right after a complete string or container, the open
+    containers are simply closed. Otherwise the text is cut back to the last
+    complete element (the last comma or unclosed container outside a string)
+    and closed from there, so a half-written value is dropped.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    cut_points = []
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in '{[':
+            # Cutting before an opening drops a container that never closed
+            cut_points.append((i, list(stack)))
+            stack.append(char)
+        elif char in '}]':
+            if not stack:
+                return None
+            stack.pop()
+            if not stack:
+                # A complete value was found; raw_decode would have succeeded
+                return None
+        elif char == ',':
+            cut_points.append((i, list(stack)))
+
+    if not stack:
+        return None
+
+    # Only close in place after a value that is certainly complete; a cut
+    # string or number would otherwise come back as a plausible-looking value
+    tail = text.rstrip()
+    if not in_string and tail.endswith(('"', '}', ']')):
+        try:
+            return json.loads(tail + ''.join(_CLOSERS[c] for c in reversed(stack)))
+        except json.JSONDecodeError:
+            pass
+
+    for position, open_stack in reversed(cut_points):
+        try:
+            return json.loads(text[:position] + ''.join(_CLOSERS[c] for c in reversed(open_stack)))
+        except json.JSONDecodeError:
+            continue
+    return None
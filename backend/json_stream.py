@@ -0,0 +1,99 @@
+"""
+JSON Stream Module
+Incremental scanner that pulls completed items out of a JSON array while the
+document is still being streamed
+"""
+
+import json
+
+
+class JSONArrayItemStream:
+    """
+    Watches streamed JSON text for the array stored under `key` and returns
+    each object item of that array as soon as its closing brace arrives.
+
+    Only the first array found under `key` (at any depth) is tracked. Every
+    character is scanned once, so feeding a long response chunk by chunk
+    stays linear in its length.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_string = None
+        self._key_pending = False
+        self._array_depth = None
+        self._item_start = None
+        self._done = False
+
+    def feed(self, chunk: str) -> list:
+        """
+        Append a chunk of the response.
+
+        Returns:
+            list: Items of the tracked array completed by this chunk (parsed)
+        """
+        self.text += chunk
+        items = []
+        if self._done:
+            return items
+
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:i]
+                continue
+
+            if char in ' \t\r\n':
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+                self._key_pending = False
+                continue
+
+            if char == ':':
+                self._key_pending = self._last_string == self.key
+                self._last_string = None
+                continue
+
+            self._last_string = None
+
+            if char in '[{':
+                if char == '[' and self._key_pending and self._array_depth is None:
+                    self._array_depth = self._depth
+                elif char == '{' and self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._item_start = i
+                self._depth += 1
+
+            elif char in ']}':
+                self._depth -= 1
+                if char == '}' and self._item_start is not None and self._depth == self._array_depth + 1:
+                    try:
+                        items.append(json.loads(text[self._item_start:i + 1]))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                elif char == ']' and self._array_depth is not None and self._depth == self._array_depth:
+                    self._done = True
+                    self._pos = i + 1
+                    return items
+
+            self._key_pending = False
+
+        self._pos = len(text)
+        return items
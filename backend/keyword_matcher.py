@@ -0,0 +1,165 @@
+"""
+Keyword Matcher Module
+Multi-keyword search over the values of a structured CV (Aho-Corasick over
+word tokens), tolerant to case, accents and simple FR/EN plural forms
+"""
+
+import re
+import unicodedata
+from collections import deque
+
+
+# Words, keeping the symbols of names like C++ and C#
+TOKEN_PATTERN = re.compile(r"[\w+#]+")
+
+# Annotations the model adds to keywords, e.g. "Python (mentioned 3x)" or "SQL (2x)"
+_ANNOTATION_PATTERN = re.compile(r"\s*\((?:mentioned\s+)?\d+\s*x\)\s*$", re.IGNORECASE)
+
+# Values under these keys are identifiers ("exp_1"), not CV text
+_IGNORED_KEYS = {"id"}
+
+
+def normalize_token(token: str) -> str:
+    """
+    Fold a word to the form keywords are compared in: lowercase, without
+    accents, and with a simple plural/stem suffix removed
+    ("technologies" -> "technology", "réseaux" -> "reseau", "APIs" -> "api").
+    """
+    folded = "".join(
+        char for char in unicodedata.normalize("NFKD", token) if not unicodedata.combining(char)
+    ).casefold()
+    return _stem(folded)
+
+
+def tokenize(text: str) -> list:
+    """Normalized word tokens of text (see normalize_token)."""
+    return [normalize_token(token) for token in TOKEN_PATTERN.findall(text)]
+
+
+def iter_text_values(data, path: list = None):
+    """
+    Yield (path, string) for every string value of a JSON-like object,
+    skipping keys and identifier fields.
+    """
+    path = path or []
+    if isinstance(data, str):
+        yield path, data
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if key not in _IGNORED_KEYS:
+                yield from iter_text_values(value, path + [key])
+    elif isinstance(data, list):
+        for index, value in enumerate(data):
+            yield from iter_text_values(value, path + [index])
+
+
+def clean_keyword(keyword: str) -> str:
+    """Keyword without a trailing count annotation such as "(mentioned 3x)"."""
+    return _ANNOTATION_PATTERN.sub("", keyword).strip()
+
+
+class KeywordMatcher:
+    """
+    Finds every occurrence of a fixed set of keywords in text.
+
+    The keywords are compiled once into an Aho-Corasick automaton over
+    normalized word tokens, so a scan is linear in the length of the text
+    whatever the number of keywords. Multi-word keywords ("machine
+    learning") match the same words in sequence; matches always start and
+    end on word boundaries.
+    """
+
+    def __init__(self, keywords: list):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        self._lengths = []
+
+        for index, keyword in enumerate(self.keywords):
+            tokens = tokenize(clean_keyword(keyword))
+            self._lengths.append(len(tokens))
+            if not tokens:
+                continue
+            node = 0
+            for token in tokens:
+                child = self._goto[node].get(token)
+                if child is None:
+                    child = self._new_node()
+                    self._goto[node][token] = child
+                node = child
+            self._output[node].append(index)
+
+        self._build_failure_links()
+
+    def _new_node(self) -> int:
+        self._goto.append({})
+        self._fail.append(0)
+        self._output.append([])
+        return len(self._goto) - 1
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def scan(self, text: str) -> list:
+        """
+        Find keyword occurrences in one string.
+
+        Returns:
+            list: (keyword, start, end) tuples with character offsets into text
+        """
+        matches = []
+        node = 0
+        ends = []
+        for match in TOKEN_PATTERN.finditer(text):
+            token = normalize_token(match.group())
+            ends.append((match.start(), match.end()))
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for index in self._output[node]:
+                start = ends[-self._lengths[index]][0]
+                matches.append((self.keywords[index], start, match.end()))
+        return matches
+
+    def scan_values(self, data) -> dict:
+        """
+        Find keyword occurrences in every string value of a JSON-like object
+        (keys and identifier fields are not searched).
+
+        Returns:
+            dict: keyword -> {'count': int, 'positions': [{'path', 'start', 'end'}]}
+                  for every keyword, including those with no match
+        """
+        found = {keyword: {"count": 0, "positions": []} for keyword in self.keywords}
+        for path, value in iter_text_values(data):
+            for keyword, start, end in self.scan(value):
+                found[keyword]["count"] += 1
+                found[keyword]["positions"].append({"path": path, "start": start, "end": end})
+        return found
+
+
+def _stem(word: str) -> str:
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("sses"):
+        return word[:-2]
+    if word.endswith(("ches", "shes", "xes")):
+        return word[:-2]
+    if word.endswith("aux") and len(word) > 4:
+        # French plurals: journaux -> journal, réseaux -> réseau (eaux -> eau)
+        return word[:-1] if word.endswith("eaux") else word[:-3] + "al"
+    if word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
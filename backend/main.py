@@ -1,14 +1,33 @@
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request, Body
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from parser import parse_document, parse_document_with_images
-from cv_structure_parser import parse_cv_to_structured_data, apply_suggestion_to_structured_cv
-from gemini_api_structured import analyze_structured_cv_with_gemini
-from google import generativeai as genai
-import tempfile
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from parser import parse_document_bytes
+from cv_structure_parser import (
+    parse_cv_to_structured_data, parse_cv_locally, apply_suggestion_to_structured_cv,
+    apply_suggestions_to_structured_cv, get_structure_cache_stats
+)
+from gemini_api_structured import (
+    analyze_structured_cv_with_gemini, parse_and_analyze_cv_with_gemini,
+    analyze_cv_section_with_gemini, analyze_cv_overview_with_gemini, merge_sectioned_analysis,
+    diff_analysis_sections, update_cv_overview_with_gemini, merge_incremental_analysis,
+    get_analysis_sections, get_analysis_cache_stats, MAX_ANALYSIS_IMAGES
+)
+from storage import CVStore, new_record_id
+from blob_store import BlobStore, parse_range_header
+from workers import run_gemini_call, run_parser_task, shutdown_workers, GEMINI_MAX_CONCURRENCY, PARSER_PROCESS_WORKERS
+from gemini_client import get_stage_models, get_token_usage, warm_up
+from json_repair import get_repair_stats
+from job_matcher import score_job_match
+from job_profiles import build_job_profile, job_profile_hash, match_profile_skills
+from candidate_index import CandidateIndex
+from sessions import SessionStore
+from typing import List
+from io import BytesIO
+import asyncio
 import os
 import json
-import base64
+from urllib.parse import quote
+import zipfile
 from datetime import datetime
 from dotenv import load_dotenv
 load_dotenv()
@@ -17,23 +36,31 @@ load_dotenv()
 os.environ['GRPC_VERBOSITY'] = 'ERROR'
 os.environ['GLOG_minloglevel'] = '2'
 
-# File storage directories (store JSON files under backend/data/...)
+# Legacy JSON directories (imported into the SQLite store at startup)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 CV_DATA_DIR = os.path.join(DATA_DIR, 'cv_data')
 ANALYSIS_DIR = os.path.join(DATA_DIR, 'analysis')
 
-# Ensure directories exist
-os.makedirs(CV_DATA_DIR, exist_ok=True)
-os.makedirs(ANALYSIS_DIR, exist_ok=True)
+# Indexed storage for structured CVs and analyses
+store = CVStore()
+
+# Content-addressed storage for original uploaded files
+blob_store = BlobStore()
+
+# Term index of the stored structured CVs for /rank-candidates
+candidate_index = CandidateIndex()
+
+# Versioned editing sessions (apply suggestions by ID, undo/redo)
+sessions = SessionStore()
 
 app = FastAPI()
 
 # ⚠️ IMPORTANT: Set your Gemini API key here or use environment variable
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "YOUR_API_KEY_HERE")
 
-# Choose your Gemini model
-GEMINI_MODEL = genai.GenerativeModel(model_name="gemini-2.5-flash")
+# Fire a cheap call per stage model at startup so the first request is not slower
+GEMINI_WARMUP = os.getenv("GEMINI_WARMUP", "false").lower() == "true"
 
 
 # Allow requests from your React frontend
@@ -45,6 +72,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+async def startup_event():
+    """Import JSON files written by earlier versions (each file only once) and index the stored CVs"""
+    counts = await asyncio.to_thread(store.import_json_files, CV_DATA_DIR, ANALYSIS_DIR)
+    if counts["structured_cvs"] or counts["analyses"]:
+        print(f"📥 Imported legacy JSON files into the CV store: {counts}")
+    
+    indexed = await asyncio.to_thread(_index_stored_cvs)
+    print(f"🗂️  Candidate index: {indexed} CVs")
+    
+    if GEMINI_WARMUP and GEMINI_API_KEY != "YOUR_API_KEY_HERE":
+        # Don't hold up startup; the warm-up finishes in the background
+        asyncio.create_task(run_gemini_call(warm_up, GEMINI_API_KEY))
+
+
+def _index_stored_cvs() -> int:
+    """Add every structured CV of the store to the candidate index."""
+    for record in store.iter_structured_cvs():
+        candidate_index.add(record['id'], record['data'].get('structured_cv'), record['candidate_name'])
+    return len(candidate_index)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker pools when the server stops"""
+    shutdown_workers()
+
 """
 Removed legacy /analyze endpoint. Use POST /analyze-structured instead.
 """
@@ -56,7 +111,25 @@ async def root():
     return {
         "status": "API is running!",
         "message": "Use POST /analyze-structured to process CVs",
-        "gemini_configured": GEMINI_API_KEY != "YOUR_API_KEY_HERE"
+        "gemini_configured": GEMINI_API_KEY != "YOUR_API_KEY_HERE",
+        "gemini_models": get_stage_models(),
+        "gemini_max_concurrency": GEMINI_MAX_CONCURRENCY,
+        "parser_process_workers": PARSER_PROCESS_WORKERS
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    """Cache hit/miss counters and other runtime statistics"""
+    return {
+        "caches": {
+            "structure_parse": get_structure_cache_stats(),
+            "analysis": get_analysis_cache_stats()
+        },
+        "json_repair": get_repair_stats(),
+        "candidate_index": {"candidates": len(candidate_index), "features": candidate_index.features},
+        "sessions": sessions.stats(),
+        "token_usage": get_token_usage()
     }
 
 
@@ -64,23 +137,16 @@ async def root():
 async def get_latest_cv():
     """Get the most recently saved CV data"""
     try:
-        # Find all JSON files in the cv_data folder
-        json_files = [f for f in os.listdir(CV_DATA_DIR) if f.startswith('cv_data_') and f.endswith('.json')]
-
-        if not json_files:
+        latest = store.get_latest_structured_cv()
+        
+        if not latest:
             return {"error": "No CV data files found"}
-
-            # Get the most recent file (sorted by filename timestamp)
-            latest_basename = sorted(json_files)[-1]
-            latest_path = os.path.join(CV_DATA_DIR, latest_basename)
-
-            with open(latest_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            return {
-                "filename": latest_basename,
-                "data": data
-                }
+        
+        return {
+            "id": latest["id"],
+            "filename": latest["source_filename"],
+            "data": latest["data"]
+        }
     
     except Exception as e:
         return {"error": f"Failed to read CV data: {str(e)}"}
@@ -90,22 +156,15 @@ async def get_latest_cv():
 async def get_latest_analysis():
     """Get the most recent Gemini analysis"""
     try:
-        # Find all analysis files in the analysis folder
-        analysis_files = [f for f in os.listdir(ANALYSIS_DIR) if f.startswith('analysis_') and f.endswith('.json')]
-
-        if not analysis_files:
+        latest = store.get_latest_analysis()
+        
+        if not latest:
             return {"error": "No analysis files found"}
-
-        # Get the most recent file
-        latest_basename = sorted(analysis_files)[-1]
-        latest_path = os.path.join(ANALYSIS_DIR, latest_basename)
-
-        with open(latest_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
+        
         return {
-            "filename": latest_basename,
-            "analysis": data
+            "id": latest["id"],
+            "cv_id": latest["cv_id"],
+            "analysis": latest["data"]
         }
     
     except Exception as e:
@@ -113,92 +172,122 @@ async def get_latest_analysis():
         return {"error": "Failed to read analysis. Please try again."}
 
 
-@app.post("/analyze-structured")
-async def analyze_structured(
-    cv_file: UploadFile = File(None),
-    cv_text: str = Form(None),
-    job_description: str = Form(""),
-    use_gemini: bool = Form(True)
+@app.get("/history/cvs")
+async def list_cv_history(limit: int = 20, offset: int = 0, since: str = None, until: str = None):
+    """
+    Paginated list of stored structured CVs, newest first.
+    since/until are ISO dates or timestamps (e.g. 2025-11-01); a date-only until includes that day.
+    """
+    limit = max(1, min(limit, 100))
+    return {
+        "items": store.list_structured_cvs(limit=limit, offset=offset, since=since, until=until),
+        "limit": limit,
+        "offset": offset
+    }
+
+
+@app.get("/history/analyses")
+async def list_analysis_history(
+    limit: int = 20,
+    offset: int = 0,
+    since: str = None,
+    until: str = None,
+    min_score: int = None,
+    max_score: int = None,
+    sort: str = "date"
 ):
     """
-    Analyze CV and return structured data with field-targeted suggestions.
-    This is the enhanced version that uses structured CV data.
+    Paginated list of stored analyses filtered by date and overall score.
+    sort is "date" (newest first) or "score" (best first).
     """
+    limit = max(1, min(limit, 100))
+    return {
+        "items": store.list_analyses(limit=limit, offset=offset, since=since, until=until,
+                                     min_score=min_score, max_score=max_score, sort=sort),
+        "limit": limit,
+        "offset": offset
+    }
+
+
+@app.get("/cvs/{cv_id}")
+async def get_cv(cv_id: str):
+    """Get one stored structured CV record"""
+    record = store.get_structured_cv(cv_id)
+    if not record:
+        return JSONResponse(status_code=404, content={"error": "CV not found"})
+    return record
+
+
+@app.get("/analyses/{analysis_id}")
+async def get_analysis(analysis_id: str):
+    """Get one stored analysis record"""
+    record = store.get_analysis(analysis_id)
+    if not record:
+        return JSONResponse(status_code=404, content={"error": "Analysis not found"})
+    return record
+
+
+async def _extract_cv_input(content: bytes, filename: str, content_type: str, cv_text: str) -> dict:
+    """
+    Turn an uploaded file (or raw text) into text, page images and file metadata.
     
-    print("\n" + "="*50)
-    print("NEW STRUCTURED ANALYSIS REQUEST")
-    print("="*50)
-    
-    # Extract text from file or use provided text
-    text = cv_text
-    file_info = {}
-    cv_images = []
-    original_file_data = None
+    Returns:
+        dict: 'text', 'images', 'file_info' and 'original_file' keys,
+              or an 'error' key with a user-facing message
+    """
+    if content is None:
+        if not cv_text:
+            return {"error": "No CV text provided"}
+        return {
+            "text": cv_text,
+            "images": [],
+            "file_info": {"source": "raw_text"},
+            "original_file": None
+        }
     
-    if cv_file:
-        print(f"📄 File uploaded: {cv_file.filename}")
-        try:
-            _, ext = os.path.splitext(cv_file.filename)
-            content = await cv_file.read()
-            
-            # Store original file
-            file_base64 = base64.b64encode(content).decode('utf-8')
-            original_file_data = {
-                "filename": cv_file.filename,
-                "content_type": cv_file.content_type,
-                "data": file_base64,
-                "size": len(content)
-            }
-            
-            # Parse document
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-                tmp.write(content)
-                tmp_path = tmp.name
-            
-            parse_result = parse_document_with_images(tmp_path)
-            text = parse_result['text']
-            cv_images = parse_result['images']
-            
-            os.unlink(tmp_path)
-            
-            if not text:
-                return {"error": "Failed to extract text from file"}
-            
-            file_info = {
-                "filename": cv_file.filename,
+    print(f"📄 File uploaded: {filename}")
+    try:
+        # Store original file (deduplicated); clients fetch it from the URL on demand
+        original_file_data = await asyncio.to_thread(blob_store.put, content, filename, content_type)
+        original_file_data["url"] = f"/files/{original_file_data['id']}"
+        
+        # Parse document straight from the upload buffer, in the parser worker pool
+        parse_result = await run_parser_task(parse_document_bytes, content, filename, max_image_pages=MAX_ANALYSIS_IMAGES)
+        text = parse_result['text']
+        
+        if not text:
+            return {"error": "Failed to extract text from file"}
+        
+        return {
+            "text": text,
+            "images": parse_result['images'],
+            "file_info": {
+                "filename": filename,
                 "file_size_bytes": len(content),
                 "extracted_text_length": len(text)
-            }
-            
-        except Exception as e:
-            print(f"❌ Error processing file: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {"error": "Failed to process file. Please ensure the file is valid and try again."}
-    
-    if not text:
-        return {"error": "No CV text provided"}
-    
-    # Step 1: Parse CV into structured data
-    print("🔄 Parsing CV into structured data...")
-    structured_result = parse_cv_to_structured_data(text, GEMINI_API_KEY)
-    
-    if structured_result['status'] != 'success':
-        print(f"❌ Failed to parse CV structure: {structured_result}")
-        return {"error": "Failed to parse CV structure. Please try again or use a different format."}
+            },
+            "original_file": original_file_data
+        }
     
-    structured_cv = structured_result['structured_data']
+    except asyncio.TimeoutError:
+        return {"error": "The document took too long to process. Please try a smaller or simpler file."}
+        
+    except Exception as e:
+        print(f"❌ Error processing file: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {"error": "Failed to process file. Please ensure the file is valid and try again."}
+
+
+def _save_results(structured_cv: dict, text: str, job_description: str, file_info: dict, gemini_analysis: dict,
+                  job_profile_id: str = None) -> dict:
+    """
+    Persist the structured CV and (successful) analysis in the CV store.
     
-    # Step 2: Analyze structured CV with Gemini
-    gemini_analysis = None
-    if use_gemini:
-        print("🤖 Analyzing structured CV with Gemini...")
-        gemini_analysis = analyze_structured_cv_with_gemini(
-            structured_cv, 
-            job_description, 
-            GEMINI_API_KEY, 
-            cv_images
-        )
+    Returns:
+        dict: Record IDs ('structured_cv' and 'analysis', None when not saved)
+    """
+    saved = {"structured_cv": None, "analysis": None}
     
     # Save structured CV data
     cv_data = {
@@ -206,34 +295,357 @@ async def analyze_structured(
         "structured_cv": structured_cv,
         "original_text": text,
         "job_description": job_description,
-        "file_info": file_info if cv_file else {"source": "raw_text"}
+        "job_profile_id": job_profile_id,
+        "file_info": file_info
     }
     
-    output_basename = f"structured_cv_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-    output_filename = os.path.join(CV_DATA_DIR, output_basename)
-    
     try:
-        with open(output_filename, 'w', encoding='utf-8') as f:
-            json.dump(cv_data, f, indent=2, ensure_ascii=False)
-        print(f"💾 Saved structured CV to: {output_filename}")
+        saved["structured_cv"] = store.save_structured_cv(cv_data)
+        print(f"💾 Saved structured CV: {saved['structured_cv']}")
+        contact = structured_cv.get('contact') if isinstance(structured_cv, dict) else None
+        candidate_index.add(saved["structured_cv"], structured_cv, contact.get('name') if isinstance(contact, dict) else None)
     except Exception as e:
         print(f"❌ Error saving structured CV: {str(e)}")
     
     # Save analysis
     if gemini_analysis and 'error' not in gemini_analysis:
-        analysis_basename = f"structured_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        analysis_filename = os.path.join(ANALYSIS_DIR, analysis_basename)
-        with open(analysis_filename, 'w', encoding='utf-8') as f:
-            json.dump(gemini_analysis, f, indent=2, ensure_ascii=False)
-        print(f"💾 Saved structured analysis to: {analysis_filename}")
+        try:
+            saved["analysis"] = store.save_analysis(gemini_analysis, cv_id=saved["structured_cv"])
+            print(f"💾 Saved structured analysis: {saved['analysis']}")
+        except Exception as e:
+            print(f"❌ Error saving structured analysis: {str(e)}")
+    
+    return saved
+
+
+def _start_session(structured_cv: dict, gemini_analysis: dict, saved: dict) -> str:
+    """Open an editing session on an analyzed CV, with its field suggestions applicable by ID."""
+    analysis = gemini_analysis.get('analysis') if isinstance(gemini_analysis, dict) else None
+    suggestions = analysis.get('field_suggestions') if isinstance(analysis, dict) else None
+    return sessions.create(structured_cv, suggestions, cv_id=saved["structured_cv"], analysis_id=saved["analysis"],
+                           analysis=gemini_analysis if suggestions is not None else None)
+
+
+# "standard": structure call, then analysis call (default)
+# "combined": one Gemini call returns both the structured CV and the analysis
+# "sectioned": structure call, then one analysis call per CV section plus an overview call, run concurrently
+ANALYSIS_MODES = ("standard", "combined", "sectioned")
+
+
+async def _llm_stages(text: str, images: list, job_description: str, use_gemini: bool,
+                      use_cache: bool, analysis_mode: str = "standard", on_suggestion=None,
+                      job_profile: dict = None):
+    """
+    Run the Gemini stages for one CV. With use_gemini=False the CV is
+    structured by the rule-based segmenter and no API call is made.
+    
+    With a job_profile, the analysis prompts get its compact prompt fragment
+    instead of the full job description.
+    
+    on_suggestion is forwarded to the analysis call(s) and runs in a Gemini
+    worker thread for every field suggestion streamed by the model.
+    
+    Yields:
+        tuple: ("structured_cv", dict), then ("analysis", dict or None),
+               or ("error", message) if the CV structure could not be parsed
+    """
+    if not use_gemini:
+        # Offline: rule-based structure only, no Gemini calls at all
+        print("🧩 Parsing CV with the rule-based segmenter...")
+        yield "structured_cv", parse_cv_locally(text)['structured_data']
+        yield "analysis", None
+        return
+    
+    job_context = job_profile['prompt_fragment'] if job_profile else job_description
+    
+    if analysis_mode == "combined":
+        print("🤖 Parsing and analyzing CV in a single Gemini call...")
+        combined = await run_gemini_call(
+            parse_and_analyze_cv_with_gemini, text, job_context, GEMINI_API_KEY, images, use_cache,
+            on_suggestion=on_suggestion
+        )
+        if combined['status'] == 'success':
+            yield "structured_cv", combined['structured_data']
+            yield "analysis", _with_local_match(combined['analysis_result'], combined['structured_data'],
+                                                job_description, job_profile)
+            return
+        print(f"⚠️  Single-call mode failed, falling back to separate calls: {combined.get('message')}")
+    
+    print("🔄 Parsing CV into structured data...")
+    structured_result = await run_gemini_call(parse_cv_to_structured_data, text, GEMINI_API_KEY, use_cache)
+    if structured_result['status'] != 'success':
+        print(f"❌ Failed to parse CV structure: {structured_result}")
+        yield "error", "Failed to parse CV structure. Please try again or use a different format."
+        return
+    
+    structured_cv = structured_result['structured_data']
+    yield "structured_cv", structured_cv
+    
+    if analysis_mode == "sectioned":
+        gemini_analysis = await _analyze_sectioned(structured_cv, images, job_context, use_cache, on_suggestion)
+        yield "analysis", _with_local_match(gemini_analysis, structured_cv, job_description, job_profile)
+        return
+    
+    print("🤖 Analyzing structured CV with Gemini...")
+    gemini_analysis = await run_gemini_call(
+        analyze_structured_cv_with_gemini,
+        structured_cv,
+        job_context,
+        GEMINI_API_KEY,
+        images,
+        use_cache,
+        on_suggestion=on_suggestion
+    )
+    yield "analysis", _with_local_match(gemini_analysis, structured_cv, job_description, job_profile)
+
+
+def _with_local_match(gemini_analysis: dict, structured_cv: dict, job_description: str,
+                      job_profile: dict = None) -> dict:
+    """
+    Store the local BM25 job-match score next to the model's job_match_analysis
+    (as 'local_match') so the two relevance scores can be compared. With a
+    job profile its precomputed terms are reused, and the profile's required
+    and nice-to-have skills are checked against the CV ('profile_skills').
+    """
+    if not (job_description and job_description.strip()) or gemini_analysis.get('status') != 'success':
+        return gemini_analysis
+    
+    job_match_analysis = gemini_analysis['analysis']['job_match_analysis']
+    local_match = score_job_match(structured_cv, job_description, terms=job_profile['terms'] if job_profile else None)
+    if local_match['status'] == 'success':
+        job_match_analysis['local_match'] = local_match
+    if job_profile:
+        job_match_analysis['profile_skills'] = match_profile_skills(job_profile, structured_cv)
+    return gemini_analysis
+
+
+def _load_job_profile(job_profile_id: str):
+    """
+    Stored job profile for an analyze request.
+    
+    Returns:
+        tuple: (profile or None, error message or None)
+    """
+    if not job_profile_id:
+        return None, None
+    record = store.get_job_profile(job_profile_id)
+    if not record:
+        return None, "Job profile not found"
+    profile = record['data']
+    profile['id'] = record['id']
+    return profile, None
+
+
+async def _analyze_sectioned(structured_cv: dict, images: list, job_description: str,
+                             use_cache: bool, on_suggestion=None) -> dict:
+    """
+    Analyze each CV section in its own Gemini call, concurrently with the
+    overview (scores) call, and merge the results. The calls share the
+    Gemini executor, so GEMINI_MAX_CONCURRENCY still bounds them.
+    """
+    sections = get_analysis_sections(structured_cv)
+    print(f"🤖 Analyzing {len(sections)} CV sections in parallel: {', '.join(sections)}")
+    overview, *section_results = await asyncio.gather(
+        run_gemini_call(analyze_cv_overview_with_gemini, structured_cv, job_description, GEMINI_API_KEY, images, use_cache),
+        *(
+            run_gemini_call(analyze_cv_section_with_gemini, section, structured_cv, job_description, GEMINI_API_KEY,
+                            use_cache, on_suggestion=on_suggestion)
+            for section in sections
+        )
+    )
+    if overview['status'] != 'success':
+        return overview
+    return merge_sectioned_analysis(structured_cv, overview, section_results)
+
+
+async def _reanalyze_changed_sections(previous_cv: dict, previous_analysis: dict, structured_cv: dict,
+                                     job_description: str, use_cache: bool, reserved_ids=None) -> dict:
+    """
+    Re-analyze only the sections that changed since previous_analysis, each
+    in its own Gemini call, concurrently with a re-scoring call, and merge
+    them into the previous analysis. New suggestions get IDs outside
+    reserved_ids (IDs handed out in earlier rounds).
+    """
+    changed = diff_analysis_sections(previous_cv, structured_cv)
+    if not changed:
+        print("⚡ No section changed since the last analysis")
+        return dict(previous_analysis, token_usage={}, incremental={
+            "changed_sections": [],
+            "reused_sections": get_analysis_sections(structured_cv),
+            "stale_sections": []
+        })
+    
+    present = set(get_analysis_sections(structured_cv))
+    sections = [section for section in changed if section in present]
+    print(f"🤖 Re-analyzing {len(sections)} changed CV sections: {', '.join(sections) or '-'}")
+    overview, *section_results = await asyncio.gather(
+        run_gemini_call(update_cv_overview_with_gemini, structured_cv, previous_analysis, changed, job_description,
+                        GEMINI_API_KEY, use_cache),
+        *(
+            run_gemini_call(analyze_cv_section_with_gemini, section, structured_cv, job_description, GEMINI_API_KEY,
+                            use_cache)
+            for section in sections
+        )
+    )
+    return merge_incremental_analysis(structured_cv, previous_analysis, overview, section_results, changed,
+                                      reserved_ids)
+
+
+async def _llm_stages_with_suggestions(*args, **kwargs):
+    """
+    _llm_stages plus ("suggestion", item) events for each field suggestion,
+    delivered while the analysis call is still streaming.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+    
+    def on_suggestion(suggestion):
+        loop.call_soon_threadsafe(queue.put_nowait, ("suggestion", suggestion))
+    
+    async def produce():
+        try:
+            async for stage in _llm_stages(*args, on_suggestion=on_suggestion, **kwargs):
+                await queue.put(stage)
+        finally:
+            await queue.put(done)
+    
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+        await producer
+    finally:
+        producer.cancel()
+
+
+@app.get("/files/{blob_id}")
+async def download_file(blob_id: str, request: Request, download: bool = False):
+    """
+    Serve an original uploaded file from the blob store.
+    
+    Supports conditional requests (ETag / If-None-Match) and single byte
+    ranges (Range / If-Range) so viewers can fetch documents incrementally.
+    Pass download=true to get an attachment instead of inline content.
+    """
+    metadata = blob_store.get_metadata(blob_id)
+    if not metadata:
+        return JSONResponse(status_code=404, content={"error": "File not found"})
+    
+    size = metadata["size"]
+    etag = f'"{blob_id}"'
+    disposition = "attachment" if download else "inline"
+    filename = metadata.get("filename") or "cv-document"
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Content-Disposition": f"{disposition}; filename*=UTF-8''{quote(filename)}"
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range_header(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        
+        if byte_range:
+            start, end = byte_range
+            body = await asyncio.to_thread(blob_store.read, blob_id, start, end)
+            return Response(
+                content=body,
+                status_code=206,
+                media_type=metadata["content_type"],
+                headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"}
+            )
+    
+    body = await asyncio.to_thread(blob_store.read, blob_id)
+    return Response(content=body, media_type=metadata["content_type"], headers=headers)
+
+
+@app.post("/analyze-structured")
+async def analyze_structured(
+    cv_file: UploadFile = File(None),
+    cv_text: str = Form(None),
+    job_description: str = Form(""),
+    use_gemini: bool = Form(True),
+    use_cache: bool = Form(True),
+    analysis_mode: str = Form("standard"),
+    job_profile_id: str = Form(None)
+):
+    """
+    Analyze CV and return structured data with field-targeted suggestions.
+    This is the enhanced version that uses structured CV data.
+    Set use_cache=false to force fresh Gemini calls for parsing and analysis.
+    Set use_gemini=false for an offline, rule-based parse without analysis.
+    Set analysis_mode="combined" to parse and analyze in a single Gemini call,
+    or "sectioned" to analyze each CV section in its own concurrent call.
+    Pass job_profile_id (from POST /job-profiles) instead of job_description
+    to analyze against a registered job profile.
+    The response includes a session_id for applying suggestions by ID
+    (POST /sessions/{session_id}/apply).
+    """
+    if analysis_mode not in ANALYSIS_MODES:
+        return {"error": f"analysis_mode must be one of {', '.join(ANALYSIS_MODES)}"}
+    
+    job_profile, error = _load_job_profile(job_profile_id)
+    if error:
+        return {"error": error}
+    if job_profile:
+        job_description = job_profile['job_description']
+    
+    print("\n" + "="*50)
+    print("NEW STRUCTURED ANALYSIS REQUEST")
+    print("="*50)
+    
+    # Extract text from file or use provided text
+    content = await cv_file.read() if cv_file else None
+    extracted = await _extract_cv_input(
+        content,
+        cv_file.filename if cv_file else None,
+        cv_file.content_type if cv_file else None,
+        cv_text
+    )
+    
+    if 'error' in extracted:
+        return {"error": extracted['error']}
+    
+    text = extracted['text']
+    file_info = extracted['file_info']
+    
+    # Parse CV into structured data, then analyze it with Gemini
+    stages = {}
+    async for stage, value in _llm_stages(text, extracted['images'], job_description, use_gemini, use_cache,
+                                          analysis_mode, job_profile=job_profile):
+        if stage == "error":
+            return {"error": value}
+        stages[stage] = value
+    
+    structured_cv = stages["structured_cv"]
+    gemini_analysis = stages["analysis"]
+    
+    saved = _save_results(structured_cv, text, job_description, file_info, gemini_analysis, job_profile_id)
+    session_id = _start_session(structured_cv, gemini_analysis, saved)
     
     # Return response
     response = {
         "summary": "CV successfully analyzed with structured data!",
         "status": "success",
+        "cv_id": saved["structured_cv"],
+        "analysis_id": saved["analysis"],
+        "session_id": session_id,
         "structured_cv": structured_cv,
-        "original_file": original_file_data,
-        "file_info": file_info if cv_file else {"source": "raw_text"}
+        "original_file": extracted['original_file'],
+        "file_info": file_info
     }
     
     if gemini_analysis:
@@ -242,6 +654,285 @@ async def analyze_structured(
     return response
 
 
+def _stream_event(event: str, data) -> bytes:
+    """Encode one NDJSON event line."""
+    return (json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n").encode('utf-8')
+
+
+@app.post("/analyze-structured/stream")
+async def analyze_structured_stream(
+    cv_file: UploadFile = File(None),
+    cv_text: str = Form(None),
+    job_description: str = Form(""),
+    use_gemini: bool = Form(True),
+    use_cache: bool = Form(True),
+    analysis_mode: str = Form("standard"),
+    job_profile_id: str = Form(None)
+):
+    """
+    Streaming variant of /analyze-structured.
+    
+    Returns newline-delimited JSON events as each pipeline stage finishes:
+    "extracted" (text stats), "structured_cv", one "suggestion" per field
+    suggestion as soon as the model has written it, "analysis", "saved"
+    (record IDs and the editing session_id), then "done". A failing stage emits an "error" event and ends the stream.
+    In analysis_mode="combined", "structured_cv" and "analysis" arrive together;
+    in "sectioned" mode suggestions from all sections arrive interleaved.
+    """
+    if analysis_mode not in ANALYSIS_MODES:
+        return {"error": f"analysis_mode must be one of {', '.join(ANALYSIS_MODES)}"}
+    
+    job_profile, error = _load_job_profile(job_profile_id)
+    if error:
+        return {"error": error}
+    if job_profile:
+        job_description = job_profile['job_description']
+    
+    # Read the upload before streaming starts; the request body is gone afterwards
+    content = await cv_file.read() if cv_file else None
+    filename = cv_file.filename if cv_file else None
+    content_type = cv_file.content_type if cv_file else None
+    
+    async def event_stream():
+        print("\n" + "="*50)
+        print("NEW STREAMING STRUCTURED ANALYSIS REQUEST")
+        print("="*50)
+        
+        extracted = await _extract_cv_input(content, filename, content_type, cv_text)
+        if 'error' in extracted:
+            yield _stream_event("error", {"stage": "extraction", "message": extracted['error']})
+            return
+        
+        text = extracted['text']
+        file_info = extracted['file_info']
+        yield _stream_event("extracted", {
+            "file_info": file_info,
+            "original_file": extracted['original_file'],
+            "text_length": len(text),
+            "word_count": len(text.split()),
+            "page_images": len(extracted['images'])
+        })
+        
+        structured_cv = gemini_analysis = None
+        async for stage, value in _llm_stages_with_suggestions(text, extracted['images'], job_description,
+                                                               use_gemini, use_cache, analysis_mode,
+                                                               job_profile=job_profile):
+            if stage == "error":
+                yield _stream_event("error", {"stage": "structure", "message": value})
+                return
+            if stage == "suggestion":
+                yield _stream_event("suggestion", value)
+            elif stage == "structured_cv":
+                structured_cv = value
+                yield _stream_event("structured_cv", structured_cv)
+            elif value is not None:
+                gemini_analysis = value
+                yield _stream_event("analysis", gemini_analysis)
+        
+        saved = _save_results(structured_cv, text, job_description, file_info, gemini_analysis, job_profile_id)
+        saved["session_id"] = _start_session(structured_cv, gemini_analysis, saved)
+        yield _stream_event("saved", saved)
+        yield _stream_event("done", {"status": "success"})
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
+# Batch analysis limits
+BATCH_MAX_PARALLEL = max(1, int(os.getenv("BATCH_MAX_PARALLEL", "8")))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "500"))
+BATCH_SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.doc', '.txt')
+# Uncompressed size limits for CVs unpacked from a zip archive
+BATCH_MAX_FILE_BYTES = int(os.getenv("BATCH_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+BATCH_MAX_ZIP_BYTES = int(os.getenv("BATCH_MAX_ZIP_BYTES", str(200 * 1024 * 1024)))
+
+
+def _unpack_zip(content: bytes, max_files: int = BATCH_MAX_FILES) -> list:
+    """
+    List the supported CV documents inside a zip archive.
+    
+    Entries are decompressed at most up to the size limits, whatever sizes
+    the archive declares, so a zip bomb cannot exhaust memory.
+    
+    Args:
+        content: Zip archive bytes
+        max_files: Maximum number of documents to accept
+    
+    Returns:
+        list: (filename, content) tuples, skipping folders and macOS metadata
+    
+    Raises:
+        ValueError: If there are more than max_files documents, a document is
+                    over BATCH_MAX_FILE_BYTES, or all documents together are
+                    over BATCH_MAX_ZIP_BYTES (uncompressed)
+    """
+    documents = []
+    total_bytes = 0
+    with zipfile.ZipFile(BytesIO(content)) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or os.path.basename(name).startswith('.'):
+                continue
+            if not name.lower().endswith(BATCH_SUPPORTED_EXTENSIONS):
+                continue
+            if len(documents) >= max_files:
+                raise ValueError(f"Too many CVs in one batch (max {BATCH_MAX_FILES})")
+            if info.file_size > BATCH_MAX_FILE_BYTES:
+                raise ValueError(f"{os.path.basename(name)} is larger than {BATCH_MAX_FILE_BYTES // (1024 * 1024)}MB")
+            
+            # The declared size can lie: never decompress more than the limit
+            with archive.open(info) as member:
+                data = member.read(BATCH_MAX_FILE_BYTES + 1)
+            if len(data) > BATCH_MAX_FILE_BYTES:
+                raise ValueError(f"{os.path.basename(name)} is larger than {BATCH_MAX_FILE_BYTES // (1024 * 1024)}MB")
+            total_bytes += len(data)
+            if total_bytes > BATCH_MAX_ZIP_BYTES:
+                raise ValueError(f"Zip archive is larger than {BATCH_MAX_ZIP_BYTES // (1024 * 1024)}MB uncompressed")
+            documents.append((os.path.basename(name), data))
+    return documents
+
+
+async def _analyze_batch_item(index: int, filename: str, content: bytes, job_description: str,
+                              use_gemini: bool, use_cache: bool, analysis_mode: str = "standard",
+                              job_profile: dict = None) -> dict:
+    """Run extraction, structure parsing and analysis for one CV of a batch."""
+    result = {"index": index, "filename": filename, "status": "error"}
+    
+    extracted = await _extract_cv_input(content, filename, None, None)
+    if 'error' in extracted:
+        result["error"] = extracted['error']
+        return result
+    
+    stages = {}
+    async for stage, value in _llm_stages(extracted['text'], extracted['images'], job_description,
+                                          use_gemini, use_cache, analysis_mode, job_profile=job_profile):
+        if stage == "error":
+            result["error"] = "Failed to parse CV structure"
+            return result
+        stages[stage] = value
+    
+    structured_cv = stages["structured_cv"]
+    gemini_analysis = stages["analysis"]
+    
+    saved = _save_results(structured_cv, extracted['text'], job_description, extracted['file_info'], gemini_analysis,
+                          job_profile['id'] if job_profile else None)
+    
+    result.update({
+        "status": "success",
+        "cv_id": saved["structured_cv"],
+        "analysis_id": saved["analysis"],
+        "structured_cv": structured_cv,
+        "file_info": extracted['file_info']
+    })
+    if gemini_analysis:
+        result["gemini_analysis"] = gemini_analysis
+    return result
+
+
+def _batch_ranking(results: list) -> list:
+    """Rank successful batch results by overall score, then ATS score."""
+    ranked = []
+    for item in results:
+        analysis = (item.get("gemini_analysis") or {}).get("analysis")
+        if item["status"] != "success" or not analysis:
+            continue
+        ranked.append({
+            "index": item["index"],
+            "filename": item["filename"],
+            "name": (item["structured_cv"].get("contact") or {}).get("name"),
+            "overall_score": analysis.get("overall_score", 0),
+            "ats_score": analysis.get("ats_score", 0)
+        })
+    
+    ranked.sort(key=lambda r: (r["overall_score"], r["ats_score"]), reverse=True)
+    for rank, entry in enumerate(ranked, start=1):
+        entry["rank"] = rank
+    return ranked
+
+
+@app.post("/analyze-batch")
+async def analyze_batch(
+    cv_files: List[UploadFile] = File(None),
+    cv_zip: UploadFile = File(None),
+    job_description: str = Form(""),
+    use_gemini: bool = Form(True),
+    use_cache: bool = Form(True),
+    analysis_mode: str = Form("standard"),
+    job_profile_id: str = Form(None)
+):
+    """
+    Analyze many CVs against one job description.
+    
+    Accepts a multipart list of files (cv_files) and/or a zip archive (cv_zip).
+    CVs are processed by at most BATCH_MAX_PARALLEL concurrent workers.
+    Returns newline-delimited JSON: one "result" event per CV in completion
+    order, then a "summary" event with counts and the score ranking.
+    With job_profile_id, every CV reuses the job profile extracted once.
+    """
+    documents = []
+    for upload in cv_files or []:
+        documents.append((upload.filename, await upload.read()))
+    
+    if cv_zip:
+        try:
+            documents.extend(_unpack_zip(await cv_zip.read(), max(0, BATCH_MAX_FILES - len(documents))))
+        except zipfile.BadZipFile:
+            return {"error": "Invalid zip archive"}
+        except ValueError as e:
+            return {"error": str(e)}
+    
+    if analysis_mode not in ANALYSIS_MODES:
+        return {"error": f"analysis_mode must be one of {', '.join(ANALYSIS_MODES)}"}
+    
+    job_profile, error = _load_job_profile(job_profile_id)
+    if error:
+        return {"error": error}
+    if job_profile:
+        job_description = job_profile['job_description']
+    
+    if not documents:
+        return {"error": "No CV files provided"}
+    
+    if len(documents) > BATCH_MAX_FILES:
+        return {"error": f"Too many CVs in one batch (max {BATCH_MAX_FILES})"}
+    
+    print("\n" + "="*50)
+    print(f"NEW BATCH ANALYSIS REQUEST ({len(documents)} CVs)")
+    print("="*50)
+    
+    semaphore = asyncio.Semaphore(BATCH_MAX_PARALLEL)
+    
+    async def run_item(index, filename, content):
+        async with semaphore:
+            try:
+                return await _analyze_batch_item(index, filename, content, job_description,
+                                                 use_gemini, use_cache, analysis_mode, job_profile)
+            except Exception as e:
+                print(f"❌ Batch item {filename} failed: {str(e)}")
+                return {"index": index, "filename": filename, "status": "error", "error": "Unexpected error while analyzing CV"}
+    
+    async def event_stream():
+        tasks = [asyncio.create_task(run_item(i, name, content)) for i, (name, content) in enumerate(documents)]
+        results = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                results.append(item)
+                yield _stream_event("result", item)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        succeeded = sum(1 for item in results if item["status"] == "success")
+        yield _stream_event("summary", {
+            "total": len(documents),
+            "succeeded": succeeded,
+            "failed": len(documents) - succeeded,
+            "ranking": _batch_ranking(results)
+        })
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
+
 @app.post("/apply-suggestion")
 async def apply_suggestion(
     structured_cv: dict,
@@ -280,24 +971,380 @@ async def apply_suggestion(
         }
 
 
+@app.post("/apply-suggestions")
+async def apply_suggestions(
+    structured_cv: dict = Body(...),
+    suggestions: list = Body(...),
+    atomic: bool = Body(True),
+    response_format: str = Body("cv")
+):
+    """
+    Apply several suggestions to the structured CV data in one pass.
+    
+    Expected request body:
+    {
+        "structured_cv": { ... },
+        "suggestions": [{"suggestionId": 1, "fieldPath": ["summary"], "improvedValue": "..."}, ...],
+        "atomic": true,            # apply all suggestions or none
+        "response_format": "cv"    # "cv" (updated_cv), "patch" (RFC 6902 JSON Patch) or "both"
+    }
+    
+    Every suggestion gets a status in 'results': applied, skipped (an
+    earlier suggestion already changed the same field), failed (its field
+    path does not exist) or rolled_back (atomic batch with a failure).
+    """
+    if response_format not in ("cv", "patch", "both"):
+        return {"status": "error", "message": "response_format must be 'cv', 'patch' or 'both'"}
+    
+    try:
+        outcome = apply_suggestions_to_structured_cv(structured_cv, suggestions, atomic=atomic)
+    except Exception as e:
+        print(f"❌ Error applying suggestions: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return {
+            "status": "error",
+            "message": "Failed to apply suggestions. Please try again."
+        }
+    
+    response = {
+        "status": "error" if outcome["failed"] and atomic else ("partial" if outcome["failed"] else "success"),
+        "applied": outcome["applied"],
+        "failed": outcome["failed"],
+        "results": outcome["results"]
+    }
+    if response["status"] == "error":
+        response["message"] = "Some suggestions could not be applied; no changes were made"
+    if response_format in ("cv", "both"):
+        response["updated_cv"] = outcome["updated_cv"]
+    if response_format in ("patch", "both"):
+        response["patch"] = outcome["patch"]
+    return response
+
+
+@app.post("/sessions")
+async def create_session(
+    structured_cv: dict = Body(None),
+    cv_id: str = Body(None),
+    analysis_id: str = Body(None),
+    suggestions: list = Body(None)
+):
+    """
+    Open an editing session on a structured CV.
+    
+    Expected request body (analysis responses already include a session_id):
+    {
+        "analysis_id": "<stored analysis id>", (or "suggestions": [ ... ])
+        "cv_id": "<stored CV id>",             (or "structured_cv": { ... }; default: the analyzed CV)
+    }
+    """
+    analysis = None
+    if analysis_id:
+        record = store.get_analysis(analysis_id)
+        if not record:
+            return JSONResponse(status_code=404, content={"error": "Analysis not found"})
+        analysis = record['data']
+        cv_id = cv_id or record['cv_id']
+        if suggestions is None:
+            suggestions = analysis.get('analysis', {}).get('field_suggestions', [])
+    
+    if structured_cv is None and cv_id:
+        record = store.get_structured_cv(cv_id)
+        if not record:
+            return JSONResponse(status_code=404, content={"error": "CV not found"})
+        structured_cv = record['data'].get('structured_cv')
+    if not isinstance(structured_cv, dict):
+        return {"error": "Provide structured_cv, cv_id or analysis_id"}
+    
+    session_id = sessions.create(structured_cv, suggestions, cv_id=cv_id, analysis_id=analysis_id, analysis=analysis)
+    return {"status": "success", "session_id": session_id, "version": 0}
+
+
+@app.get("/sessions/{session_id}")
+async def get_session(session_id: str, version: int = None):
+    """Get a session's current (or given) CV version and its applied/available suggestion IDs"""
+    session = sessions.get(session_id, version)
+    if not session:
+        return JSONResponse(status_code=404, content={"error": "Session or version not found"})
+    return session
+
+
+@app.post("/sessions/{session_id}/apply")
+async def apply_session_suggestions(
+    session_id: str,
+    suggestion_ids: List[int] = Body(...),
+    version: int = Body(None),
+    atomic: bool = Body(True)
+):
+    """
+    Apply suggestions of the session's analysis by ID.
+    
+    Expected request body:
+    {
+        "suggestion_ids": [1, 4],
+        "version": 3,     # optional: the version the client holds (409 if outdated)
+        "atomic": true
+    }
+    
+    Returns the new version number and an RFC 6902 JSON Patch from the
+    previous version, plus a status per suggestion (see /apply-suggestions).
+    """
+    result = sessions.apply(session_id, suggestion_ids, base_version=version, atomic=atomic)
+    return _session_response(result)
+
+
+@app.post("/sessions/{session_id}/undo")
+async def undo_session(session_id: str):
+    """Revert the last applied batch; returns the JSON Patch back to the previous version"""
+    return _session_response(sessions.undo(session_id))
+
+
+@app.post("/sessions/{session_id}/redo")
+async def redo_session(session_id: str):
+    """Re-apply the last undone batch; returns its JSON Patch"""
+    return _session_response(sessions.redo(session_id))
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """Drop a session and its versions"""
+    if not sessions.delete(session_id):
+        return JSONResponse(status_code=404, content={"error": "Session not found or expired"})
+    return {"status": "success"}
+
+
+@app.post("/reanalyze")
+async def reanalyze(
+    session_id: str = Body(None),
+    version: int = Body(None),
+    structured_cv: dict = Body(None),
+    analysis_id: str = Body(None),
+    job_description: str = Body(None),
+    use_cache: bool = Body(True)
+):
+    """
+    Update an analysis after suggestions were applied, re-analyzing only what changed.
+    
+    The edited CV is compared with the analyzed version. Each changed
+    section gets a new section analysis, and the scores are updated by a
+    call that sees the changed sections in full and the rest shortened.
+    Unchanged sections keep their previous scores and suggestions.
+    
+    Expected request body:
+    {
+        "session_id": "...", "version": 3       (default: the session's current version)
+    }
+    or
+    {
+        "analysis_id": "<stored analysis id>", "structured_cv": { ...edited CV... }
+    }
+    
+    The job description of the original analysis is used unless
+    job_description is given. With a session, the new analysis becomes the
+    base of the next re-analysis and its suggestions can be applied by ID.
+    """
+    if session_id:
+        base = sessions.get_analysis(session_id)
+        if base is None:
+            return JSONResponse(status_code=404, content={"error": "Session not found or expired"})
+        if version is None:
+            version = sessions.get(session_id)['current_version']
+        structured_cv = sessions.get_structured_cv(session_id, version)
+        if structured_cv is None:
+            return JSONResponse(status_code=404, content={"error": "Session version not found"})
+        previous_cv, previous_analysis, cv_id = base['structured_cv'], base['analysis'], base['cv_id']
+        cv_record = store.get_structured_cv(cv_id) if cv_id else None
+    elif analysis_id and isinstance(structured_cv, dict):
+        record = store.get_analysis(analysis_id)
+        if not record:
+            return JSONResponse(status_code=404, content={"error": "Analysis not found"})
+        previous_analysis = record['data']
+        cv_record = store.get_structured_cv(record['cv_id']) if record['cv_id'] else None
+        if not cv_record:
+            return JSONResponse(status_code=404, content={"error": "Analyzed CV not found"})
+        previous_cv = cv_record['data'].get('structured_cv') or {}
+    else:
+        return {"error": "Provide session_id, or analysis_id and structured_cv"}
+    
+    if not previous_analysis or previous_analysis.get('status') != 'success':
+        return {"error": "No previous analysis to update; run a full analysis first"}
+    
+    job_profile = None
+    if job_description is None:
+        cv_data = cv_record['data'] if cv_record else {}
+        job_description = cv_data.get('job_description') or ""
+        job_profile, _ = _load_job_profile(cv_data.get('job_profile_id'))
+    job_context = job_profile['prompt_fragment'] if job_profile else job_description
+    
+    # With a session, IDs of every earlier round (applied or not) stay reserved
+    reserved_ids = set(sessions.get_suggestions(session_id) or {}) if session_id else None
+    gemini_analysis = await _reanalyze_changed_sections(previous_cv, previous_analysis, structured_cv,
+                                                        job_context, use_cache, reserved_ids)
+    gemini_analysis = _with_local_match(gemini_analysis, structured_cv, job_description, job_profile)
+    if session_id:
+        sessions.set_analysis(session_id, gemini_analysis, version)
+    
+    return {
+        "status": "success",
+        "session_id": session_id,
+        "version": version,
+        "gemini_analysis": gemini_analysis
+    }
+
+
+def _session_response(result: dict):
+    """Map session errors to HTTP status codes (404 unknown session, 409 stale version)."""
+    if result['status'] != 'error' or 'session_id' in result:
+        return result
+    if result.get('conflict'):
+        return JSONResponse(status_code=409, content=result)
+    if result['message'].startswith("Session not found"):
+        return JSONResponse(status_code=404, content=result)
+    return result
+
+
+@app.post("/job-profiles")
+async def create_job_profile(
+    job_description: str = Body(...),
+    use_gemini: bool = Body(True)
+):
+    """
+    Register a job description once and get a job_profile_id that analyze
+    requests can reference.
+    
+    The posting is parsed into required/nice-to-have skills, keywords and a
+    compact prompt fragment (with Gemini, or from its most frequent terms
+    with use_gemini=false). Registering the same text again returns the
+    existing profile.
+    """
+    if not job_description.strip():
+        return {"error": "No job description provided"}
+    
+    existing = store.find_job_profile(job_profile_hash(job_description, use_gemini))
+    if existing:
+        return {"status": "success", "job_profile_id": existing['id'], "created": False, "profile": existing['data']}
+    
+    profile = await run_gemini_call(build_job_profile, job_description, GEMINI_API_KEY, use_gemini)
+    content_hash = job_profile_hash(job_description, profile['source'] == 'gemini')
+    new_id = new_record_id()
+    profile_id = store.save_job_profile(profile, content_hash, record_id=new_id)
+    if profile_id != new_id:
+        # Gemini fell back to rule-based extraction and that profile was already stored
+        existing = store.get_job_profile(profile_id)
+        return {"status": "success", "job_profile_id": profile_id, "created": False, "profile": existing['data']}
+    print(f"💾 Saved job profile: {profile_id} ({profile['source']})")
+    return {"status": "success", "job_profile_id": profile_id, "created": True, "profile": profile}
+
+
+@app.get("/job-profiles")
+async def list_job_profiles(limit: int = 20, offset: int = 0):
+    """Paginated list of registered job profiles, newest first."""
+    limit = max(1, min(limit, 100))
+    return {
+        "items": store.list_job_profiles(limit=limit, offset=offset),
+        "limit": limit,
+        "offset": offset
+    }
+
+
+@app.get("/job-profiles/{job_profile_id}")
+async def get_job_profile(job_profile_id: str):
+    """Get one registered job profile"""
+    record = store.get_job_profile(job_profile_id)
+    if not record:
+        return JSONResponse(status_code=404, content={"error": "Job profile not found"})
+    return record
+
+
+@app.post("/job-match")
+async def job_match(
+    job_description: str = Body(None),
+    structured_cv: dict = Body(None),
+    cv_id: str = Body(None),
+    job_profile_id: str = Body(None)
+):
+    """
+    Score a structured CV against a job description locally, without Gemini.
+    
+    Expected request body:
+    {
+        "job_description": "...",       (or "job_profile_id": "<registered profile id>")
+        "structured_cv": { ... }        (or "cv_id": "<stored CV id>")
+    }
+    
+    Returns the 0-100 score with the top matched and missing job terms.
+    """
+    job_profile, error = _load_job_profile(job_profile_id)
+    if error:
+        return JSONResponse(status_code=404, content={"error": error})
+    if job_profile:
+        job_description = job_profile['job_description']
+    if not job_description:
+        return {"error": "Provide job_description or job_profile_id"}
+    
+    if structured_cv is None:
+        if not cv_id:
+            return {"error": "Provide structured_cv or cv_id"}
+        record = store.get_structured_cv(cv_id)
+        if not record:
+            return JSONResponse(status_code=404, content={"error": "CV not found"})
+        structured_cv = record['data'].get('structured_cv') or {}
+    
+    result = score_job_match(structured_cv, job_description, terms=job_profile['terms'] if job_profile else None)
+    if job_profile:
+        result['profile_skills'] = match_profile_skills(job_profile, structured_cv)
+    if result['status'] != 'success':
+        return {"error": result['message']}
+    return result
+
+
+@app.post("/rank-candidates")
+async def rank_candidates(
+    job_description: str = Body(None),
+    job_profile_id: str = Body(None),
+    top_k: int = Body(20)
+):
+    """
+    Rank every stored CV against a job description, without Gemini.
+    
+    Expected request body:
+    {
+        "job_description": "...",       (or "job_profile_id": "<registered profile id>")
+        "top_k": 20
+    }
+    
+    Returns the top_k candidates (cv_id, candidate name, score, per-section
+    score contributions and matched job terms), best first.
+    """
+    job_profile, error = _load_job_profile(job_profile_id)
+    if error:
+        return JSONResponse(status_code=404, content={"error": error})
+    if job_profile:
+        job_description = job_profile['job_description']
+    if not job_description:
+        return {"error": "Provide job_description or job_profile_id"}
+    
+    result = await asyncio.to_thread(
+        candidate_index.rank, job_description, top_k, job_profile['terms'] if job_profile else None
+    )
+    if result['status'] != 'success':
+        return {"error": result['message']}
+    return result
+
+
 @app.get("/latest-structured-cv")
 async def get_latest_structured_cv():
     """Get the most recently saved structured CV data"""
     try:
-        json_files = [f for f in os.listdir(CV_DATA_DIR) if f.startswith('structured_cv_') and f.endswith('.json')]
+        latest = store.get_latest_structured_cv()
         
-        if not json_files:
+        if not latest:
             return {"error": "No structured CV data files found"}
         
-        latest_basename = sorted(json_files)[-1]
-        latest_path = os.path.join(CV_DATA_DIR, latest_basename)
-        
-        with open(latest_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         return {
-            "filename": latest_basename,
-            "data": data
+            "id": latest["id"],
+            "filename": latest["source_filename"],
+            "data": latest["data"]
         }
     
     except Exception as e:
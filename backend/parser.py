@@ -3,9 +3,10 @@ Resume/CV Parser Module - FIXED VERSION
 Extracts and cleans text from PDF, DOCX, and TXT files.
 """
 
+import math
 import re
 import os
-from typing import Optional
+from typing import Optional, Union
 from io import BytesIO
 
 # Import libraries for different file formats
@@ -30,12 +31,29 @@ except ImportError:
     Image = None
 
 
-def parse_document_with_images(file_path: str) -> dict:
+# Number of leading PDF pages rendered as images by default (the vision
+# analysis only looks at the first few pages)
+DEFAULT_MAX_IMAGE_PAGES = 3
+
+# Page image pipeline for vision analysis
+PAGE_IMAGE_FORMAT = os.getenv("PAGE_IMAGE_FORMAT", "webp").lower()   # webp | jpeg | png
+PAGE_IMAGE_LOSSLESS = os.getenv("PAGE_IMAGE_LOSSLESS", "true").lower() == "true"  # webp only
+PAGE_IMAGE_MAX_PIXELS = int(os.getenv("PAGE_IMAGE_MAX_PIXELS", "1500000"))
+PAGE_IMAGE_MAX_BYTES = int(os.getenv("PAGE_IMAGE_MAX_BYTES", "350000"))
+PAGE_IMAGE_QUALITY = int(os.getenv("PAGE_IMAGE_QUALITY", "80"))
+PAGE_IMAGE_GRAYSCALE = os.getenv("PAGE_IMAGE_GRAYSCALE", "false").lower() == "true"
+PAGE_IMAGE_MAX_ZOOM = 2.0
+PAGE_IMAGE_MIN_QUALITY = 50
+PAGE_IMAGE_MIN_SIDE = 600
+
+
+def parse_document_with_images(file_path: str, max_image_pages: int = DEFAULT_MAX_IMAGE_PAGES) -> dict:
     """
     Parse a resume/CV file and extract clean text content along with page images.
     
     Args:
         file_path (str): Path to the document file (.pdf, .docx, or .txt)
+        max_image_pages (int): Render at most this many leading PDF pages
     
     Returns:
         dict: Dictionary containing 'text' and 'images' keys
@@ -45,22 +63,143 @@ def parse_document_with_images(file_path: str) -> dict:
         'images': []
     }
     
-    # First get the text
-    text = parse_document(file_path)
-    result['text'] = text
-    
-    # If it's a PDF, also get images
     _, file_extension = os.path.splitext(file_path)
     file_extension = file_extension.lower()
     
-    if file_extension == '.pdf':
-        print("🖼️  Extracting PDF pages as images for visual analysis...")
-        images = pdf_to_images(file_path)
-        result['images'] = images
+    # Non-PDF documents have no page images
+    if file_extension != '.pdf':
+        result['text'] = parse_document(file_path)
+        return result
+    
+    if not os.path.exists(file_path):
+        print(f"❌ Error: File not found - {file_path}")
+        return result
+    
+    # PDFs: extract text and render pages from a single open document
+    ingested = ingest_pdf(file_path, max_image_pages)
+    if ingested['text']:
+        result['text'] = clean_text(ingested['text'])
+        print(f"✅ Cleaned text: {len(result['text'])} characters")
+    result['images'] = ingested['images']
+    
+    return result
+
+
+def parse_document_bytes(content: bytes, filename: str, max_image_pages: int = DEFAULT_MAX_IMAGE_PAGES) -> dict:
+    """
+    Parse an in-memory resume/CV (e.g. an upload) without writing it to disk.
+    
+    Args:
+        content (bytes): Raw file content
+        filename (str): Original file name, used to detect the file type
+        max_image_pages (int): Render at most this many leading PDF pages
+    
+    Returns:
+        dict: Dictionary containing 'text' (cleaned text or None) and 'images' keys
+    """
+    result = {
+        'text': None,
+        'images': []
+    }
+    
+    _, file_extension = os.path.splitext(filename or "")
+    file_extension = file_extension.lower()
+    print(f"\n🔍 DEBUG: Parsing in-memory {file_extension or 'unknown'} document ({len(content)} bytes)")
+    
+    try:
+        if file_extension == '.pdf':
+            ingested = ingest_pdf(content, max_image_pages)
+            raw_text = ingested['text']
+            result['images'] = ingested['images']
+        elif file_extension in ['.docx', '.doc']:
+            print("🔄 Attempting DOCX extraction...")
+            raw_text = extract_text_from_docx(BytesIO(content))
+        elif file_extension == '.txt':
+            print("🔄 Attempting TXT extraction...")
+            raw_text = extract_text_from_txt_bytes(content)
+        else:
+            print(f"❌ Error: Unsupported file type - {file_extension}")
+            return result
+        
+        if raw_text is None:
+            print("❌ Error: Failed to extract text from document")
+            return result
+        
+        result['text'] = clean_text(raw_text)
+        print(f"✅ Cleaned text: {len(result['text'])} characters")
+    
+    except Exception as e:
+        print(f"❌ Error parsing document: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    return result
+
+
+def ingest_pdf(source: Union[str, bytes], max_image_pages: int = DEFAULT_MAX_IMAGE_PAGES) -> dict:
+    """
+    Extract raw text from every page and render the leading pages as images,
+    opening the PDF only once. Pages past max_image_pages are never rendered.
+    
+    Args:
+        source (str | bytes): Path to the PDF file or its raw bytes
+        max_image_pages (int): Number of leading pages to render (0 disables rendering)
+    
+    Returns:
+        dict: 'text' (raw text or None), 'images' (encoded page blobs, see
+              render_page_for_model) and 'page_count'
+    """
+    result = {
+        'text': None,
+        'images': [],
+        'page_count': 0
+    }
+    
+    if not fitz:
+        print("   ⚠️  PyMuPDF not available, text only (no page images)")
+        result['text'] = _extract_text_with_pypdf2(source)
+        return result
+    
+    text = ""
+    try:
+        print(f"   Ingesting PDF (text + first {max_image_pages} page images)")
+        
+        with _open_pdf(source) as doc:
+            result['page_count'] = len(doc)
+            print(f"   PDF has {len(doc)} pages")
+            
+            for page_num, page in enumerate(doc):
+                text += page.get_text() + "\n"
+                
+                if page_num < max_image_pages:
+                    blob = render_page_for_model(page)
+                    if blob:
+                        result['images'].append(blob)
+        
+        image_bytes = sum(len(blob['data']) for blob in result['images'])
+        print(f"   ✅ Extracted {len(text)} chars, rendered {len(result['images'])} page images ({image_bytes} bytes)")
+    
+    except Exception as e:
+        print(f"   ⚠️  PyMuPDF ingestion error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+    
+    if text.strip():
+        result['text'] = text
+    else:
+        print("   ⚠️  PyMuPDF extracted empty text, trying PyPDF2...")
+        result['text'] = _extract_text_with_pypdf2(source)
     
     return result
 
 
+def _open_pdf(source: Union[str, bytes]):
+    """Open a PDF with PyMuPDF from a path or from raw bytes."""
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+
 def parse_document(file_path: str) -> Optional[str]:
     """
     Parse a resume/CV file and extract clean text content.
@@ -164,6 +303,20 @@ def extract_text_from_pdf(file_path: str) -> Optional[str]:
         print("   ⚠️  PyMuPDF not available, using PyPDF2...")
     
     # Fallback to PyPDF2
+    return _extract_text_with_pypdf2(file_path)
+
+
+def _extract_text_with_pypdf2(source: Union[str, bytes]) -> Optional[str]:
+    """
+    Extract text from PDF with PyPDF2 (fallback when PyMuPDF fails)
+    
+    Args:
+        source (str | bytes): Path to the PDF file or its raw bytes
+    
+    Returns:
+        str: Raw text extracted from PDF
+        None: If extraction fails
+    """
     if PyPDF2 is None:
         print("   ❌ PyPDF2 not installed. Install with: pip install PyPDF2")
         return None
@@ -172,7 +325,9 @@ def extract_text_from_pdf(file_path: str) -> Optional[str]:
         print("   Using PyPDF2 for extraction...")
         text = ""
         
-        with open(file_path, 'rb') as file:
+        stream = BytesIO(source) if isinstance(source, (bytes, bytearray)) else open(source, 'rb')
+        
+        with stream as file:
             pdf_reader = PyPDF2.PdfReader(file)
             print(f"   PDF has {len(pdf_reader.pages)} pages")
             
@@ -196,12 +351,12 @@ def extract_text_from_pdf(file_path: str) -> Optional[str]:
         return None
 
 
-def extract_text_from_docx(file_path: str) -> Optional[str]:
+def extract_text_from_docx(file_path) -> Optional[str]:
     """
     Extract text from DOCX file with better error handling
     
     Args:
-        file_path (str): Path to the DOCX file
+        file_path (str | file-like): Path to the DOCX file or a binary stream (e.g. BytesIO)
     
     Returns:
         str: Raw text extracted from DOCX
@@ -279,13 +434,40 @@ def extract_text_from_txt(file_path: str) -> Optional[str]:
         return None
 
 
-def pdf_to_images(file_path: str, output_dir: str = None) -> list:
+def extract_text_from_txt_bytes(content: bytes) -> Optional[str]:
+    """
+    Decode the raw bytes of a TXT file.
+    
+    Args:
+        content (bytes): Raw file content
+    
+    Returns:
+        str: Decoded text (UTF-8, falling back to latin-1)
+        None: If decoding fails
+    """
+    try:
+        text = content.decode('utf-8')
+        print(f"   ✅ Read TXT content with UTF-8 encoding")
+        return text
+    
+    except UnicodeDecodeError:
+        text = content.decode('latin-1')
+        print(f"   ✅ Read TXT content with latin-1 encoding")
+        return text
+    
+    except Exception as e:
+        print(f"   ❌ Error reading TXT content: {str(e)}")
+        return None
+
+
+def pdf_to_images(file_path: str, output_dir: str = None, max_pages: int = None) -> list:
     """
     Convert PDF pages to images for vision-based analysis.
     
     Args:
         file_path (str): Path to the PDF file
         output_dir (str): Directory to save images (optional)
+        max_pages (int): Only convert the first max_pages pages (optional)
     
     Returns:
         list: List of PIL Image objects or image paths
@@ -299,14 +481,9 @@ def pdf_to_images(file_path: str, output_dir: str = None) -> list:
         images = []
         
         with fitz.open(file_path) as doc:
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                # Render page to pixmap (image)
-                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better quality
-                
-                # Convert to PIL Image
-                img_data = pix.tobytes("png")
-                img = Image.open(BytesIO(img_data)) if Image else None
+            page_count = len(doc) if max_pages is None else min(len(doc), max_pages)
+            for page_num in range(page_count):
+                img = _render_page_image(doc[page_num])
                 
                 if img:
                     if output_dir:
@@ -328,6 +505,111 @@ def pdf_to_images(file_path: str, output_dir: str = None) -> list:
         return []
 
 
+def _render_page_image(page, max_pixels: int = None, grayscale: bool = False):
+    """
+    Render a single PDF page to a PIL Image.
+    
+    The pixmap samples are wrapped directly (no PNG encode/decode round trip).
+    The zoom is chosen so the image stays within max_pixels, capped at
+    PAGE_IMAGE_MAX_ZOOM.
+    
+    Args:
+        page: PyMuPDF page object
+        max_pixels (int): Pixel budget for the rendered page (default: PAGE_IMAGE_MAX_PIXELS)
+        grayscale (bool): Render a single-channel image
+    
+    Returns:
+        PIL.Image.Image or None if Pillow is not installed
+    """
+    if not Image:
+        return None
+    
+    max_pixels = max_pixels or PAGE_IMAGE_MAX_PIXELS
+    
+    # Page size is in points (72 dpi); pick the zoom that fits the pixel budget
+    width, height = max(page.rect.width, 1), max(page.rect.height, 1)
+    zoom = min(PAGE_IMAGE_MAX_ZOOM, math.sqrt(max_pixels / (width * height)))
+    # Pixmap dimensions are rounded up, so shave the zoom until they fit
+    while zoom > 0.1 and math.ceil(width * zoom) * math.ceil(height * zoom) > max_pixels:
+        zoom *= 0.995
+    
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+    
+    mode = "L" if grayscale else "RGB"
+    return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+
+
+def encode_page_image(img, image_format: str = None, quality: int = None, max_bytes: int = None,
+                      lossless: bool = None) -> dict:
+    """
+    Encode a page image for upload to the model, staying within a byte budget.
+    
+    Lossless WebP is usually the smallest encoding for rendered text. If a
+    page exceeds the budget, WebP falls back to lossy, lossy formats lower
+    their quality, and finally the page is downscaled until it fits (or a
+    minimum size is reached).
+    
+    Args:
+        img: PIL Image
+        image_format (str): "webp", "jpeg" or "png" (default: PAGE_IMAGE_FORMAT)
+        quality (int): Starting quality for lossy encoding (default: PAGE_IMAGE_QUALITY)
+        max_bytes (int): Byte budget per page (default: PAGE_IMAGE_MAX_BYTES, 0 = unlimited)
+        lossless (bool): Start with lossless WebP (default: PAGE_IMAGE_LOSSLESS)
+    
+    Returns:
+        dict: {'mime_type', 'data'} blob accepted by Gemini as a content part
+    """
+    image_format = (image_format or PAGE_IMAGE_FORMAT).lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+    quality = quality or PAGE_IMAGE_QUALITY
+    max_bytes = PAGE_IMAGE_MAX_BYTES if max_bytes is None else max_bytes
+    lossless = (PAGE_IMAGE_LOSSLESS if lossless is None else lossless) and image_format == 'webp'
+    lossy = image_format in ('jpeg', 'webp') and not lossless
+    
+    while True:
+        buffer = BytesIO()
+        if lossless:
+            img.save(buffer, format='WEBP', lossless=True)
+        elif lossy:
+            img.save(buffer, format=image_format.upper(), quality=quality)
+        else:
+            img.save(buffer, format=image_format.upper(), optimize=True)
+        data = buffer.getvalue()
+        
+        if not max_bytes or len(data) <= max_bytes:
+            break
+        if lossless:
+            lossless, lossy = False, True
+            continue
+        if lossy and quality > PAGE_IMAGE_MIN_QUALITY:
+            quality = max(PAGE_IMAGE_MIN_QUALITY, quality - 15)
+            continue
+        if min(img.size) <= PAGE_IMAGE_MIN_SIDE:
+            break
+        img = img.resize((int(img.width * 0.8), int(img.height * 0.8)), Image.LANCZOS)
+    
+    return {"mime_type": f"image/{image_format}", "data": data}
+
+
+def render_page_for_model(page, image_format: str = None, max_pixels: int = None,
+                          max_bytes: int = None, quality: int = None, grayscale: bool = None):
+    """
+    Render and encode one PDF page for vision analysis using the configured
+    page-image budget (PAGE_IMAGE_* settings unless overridden). The blob is
+    sent to Gemini as is, so the page is encoded exactly once.
+    
+    Returns:
+        dict: {'mime_type', 'data'} blob, or None if Pillow is not installed
+    """
+    grayscale = PAGE_IMAGE_GRAYSCALE if grayscale is None else grayscale
+    img = _render_page_image(page, max_pixels=max_pixels, grayscale=grayscale)
+    if img is None:
+        return None
+    return encode_page_image(img, image_format=image_format, quality=quality, max_bytes=max_bytes)
+
+
 def clean_text(text: str) -> str:
     """
     Clean extracted text - gentler approach that preserves more content
@@ -0,0 +1,159 @@
+"""
+Prompt Builder Module
+Compact serialization of structured CV data for prompts, kept within a
+token budget
+"""
+
+import json
+import os
+from cv_segmenter import NOT_PROVIDED
+
+
+# Approximate token budget for the CV data embedded in an analysis prompt
+PROMPT_CV_TOKEN_BUDGET = int(os.getenv("PROMPT_CV_TOKEN_BUDGET", "6000"))
+
+# Strings are only halved while the result keeps at least this many characters
+_MIN_STRING_CHARS = 80
+_ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count for Gemini (about four characters per token).
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        int: Estimated token count
+    """
+    return (len(text) + 3) // 4
+
+
+def compact_cv(structured_cv: dict) -> dict:
+    """
+    Copy of the structured CV without empty or "Not provided" fields.
+
+    Dictionary keys are dropped; list items are always kept (emptied items
+    become {} or "") so that list indexes, and therefore fieldPaths, stay
+    the same as in the full CV.
+
+    Args:
+        structured_cv: Structured CV data
+
+    Returns:
+        dict: Compacted copy
+    """
+    compacted = _compact(structured_cv)
+    return compacted if isinstance(compacted, dict) else {}
+
+
+def build_cv_prompt_data(structured_cv: dict, token_budget: int = None) -> str:
+    """
+    Serialize structured CV data for a prompt.
+
+    The CV is compacted (see compact_cv) and written as JSON without
+    indentation. If it is still over the token budget, the largest section
+    is shortened repeatedly: trailing list entries are dropped first (the
+    remaining entries keep their indexes), then its longest string is cut.
+    A note is appended when anything was left out.
+
+    Args:
+        structured_cv: Structured CV data (or a subset of its sections)
+        token_budget: Token budget for the data; PROMPT_CV_TOKEN_BUDGET if None
+
+    Returns:
+        str: Prompt text for the CV data
+    """
+    budget = PROMPT_CV_TOKEN_BUDGET if token_budget is None else token_budget
+    cv = compact_cv(structured_cv)
+    text = _dumps(cv)
+    truncated = []
+
+    while estimate_tokens(text) > budget and cv:
+        section = max(cv, key=lambda key: len(_dumps(cv[key])))
+        value = cv[section]
+        if isinstance(value, list) and len(value) > 1:
+            value.pop()
+        else:
+            shortened = _shorten_longest_string(value)
+            if shortened is None:
+                break
+            cv[section] = shortened
+        if section not in truncated:
+            truncated.append(section)
+        text = _dumps(cv)
+
+    if truncated:
+        print(f"✂️  CV data shortened to fit {budget} prompt tokens: {', '.join(truncated)}")
+        text += (
+            f"\n(Shortened to fit the prompt: {', '.join(truncated)}. "
+            "Later entries and text ending in … were left out; do not suggest changes to what is missing.)"
+        )
+    return text
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    if isinstance(value, str):
+        return not value.strip() or value.strip() == NOT_PROVIDED
+    if isinstance(value, (list, dict)):
+        return not value
+    return False
+
+
+def _compact(value):
+    if isinstance(value, dict):
+        compacted = {}
+        for key, item in value.items():
+            item = _compact(item)
+            if not _is_empty(item):
+                compacted[key] = item
+        return compacted
+    if isinstance(value, list):
+        items = [_compact(item) for item in value]
+        if all(_is_empty(item) for item in items):
+            return []
+        return [_empty_like(item) if _is_empty(item) else item for item in items]
+    return value
+
+
+def _empty_like(value):
+    return {} if isinstance(value, dict) else ""
+
+
+def _shorten_longest_string(value):
+    """
+    Return value with its longest string cut to half its length, or None if
+    no string is long enough to shorten.
+    """
+    path, longest = None, ""
+    stack = [((), value)]
+    while stack:
+        current_path, current = stack.pop()
+        if isinstance(current, str):
+            if len(current) > len(longest):
+                path, longest = current_path, current
+        elif isinstance(current, dict):
+            stack.extend((current_path + (key,), item) for key, item in current.items())
+        elif isinstance(current, list):
+            stack.extend((current_path + (index,), item) for index, item in enumerate(current))
+
+    keep = len(longest) // 2
+    if path is None or keep < _MIN_STRING_CHARS:
+        return None
+
+    shortened = longest[:keep].rstrip() + _ELLIPSIS
+    if not path:
+        return shortened
+
+    parent = value
+    for part in path[:-1]:
+        parent = parent[part]
+    parent[path[-1]] = shortened
+    return value
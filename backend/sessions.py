@@ -0,0 +1,373 @@
+"""
+CV Sessions Module
+Server-side editing sessions: versioned snapshots of a structured CV together
+with the suggestions produced for it, so that clients apply suggestions by ID
+and receive JSON Patch diffs instead of re-sending the whole document
+"""
+
+import copy
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+from cv_structure_parser import apply_suggestions_to_structured_cv
+
+
+# Sessions kept in memory (least recently used are dropped first)
+CV_SESSION_MAX = max(1, int(os.getenv("CV_SESSION_MAX", "1000")))
+# Seconds a session stays available after its last use
+CV_SESSION_TTL = float(os.getenv("CV_SESSION_TTL", "86400"))
+# Versions kept per session (older ones can no longer be restored with undo)
+CV_SESSION_MAX_VERSIONS = max(2, int(os.getenv("CV_SESSION_MAX_VERSIONS", "100")))
+
+
+class SessionStore:
+    """
+    Thread-safe, in-memory store of CV editing sessions.
+
+    Every applied batch of suggestions creates a new version of the CV.
+    Versions share structure: only the containers along the changed field
+    paths are copied (see apply_suggestions_to_structured_cv), so a version
+    costs memory proportional to the edit, not to the CV. Snapshots are
+    never modified in place. Undo and redo move between versions and return
+    the JSON Patch that turns the client's copy into the new current version.
+
+    Sessions live in the worker process that created them, like the result
+    caches; they expire after CV_SESSION_TTL seconds without use.
+    """
+
+    def __init__(self, max_sessions: int = CV_SESSION_MAX, ttl_seconds: float = CV_SESSION_TTL,
+                 max_versions: int = CV_SESSION_MAX_VERSIONS):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_seconds = ttl_seconds
+        self.max_versions = max(2, max_versions)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def create(self, structured_cv: dict, suggestions: list = None, cv_id: str = None,
+               analysis_id: str = None, analysis: dict = None) -> str:
+        """
+        Start a session on a structured CV.
+
+        Args:
+            structured_cv: The structured CV data (version 0)
+            suggestions: Field suggestions that can be applied by suggestionId
+            cv_id: Stored structured CV record, if any
+            analysis_id: Stored analysis record the suggestions come from, if any
+            analysis: The analysis result of version 0 (base of incremental re-analysis)
+
+        Returns:
+            str: Session ID
+        """
+        now = time.time()
+        structured_cv = copy.deepcopy(structured_cv)
+        session = {
+            "session_id": uuid.uuid4().hex,
+            "cv_id": cv_id,
+            "analysis_id": analysis_id,
+            "created_at": now,
+            "updated_at": now,
+            "suggestions": {},
+            # Snapshots are shared with later versions and must never be modified
+            # applied_ids: every suggestion applied up to that version (survives trimming of older versions)
+            "versions": [{"version": 0, "structured_cv": structured_cv, "patch": [],
+                          "inverse_patch": [], "suggestion_ids": [], "applied_ids": []}],
+            "current": 0,
+            # Last analysis and the snapshot it was made on (kept even when that version is trimmed)
+            "analysis": analysis,
+            "analyzed_version": 0,
+            "analyzed_cv": structured_cv
+        }
+        self._add_suggestions(session, suggestions)
+
+        with self._lock:
+            self._sessions[session["session_id"]] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session["session_id"]
+
+    def get_analysis(self, session_id: str) -> Optional[dict]:
+        """
+        Last analysis of a session and the CV version it was made on.
+
+        Returns:
+            dict: {'analysis', 'analyzed_version', 'structured_cv', 'cv_id'}, or None
+                  if the session does not exist
+        """
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                return None
+            return {
+                "analysis": session["analysis"],
+                "analyzed_version": session["analyzed_version"],
+                "structured_cv": session["analyzed_cv"],
+                "cv_id": session["cv_id"]
+            }
+
+    def set_analysis(self, session_id: str, analysis: dict, version: int) -> bool:
+        """Record a new analysis of a session version and register its suggestions."""
+        with self._lock:
+            session = self._get(session_id)
+            entry = self._version(session, version) if session else None
+            if entry is None:
+                return False
+            session["analysis"] = analysis
+            session["analyzed_version"] = version
+            session["analyzed_cv"] = entry["structured_cv"]
+            self._add_suggestions(session, analysis.get("analysis", {}).get("field_suggestions"))
+            return True
+
+    def get(self, session_id: str, version: int = None) -> Optional[dict]:
+        """
+        Describe a session and return one of its CV versions.
+
+        Args:
+            session_id: Session ID
+            version: Version to return (default: the current one)
+
+        Returns:
+            dict: {'session_id', 'cv_id', 'analysis_id', 'version', 'current_version',
+                   'latest_version', 'analyzed_version', 'versions', 'applied_suggestion_ids',
+                   'available_suggestion_ids', 'structured_cv'}, or None if the
+                   session (or version) does not exist
+        """
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                return None
+            entry = self._version(session, version)
+            if entry is None:
+                return None
+            applied = session["versions"][session["current"]]["applied_ids"]
+            return {
+                **self._describe(session),
+                "version": entry["version"],
+                "versions": [
+                    {"version": item["version"], "suggestion_ids": item["suggestion_ids"]}
+                    for item in session["versions"]
+                ],
+                "applied_suggestion_ids": applied,
+                "available_suggestion_ids": [
+                    suggestion_id for suggestion_id in session["suggestions"] if suggestion_id not in applied
+                ],
+                "structured_cv": entry["structured_cv"]
+            }
+
+    def get_structured_cv(self, session_id: str, version: int = None) -> Optional[dict]:
+        """Structured CV of a session version (default: current); do not modify it."""
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                return None
+            entry = self._version(session, version)
+            return entry["structured_cv"] if entry else None
+
+    def get_suggestions(self, session_id: str) -> Optional[dict]:
+        """Registered suggestions of a session, by suggestionId."""
+        with self._lock:
+            session = self._get(session_id)
+            return dict(session["suggestions"]) if session else None
+
+    def apply(self, session_id: str, suggestion_ids: list, base_version: int = None,
+              atomic: bool = True) -> dict:
+        """
+        Apply registered suggestions to the current version, creating a new one.
+
+        Versions after the current one (undone edits) are discarded.
+
+        Args:
+            session_id: Session ID
+            suggestion_ids: suggestionId values registered on the session
+            base_version: Version the client is editing; the call fails if it
+                          is not the current version
+            atomic: Apply all suggestions or none
+
+        Returns:
+            dict: {'status': 'success' | 'partial', 'session_id', 'version',
+                   'base_version', 'patch', 'results'} or {'status': 'error',
+                   'message'} ('conflict': True when base_version is stale)
+        """
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                return {"status": "error", "message": "Session not found or expired"}
+            current = session["current"]
+            current_version = session["versions"][current]["version"]
+            if base_version is not None and base_version != current_version:
+                return {
+                    "status": "error",
+                    "conflict": True,
+                    "message": f"Version {base_version} is not the current version ({current_version})",
+                    "version": current_version
+                }
+
+            applied = set(session["versions"][current]["applied_ids"])
+            suggestions = []
+            unknown = []
+            for suggestion_id in suggestion_ids:
+                suggestion = session["suggestions"].get(suggestion_id)
+                if suggestion is None:
+                    unknown.append({"suggestionId": suggestion_id, "status": "failed",
+                                    "message": "Unknown suggestionId for this session"})
+                elif suggestion_id in applied:
+                    unknown.append({"suggestionId": suggestion_id, "status": "skipped",
+                                    "message": "Suggestion already applied"})
+                else:
+                    suggestions.append(suggestion)
+
+            base_cv = session["versions"][current]["structured_cv"]
+            outcome = apply_suggestions_to_structured_cv(base_cv, suggestions, atomic=atomic)
+            if atomic and any(result["status"] == "failed" for result in unknown):
+                for result in outcome["results"]:
+                    if result["status"] == "applied":
+                        result.update(status="rolled_back", message="Not applied because another suggestion failed")
+                outcome["patch"] = []
+            results = outcome["results"] + unknown
+            failed = sum(1 for result in results if result["status"] == "failed")
+
+            if not outcome["patch"]:
+                return {
+                    "status": "error" if failed else "success",
+                    "session_id": session_id,
+                    "version": current_version,
+                    "base_version": current_version,
+                    "patch": [],
+                    "results": results,
+                    **({"message": "No suggestion could be applied"} if failed else {})
+                }
+
+            # Version numbers are never reused, even after undone versions are discarded
+            new_version = session["versions"][-1]["version"] + 1
+            applied_now = [result["suggestionId"] for result in outcome["results"] if result["status"] == "applied"]
+            del session["versions"][current + 1:]
+            session["versions"].append({
+                "version": new_version,
+                "structured_cv": outcome["updated_cv"],
+                "patch": outcome["patch"],
+                "inverse_patch": _inverse_patch(base_cv, outcome["patch"]),
+                "suggestion_ids": applied_now,
+                "applied_ids": session["versions"][current]["applied_ids"] + applied_now
+            })
+            if len(session["versions"]) > self.max_versions:
+                del session["versions"][:len(session["versions"]) - self.max_versions]
+            session["current"] = len(session["versions"]) - 1
+            session["updated_at"] = time.time()
+
+            return {
+                "status": "partial" if failed else "success",
+                "session_id": session_id,
+                "version": new_version,
+                "base_version": current_version,
+                "patch": outcome["patch"],
+                "results": results
+            }
+
+    def undo(self, session_id: str) -> dict:
+        """Go back one version; returns the patch that reverts the client's copy."""
+        return self._move(session_id, -1)
+
+    def redo(self, session_id: str) -> dict:
+        """Re-apply the next (undone) version; returns its patch."""
+        return self._move(session_id, 1)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_versions": self.max_versions
+            }
+
+    def _move(self, session_id: str, step: int) -> dict:
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                return {"status": "error", "message": "Session not found or expired"}
+            current = session["current"]
+            target = current + step
+            if not 0 <= target < len(session["versions"]):
+                return {"status": "error", "message": "Nothing to undo" if step < 0 else "Nothing to redo"}
+
+            if step < 0:
+                patch = session["versions"][current]["inverse_patch"]
+            else:
+                patch = session["versions"][target]["patch"]
+            session["current"] = target
+            session["updated_at"] = time.time()
+            return {
+                "status": "success",
+                "session_id": session_id,
+                "version": session["versions"][target]["version"],
+                "base_version": session["versions"][current]["version"],
+                "patch": patch,
+                "can_undo": target > 0,
+                "can_redo": target < len(session["versions"]) - 1
+            }
+
+    def _get(self, session_id: str) -> Optional[dict]:
+        # Caller must hold the lock
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if time.time() - session["updated_at"] > self.ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        session["updated_at"] = time.time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    @staticmethod
+    def _version(session: dict, version: int = None) -> Optional[dict]:
+        if version is None:
+            return session["versions"][session["current"]]
+        return next((entry for entry in session["versions"] if entry["version"] == version), None)
+
+    @staticmethod
+    def _describe(session: dict) -> dict:
+        return {
+            "session_id": session["session_id"],
+            "cv_id": session["cv_id"],
+            "analysis_id": session["analysis_id"],
+            "current_version": session["versions"][session["current"]]["version"],
+            "latest_version": session["versions"][-1]["version"],
+            "analyzed_version": session["analyzed_version"]
+        }
+
+    @staticmethod
+    def _add_suggestions(session: dict, suggestions: list):
+        for suggestion in suggestions or []:
+            if isinstance(suggestion, dict) and suggestion.get("suggestionId") is not None:
+                session["suggestions"][suggestion["suggestionId"]] = suggestion
+
+
+def _inverse_patch(base_cv: dict, patch: list) -> list:
+    """JSON Patch that turns the result of `patch` back into base_cv."""
+    inverse = []
+    for operation in reversed(patch):
+        if operation["op"] == "add":
+            inverse.append({"op": "remove", "path": operation["path"]})
+        else:
+            inverse.append({"op": "replace", "path": operation["path"],
+                            "value": _resolve_pointer(base_cv, operation["path"])})
+    return inverse
+
+
+def _resolve_pointer(document, pointer: str):
+    """Value at an RFC 6901 JSON pointer."""
+    value = document
+    for part in pointer.split("/")[1:]:
+        part = part.replace("~1", "/").replace("~0", "~")
+        value = value[int(part)] if isinstance(value, list) else value[part]
+    return value
@@ -0,0 +1,381 @@
+"""
+Storage Module
+Indexed SQLite store for structured CVs, analyses and job-description profiles
+(replaces timestamped JSON files)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, 'data')
+DB_PATH = os.getenv("CV_STORE_PATH", os.path.join(DATA_DIR, 'cv_store.sqlite3'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS structured_cvs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL,
+    candidate_name TEXT,
+    source_filename TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_structured_cvs_created ON structured_cvs (created_at, seq);
+
+CREATE TABLE IF NOT EXISTS analyses (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    cv_id TEXT,
+    created_at TEXT NOT NULL,
+    overall_score INTEGER,
+    ats_score INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at, seq);
+CREATE INDEX IF NOT EXISTS idx_analyses_score ON analyses (overall_score, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_cv ON analyses (cv_id);
+
+CREATE TABLE IF NOT EXISTS job_profiles (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    created_at TEXT NOT NULL,
+    title TEXT,
+    content_hash TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_profiles_created ON job_profiles (created_at, seq);
+
+CREATE TABLE IF NOT EXISTS imported_files (
+    filename TEXT PRIMARY KEY,
+    imported_at TEXT NOT NULL
+);
+"""
+
+
+def new_record_id() -> str:
+    """Generate a unique record ID."""
+    return uuid.uuid4().hex
+
+
+class CVStore:
+    """
+    SQLite store with indexed lookups for structured CVs, analyses and job profiles.
+
+    One connection is shared across threads and serialized with a lock;
+    WAL mode keeps readers from blocking on writers.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        if db_path != ':memory:':
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def save_structured_cv(self, record: dict, record_id: str = None) -> str:
+        """
+        Store a structured CV record.
+
+        Args:
+            record: Dict with 'timestamp', 'structured_cv', 'original_text',
+                    'job_description' and 'file_info' keys
+            record_id: Optional explicit ID (a new one is generated otherwise)
+
+        Returns:
+            str: The record ID
+        """
+        record_id = record_id or new_record_id()
+        structured_cv = record.get('structured_cv') or {}
+        contact = structured_cv.get('contact') if isinstance(structured_cv, dict) else None
+        file_info = record.get('file_info') or {}
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO structured_cvs (id, created_at, candidate_name, source_filename, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    record_id,
+                    record.get('timestamp') or datetime.now().isoformat(),
+                    contact.get('name') if isinstance(contact, dict) else None,
+                    file_info.get('filename'),
+                    json.dumps(record, ensure_ascii=False)
+                )
+            )
+            self._conn.commit()
+        return record_id
+
+    def save_analysis(self, analysis: dict, cv_id: str = None, created_at: str = None,
+                      record_id: str = None) -> str:
+        """
+        Store an analysis result (as returned by analyze_structured_cv_with_gemini).
+
+        Returns:
+            str: The record ID
+        """
+        record_id = record_id or new_record_id()
+        scores = analysis.get('analysis') or {}
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO analyses (id, cv_id, created_at, overall_score, ats_score, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    record_id,
+                    cv_id,
+                    created_at or datetime.now().isoformat(),
+                    _as_int(scores.get('overall_score')),
+                    _as_int(scores.get('ats_score')),
+                    json.dumps(analysis, ensure_ascii=False)
+                )
+            )
+            self._conn.commit()
+        return record_id
+
+    def save_job_profile(self, profile: dict, content_hash: str, record_id: str = None) -> str:
+        """
+        Store a job-description profile (see job_profiles.build_job_profile).
+
+        Args:
+            profile: The profile
+            content_hash: Hash of the normalized job description it was built from;
+                          a profile with the same hash is returned instead of a duplicate
+            record_id: Optional explicit ID (a new one is generated otherwise)
+
+        Returns:
+            str: The record ID (of the existing profile if the hash was already stored)
+        """
+        record_id = record_id or new_record_id()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO job_profiles (id, created_at, title, content_hash, data) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    record_id,
+                    datetime.now().isoformat(),
+                    profile.get('title'),
+                    content_hash,
+                    json.dumps(profile, ensure_ascii=False)
+                )
+            )
+            self._conn.commit()
+            row = self._conn.execute("SELECT id FROM job_profiles WHERE content_hash = ?", (content_hash,)).fetchone()
+        return row[0]
+
+    def get_job_profile(self, record_id: str) -> Optional[dict]:
+        return self._fetch_one("SELECT * FROM job_profiles WHERE id = ?", (record_id,))
+
+    def find_job_profile(self, content_hash: str) -> Optional[dict]:
+        """Profile built from the same normalized job description, if any."""
+        return self._fetch_one("SELECT * FROM job_profiles WHERE content_hash = ?", (content_hash,))
+
+    def list_job_profiles(self, limit: int = 20, offset: int = 0) -> list:
+        """Page through job profiles, newest first, without the profile payload."""
+        return self._fetch_all(
+            "SELECT id, created_at, title FROM job_profiles ORDER BY created_at DESC, seq DESC LIMIT ? OFFSET ?",
+            (limit, offset)
+        )
+
+    def get_structured_cv(self, record_id: str) -> Optional[dict]:
+        return self._fetch_one("SELECT * FROM structured_cvs WHERE id = ?", (record_id,))
+
+    def get_analysis(self, record_id: str) -> Optional[dict]:
+        return self._fetch_one("SELECT * FROM analyses WHERE id = ?", (record_id,))
+
+    def get_latest_structured_cv(self) -> Optional[dict]:
+        """Most recent structured CV (index scan, no directory listing)."""
+        return self._fetch_one("SELECT * FROM structured_cvs ORDER BY created_at DESC, seq DESC LIMIT 1")
+
+    def get_latest_analysis(self) -> Optional[dict]:
+        """Most recent analysis."""
+        return self._fetch_one("SELECT * FROM analyses ORDER BY created_at DESC, seq DESC LIMIT 1")
+
+    def list_structured_cvs(self, limit: int = 20, offset: int = 0, since: str = None,
+                            until: str = None) -> list:
+        """
+        Page through structured CVs, newest first. Rows are returned without
+        the full CV payload.
+        """
+        clauses, params = _date_filters(since, until)
+        query = (
+            "SELECT id, created_at, candidate_name, source_filename FROM structured_cvs"
+            f"{_where(clauses)} ORDER BY created_at DESC, seq DESC LIMIT ? OFFSET ?"
+        )
+        return self._fetch_all(query, params + [limit, offset])
+
+    def list_analyses(self, limit: int = 20, offset: int = 0, since: str = None, until: str = None,
+                      min_score: int = None, max_score: int = None, sort: str = "date") -> list:
+        """
+        Page through analyses filtered by date and overall score.
+
+        Args:
+            sort: "date" (newest first) or "score" (highest overall score first)
+        """
+        clauses, params = _date_filters(since, until)
+        if min_score is not None:
+            clauses.append("overall_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            clauses.append("overall_score <= ?")
+            params.append(max_score)
+
+        order = "overall_score DESC, created_at DESC" if sort == "score" else "created_at DESC, seq DESC"
+        query = (
+            "SELECT id, cv_id, created_at, overall_score, ats_score FROM analyses"
+            f"{_where(clauses)} ORDER BY {order} LIMIT ? OFFSET ?"
+        )
+        return self._fetch_all(query, params + [limit, offset])
+
+    def iter_structured_cvs(self, batch_size: int = 500):
+        """
+        Yield every structured CV record, oldest first, reading batch_size
+        rows at a time.
+        """
+        last_seq = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT * FROM structured_cvs WHERE seq > ? ORDER BY seq LIMIT ?", (last_seq, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_seq = rows[-1]["seq"]
+            for row in rows:
+                yield _row_to_dict(row)
+
+    def import_json_files(self, cv_dir: str, analysis_dir: str) -> dict:
+        """
+        Load timestamped JSON files written by earlier versions.
+
+        Each file is imported once; re-running the import skips files that
+        were already loaded.
+
+        Returns:
+            dict: Number of imported CVs, analyses and skipped/failed files
+        """
+        counts = {"structured_cvs": 0, "analyses": 0, "skipped": 0, "failed": 0}
+
+        with self._lock:
+            already_imported = {row[0] for row in self._conn.execute("SELECT filename FROM imported_files")}
+
+        for directory, prefixes, kind in (
+            (cv_dir, ('structured_cv_', 'cv_data_'), 'structured_cvs'),
+            (analysis_dir, ('structured_analysis_', 'analysis_'), 'analyses'),
+        ):
+            if not os.path.isdir(directory):
+                continue
+
+            for basename in sorted(os.listdir(directory)):
+                if not basename.startswith(prefixes) or not basename.endswith('.json'):
+                    continue
+
+                key = f"{kind}/{basename}"
+                if key in already_imported:
+                    counts["skipped"] += 1
+                    continue
+
+                path = os.path.join(directory, basename)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+
+                    created_at = _timestamp_from_filename(basename) or datetime.fromtimestamp(
+                        os.path.getmtime(path)).isoformat()
+
+                    if kind == 'structured_cvs':
+                        data.setdefault('timestamp', created_at)
+                        self.save_structured_cv(data)
+                    else:
+                        self.save_analysis(data, created_at=created_at)
+
+                    with self._lock:
+                        self._conn.execute(
+                            "INSERT INTO imported_files (filename, imported_at) VALUES (?, ?)",
+                            (key, datetime.now().isoformat())
+                        )
+                        self._conn.commit()
+                    counts[kind] += 1
+
+                except Exception as e:
+                    print(f"⚠️  Could not import {path}: {str(e)}")
+                    counts["failed"] += 1
+
+        return counts
+
+    def _fetch_one(self, query: str, params=()) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def _fetch_all(self, query: str, params=()) -> list:
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict:
+    record = dict(row)
+    record.pop('seq', None)
+    if 'data' in record:
+        record['data'] = json.loads(record['data'])
+    return record
+
+
+def _date_filters(since: str, until: str):
+    clauses, params = [], []
+    if since:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until:
+        try:
+            # A date-only bound includes the whole day: compare against the next midnight
+            next_day = datetime.strptime(until, "%Y-%m-%d") + timedelta(days=1)
+            clauses.append("created_at < ?")
+            params.append(next_day.date().isoformat())
+        except ValueError:
+            clauses.append("created_at <= ?")
+            params.append(until)
+    return clauses, params
+
+
+def _where(clauses: list) -> str:
+    return " WHERE " + " AND ".join(clauses) if clauses else ""
+
+
+def _timestamp_from_filename(basename: str) -> Optional[str]:
+    """Recover the ISO timestamp from names like structured_cv_20250101_120000.json."""
+    stem = os.path.splitext(basename)[0]
+    try:
+        return datetime.strptime(stem[-15:], '%Y%m%d_%H%M%S').isoformat()
+    except ValueError:
+        return None
+
+
+def _as_int(value) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    # One-time import of legacy JSON files: python storage.py
+    store = CVStore()
+    result = store.import_json_files(os.path.join(DATA_DIR, 'cv_data'), os.path.join(DATA_DIR, 'analysis'))
+    print(f"✅ Import finished: {result}")
@@ -0,0 +1,44 @@
+"""
+Tests for the content-addressed blob store
+"""
+
+import pytest
+
+from blob_store import BlobStore, is_valid_blob_id, parse_range_header
+
+
+def test_put_deduplicates_by_content(tmp_path):
+    """Test that identical uploads share one blob"""
+    store = BlobStore(str(tmp_path))
+
+    first = store.put(b"%PDF-1.4 content", "cv.pdf", "application/pdf")
+    second = store.put(b"%PDF-1.4 content", "copy.pdf", "application/pdf")
+
+    assert first["id"] == second["id"]
+    assert second["filename"] == "copy.pdf"
+    assert is_valid_blob_id(first["id"])
+    assert store.get_metadata(first["id"])["filename"] == "cv.pdf"
+    assert store.read(first["id"], 1, 3) == b"PDF"
+    assert sorted(p.name for p in tmp_path.rglob("*")) == sorted([first["id"][:2], first["id"], first["id"] + ".meta.json"])
+
+
+def test_get_metadata_rejects_unknown_and_malformed_ids(tmp_path):
+    """Test that path-like or unknown IDs are not resolved"""
+    store = BlobStore(str(tmp_path))
+
+    assert store.get_metadata("../../etc/passwd") is None
+    assert store.get_metadata("0" * 64) is None
+
+
+def test_parse_range_header():
+    """Test single byte-range parsing"""
+    assert parse_range_header("bytes=0-99", 1000) == (0, 99)
+    assert parse_range_header("bytes=900-", 1000) == (900, 999)
+    assert parse_range_header("bytes=-100", 1000) == (900, 999)
+    assert parse_range_header("bytes=990-2000", 1000) == (990, 999)
+    assert parse_range_header("bytes=0-1,5-9", 1000) is None
+    assert parse_range_header("items=0-1", 1000) is None
+    assert parse_range_header("bytes=500-100", 1000) is None  # Invalid range: ignored, not 416
+
+    with pytest.raises(ValueError):
+        parse_range_header("bytes=1000-", 1000)
@@ -0,0 +1,73 @@
+"""
+Tests for the content-addressed result cache
+"""
+
+import time
+
+from cache import ResultCache, make_cache_key
+
+
+def test_make_cache_key_is_stable():
+    """Test that equal inputs give equal keys and different inputs differ"""
+    assert make_cache_key("model", "1", {"b": 1, "a": 2}) == make_cache_key("model", "1", {"a": 2, "b": 1})
+    assert make_cache_key("model", "1", "cv text") != make_cache_key("model", "2", "cv text")
+
+
+def test_cache_hit_returns_copy():
+    """Test that cached values can't be mutated by callers"""
+    cache = ResultCache("test")
+    cache.set("k", {"skills": ["python"]})
+
+    value = cache.get("k")
+    value["skills"].append("java")
+
+    assert cache.get("k") == {"skills": ["python"]}
+    assert cache.stats()["hits"] == 2
+
+
+def test_cache_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = ResultCache("test", max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_ttl_expiry():
+    """Test that expired entries are treated as misses"""
+    cache = ResultCache("test", ttl_seconds=0.05)
+    cache.set("k", "value")
+    time.sleep(0.1)
+
+    assert cache.get("k") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_cache_disk_tier(tmp_path):
+    """Test that a fresh cache instance reads entries written to disk"""
+    ResultCache("test", disk_dir=str(tmp_path)).set("k", {"summary": "text"})
+
+    cache = ResultCache("test", disk_dir=str(tmp_path))
+
+    assert cache.get("k") == {"summary": "text"}
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_analysis_cache_key_normalizes_job_description():
+    """Test that the analysis key ignores whitespace differences but not content"""
+    from PIL import Image
+    from gemini_api_structured import _analysis_cache_key
+
+    cv = {"summary": "Data engineer", "skills": {"technical": ["Python"]}}
+    page = Image.new("RGB", (4, 4), "white")
+
+    key = _analysis_cache_key(cv, "Python  developer\n", [page])
+
+    assert key == _analysis_cache_key(dict(reversed(list(cv.items()))), " Python developer", [page.copy()])
+    assert key != _analysis_cache_key(cv, "Java developer", [page])
+    assert key != _analysis_cache_key(cv, "Python developer", [Image.new("RGB", (4, 4), "black")])
@@ -0,0 +1,44 @@
+"""
+Tests for the candidate ranking index
+"""
+
+from candidate_index import CandidateIndex
+
+
+def _index():
+    index = CandidateIndex(features=2 ** 12)
+    index.add("cv-python", {"summary": "Python developer", "skills": {"technical": ["Django", "Docker"]}}, "Ada")
+    index.add("cv-java", {"summary": "Java developer", "skills": {"technical": ["Spring"]}}, "Bob")
+    index.add("cv-k8s", {"experience": [{"id": "exp_1", "description": "Ran Kubernetes clusters for Python services"}]}, "Cy")
+    return index
+
+
+def test_rank_orders_pool_with_section_contributions():
+    """Test that the pool is ranked by job-term coverage with per-section scores"""
+    index = _index()
+
+    result = index.rank("Python Django engineer", top_k=5)
+
+    assert result["pool_size"] == 3
+    assert [item["cv_id"] for item in result["results"]] == ["cv-python", "cv-k8s"]
+    best = result["results"][0]
+    assert best["rank"] == 1
+    assert set(best["section_scores"]) == {"summary", "skills"}
+    assert best["matched_terms"] == ["Python", "Django"]
+    assert result["results"][1]["matched_terms"] == ["Python"]
+
+
+def test_index_grows_incrementally_and_deduplicates():
+    """Test that CVs added after a ranking are searchable and duplicates keep the latest ID"""
+    index = _index()
+    index.rank("Python", top_k=1)
+
+    assert index.add("cv-java-2", {"summary": "Java developer", "skills": {"technical": ["Spring"]}}, "Bob") is False
+    index.add("cv-go", {"skills": {"technical": ["Go", "Spring"]}}, "Dee")
+
+    result = index.rank("Go Spring", top_k=1)
+
+    assert len(index) == 4
+    assert result["results"][0]["cv_id"] == "cv-go"
+    assert [item["cv_id"] for item in index.rank("Java", top_k=3)["results"]] == ["cv-java-2"]
+    assert index.rank("the and", top_k=3)["status"] == "error"
@@ -0,0 +1,121 @@
+"""
+Tests for the rule-based CV segmenter
+"""
+
+import cv_structure_parser
+from cv_segmenter import segment_cv, detect_header, NOT_PROVIDED
+
+
+ENGLISH_CV = """JOHN SMITH
+San Francisco, CA
+john.smith@email.com | +1 (415) 555-0123 | linkedin.com/in/johnsmith
+
+PROFESSIONAL SUMMARY
+Backend engineer with 6 years of experience building distributed systems.
+
+EXPERIENCE
+Senior Software Engineer - Acme Corp
+Jan 2021 - Present
+• Led migration of monolith to microservices
+• Mentored 4 junior engineers and introduced code review
+  guidelines across the team
+Software Engineer at Beta Inc (2018 - 2020)
+- Built REST APIs serving 2M requests/day
+
+EDUCATION
+B.Sc. Computer Science, Stanford University
+2014 - 2018
+GPA: 3.8/4.0
+
+SKILLS
+Programming Languages: Python, Go, SQL
+Tools: Docker, Kubernetes
+
+HOBBIES
+Chess, hiking
+"""
+
+FRENCH_CV = """Marie Dupont
+marie.dupont@mail.fr  06 12 34 56 78
+
+EXPÉRIENCE PROFESSIONNELLE
+Data Scientist chez Orange
+Septembre 2020 - aujourd'hui
+• Développement de modèles de churn
+
+Vie Associative
+Présidente - BDE INSA
+2017 - 2018
+"""
+
+ARABIC_CV = """أحمد علي
+ahmed@mail.com
+
+الخبرة المهنية
+مهندس برمجيات - شركة اتصالات
+2019 - حتى الآن
+
+اللغات
+العربية، الفرنسية
+"""
+
+
+def test_english_cv_fields():
+    """Test contact, entries, dates and skill categories of an English CV"""
+    cv = segment_cv(ENGLISH_CV)
+
+    assert cv["contact"]["name"] == "JOHN SMITH"
+    assert cv["contact"]["email"] == "john.smith@email.com"
+    assert cv["contact"]["phone"] == "+1 (415) 555-0123"
+    assert cv["contact"]["linkedin"] == "linkedin.com/in/johnsmith"
+    assert cv["summary"].startswith("Backend engineer")
+
+    first, second = cv["experience"]
+    assert (first["id"], first["title"], first["company"]) == ("exp_1", "Senior Software Engineer", "Acme Corp")
+    assert (first["startDate"], first["endDate"]) == ("Jan 2021", "Present")
+    assert first["bullets"][1] == "Mentored 4 junior engineers and introduced code review guidelines across the team"
+    assert (second["title"], second["company"], second["startDate"]) == ("Software Engineer", "Beta Inc", "2018")
+
+    education = cv["education"][0]
+    assert education["institution"] == "Stanford University"
+    assert education["gpa"] == "3.8/4.0"
+
+    assert cv["skills"]["technical"] == ["Python", "Go", "SQL"]
+    assert cv["skills"]["tools"] == ["Docker", "Kubernetes"]
+    assert cv["other_sections"]["HOBBIES"][0]["content"] == "Chess, hiking"
+
+
+def test_french_and_arabic_headers():
+    """Test accented French headers and Arabic headers, dates and separators"""
+    french = segment_cv(FRENCH_CV)
+    assert french["experience"][0]["company"] == "Orange"
+    assert french["experience"][0]["endDate"] == "aujourd'hui"
+    assert french["activities"][0]["organization"] == "BDE INSA"
+
+    arabic = segment_cv(ARABIC_CV)
+    assert arabic["contact"]["name"] == "أحمد علي"
+    assert arabic["experience"][0]["endDate"] == "حتى الآن"
+    assert arabic["skills"]["languages"] == ["العربية", "الفرنسية"]
+    assert arabic["summary"] == NOT_PROVIDED
+
+
+def test_detect_header_variants():
+    """Test header normalization (case, accents, punctuation, '&')"""
+    assert detect_header("Licenses & Certifications:") == "certifications"
+    assert detect_header("Formación Académica") == "education"
+    assert detect_header("■ EXPERIENCE") == "experience"
+    assert detect_header("Senior Software Engineer at Acme") is None
+
+
+def test_structure_parser_falls_back_when_api_fails(monkeypatch):
+    """Test that an API failure returns the rule-based parse instead of an error"""
+    def unavailable(stage, api_key):
+        raise ConnectionError("API unavailable")
+
+    monkeypatch.setattr(cv_structure_parser, "get_model", unavailable)
+
+    result = cv_structure_parser.parse_cv_to_structured_data(ENGLISH_CV, "key", use_cache=False)
+
+    assert result["status"] == "success"
+    assert result["source"] == "rule_based"
+    assert result["structured_data"]["contact"]["email"] == "john.smith@email.com"
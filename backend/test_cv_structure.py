@@ -3,7 +3,9 @@ Tests for CV Structure Parser
 """
 
 import json
-from cv_structure_parser import parse_cv_to_structured_data, apply_suggestion_to_structured_cv
+from cv_structure_parser import (
+    parse_cv_to_structured_data, apply_suggestion_to_structured_cv, apply_suggestions_to_structured_cv
+)
 
 
 def test_apply_suggestion_simple_field():
@@ -80,6 +82,55 @@ def test_apply_suggestion_contact_nested():
     assert updated_cv["contact"]["name"] == "John Doe"  # Other fields unchanged
 
 
+def test_apply_suggestions_batch():
+    """Test applying several suggestions at once, with a JSON Patch and per-suggestion status"""
+    structured_cv = {
+        "summary": "Old summary",
+        "contact": {"name": "John Doe", "email": "old@email.com"},
+        "experience": [{"description": "Old description"}, {"description": "Another description"}]
+    }
+    suggestions = [
+        {"suggestionId": 1, "fieldPath": ["experience", 0, "description"], "improvedValue": "New description"},
+        {"suggestionId": 2, "fieldPath": ["summary"], "improvedValue": "New summary"},
+        {"suggestionId": 3, "fieldPath": ["summary"], "improvedValue": "Other summary"}
+    ]
+    
+    outcome = apply_suggestions_to_structured_cv(structured_cv, suggestions)
+    
+    updated_cv = outcome["updated_cv"]
+    assert updated_cv["experience"][0]["description"] == "New description"
+    assert updated_cv["summary"] == "New summary"
+    assert [result["status"] for result in outcome["results"]] == ["applied", "applied", "skipped"]
+    assert outcome["patch"][0] == {"op": "replace", "path": "/experience/0/description", "value": "New description"}
+    assert structured_cv["experience"][0]["description"] == "Old description"  # Original unchanged
+    assert updated_cv["contact"] is structured_cv["contact"]  # Untouched sections are shared
+    assert updated_cv["experience"][1] is structured_cv["experience"][1]
+    
+    # Atomic batch: one bad path rolls back everything
+    suggestions.append({"suggestionId": 4, "fieldPath": ["experience", 5, "description"], "improvedValue": "x"})
+    outcome = apply_suggestions_to_structured_cv(structured_cv, suggestions)
+    assert outcome["updated_cv"] is structured_cv
+    assert outcome["patch"] == []
+    assert [result["status"] for result in outcome["results"]] == ["rolled_back", "rolled_back", "skipped", "failed"]
+
+
+def test_apply_suggestions_rejects_invalid_items():
+    """Test that negative list indexes and non-object suggestions fail instead of editing or raising"""
+    structured_cv = {"skills": {"technical": ["Python", "SQL"]}}
+    suggestions = [
+        {"suggestionId": 1, "fieldPath": ["skills", "technical", -1], "improvedValue": "Go"},
+        None,
+        1
+    ]
+    
+    outcome = apply_suggestions_to_structured_cv(structured_cv, suggestions, atomic=False)
+    
+    assert [result["status"] for result in outcome["results"]] == ["failed", "failed", "failed"]
+    assert outcome["results"][1]["message"] == "Suggestion must be an object"
+    assert outcome["patch"] == []
+    assert outcome["updated_cv"]["skills"]["technical"] == ["Python", "SQL"]
+
+
 if __name__ == "__main__":
     print("Running CV Structure Parser tests...")
     
@@ -101,4 +152,16 @@ if __name__ == "__main__":
     except AssertionError as e:
         print(f"❌ test_apply_suggestion_contact_nested failed: {e}")
     
+    try:
+        test_apply_suggestions_batch()
+        print("✅ test_apply_suggestions_batch passed")
+    except AssertionError as e:
+        print(f"❌ test_apply_suggestions_batch failed: {e}")
+    
+    try:
+        test_apply_suggestions_rejects_invalid_items()
+        print("✅ test_apply_suggestions_rejects_invalid_items passed")
+    except AssertionError as e:
+        print(f"❌ test_apply_suggestions_rejects_invalid_items failed: {e}")
+    
     print("\nAll tests completed!")
@@ -0,0 +1,204 @@
+"""
+Tests for the Gemini analysis module (with a fake model, no network)
+"""
+
+import json
+import gemini_api_structured
+
+
+ANALYSIS_PAYLOAD = {
+    "general": {"overall_score": 5, "summary": "Average", "top_priorities": []},
+    "formatting": {"score": 5, "issues": []},
+    "content": {"score": 5, "weaknesses": []},
+    "field_suggestions": [
+        {"suggestionId": 1, "fieldPath": ["experience", "0", "description"], "improvedValue": "Led {team} \"x\""},
+        {"suggestionId": 2, "fieldPath": ["summary"], "improvedValue": "Better"}
+    ]
+}
+
+
+def test_parse_and_analyze_in_one_call(monkeypatch, fake_model):
+    """Test that combined mode returns both the structured CV and the mapped analysis"""
+    payload = {
+        "structured_cv": {"contact": {"name": "Jane Doe"}, "summary": "Python developer"},
+        "analysis": {
+            "general": {"overall_score": 7.2, "summary": "Solid", "top_priorities": []},
+            "formatting": {"score": 6, "issues": []},
+            "content": {"score": 7, "weaknesses": []},
+            "ats_analysis": {"relevance_score": 65, "keyword_matches": ["Python", "Kubernetes"]},
+            "field_suggestions": [{"suggestionId": 1, "fieldPath": ["summary"], "improvedValue": "Senior Python developer"}]
+        }
+    }
+    model = fake_model("```json\n" + json.dumps(payload) + "\n```")
+    monkeypatch.setattr(gemini_api_structured, "get_model", lambda stage, api_key: model)
+    gemini_api_structured._analysis_cache.clear()
+
+    result = gemini_api_structured.parse_and_analyze_cv_with_gemini("Jane Doe\nPython developer", "", "key")
+
+    assert result["status"] == "success"
+    assert result["structured_data"]["contact"]["name"] == "Jane Doe"
+    analysis = result["analysis_result"]["analysis"]
+    assert analysis["overall_score"] == 72
+    # Keywords that do not appear in the structured CV are reported as missing
+    assert analysis["job_match_analysis"]["keyword_matches"] == ["Python"]
+    assert analysis["job_match_analysis"]["missing_keywords"] == ["Kubernetes"]
+
+    cached = gemini_api_structured.parse_and_analyze_cv_with_gemini("Jane Doe\nPython developer", "", "key")
+    assert cached["analysis_result"]["cached"] is True
+    assert cached["analysis_result"]["token_usage"] == {}
+    assert model.calls == 1
+
+
+def test_truncated_response_is_flagged_and_not_cached(monkeypatch, fake_model):
+    """Test that a result rebuilt from a cut-off response is served once but never cached"""
+    payload = json.dumps({"structured_cv": {"summary": "Python developer"}, "analysis": ANALYSIS_PAYLOAD})
+    model = fake_model(payload[:payload.rindex('"improvedValue"')])
+    monkeypatch.setattr(gemini_api_structured, "get_model", lambda stage, api_key: model)
+    gemini_api_structured._analysis_cache.clear()
+
+    result = gemini_api_structured.parse_and_analyze_cv_with_gemini("Python developer", "", "key")
+    assert result["status"] == "success"
+    assert result["analysis_result"]["repaired"] == "truncated"
+
+    again = gemini_api_structured.parse_and_analyze_cv_with_gemini("Python developer", "", "key")
+    assert "cached" not in again["analysis_result"]
+    assert model.calls == 2
+
+
+def test_parse_and_analyze_reports_malformed_response(monkeypatch, fake_model):
+    """Test that a response missing one of the two objects is an error"""
+    model = fake_model(json.dumps({"structured_cv": {}}))
+    monkeypatch.setattr(gemini_api_structured, "get_model", lambda stage, api_key: model)
+
+    result = gemini_api_structured.parse_and_analyze_cv_with_gemini("Some CV", "", "key", use_cache=False)
+
+    assert result["status"] == "error"
+
+
+def test_analysis_streams_suggestions_before_completion(monkeypatch, fake_model):
+    """Test that field suggestions are reported while streaming, with numeric path segments as indexes"""
+    # A suggestion without improvedValue is left out of the stream as well as the final analysis
+    incomplete = {"suggestionId": 3, "fieldPath": ["summary"]}
+    payload = dict(ANALYSIS_PAYLOAD, field_suggestions=ANALYSIS_PAYLOAD["field_suggestions"] + [incomplete])
+    model = fake_model(json.dumps(payload))
+    monkeypatch.setattr(gemini_api_structured, "get_model", lambda stage, api_key: model)
+    streamed = []
+
+    result = gemini_api_structured.analyze_structured_cv_with_gemini(
+        {"summary": "Old"}, "", "key", use_cache=False, on_suggestion=streamed.append
+    )
+
+    assert [s["suggestionId"] for s in streamed] == [1, 2]
+    assert streamed[0]["fieldPath"] == ["experience", 0, "description"]
+    assert result["analysis"]["field_suggestions"] == streamed
+    assert model.generation_config["response_mime_type"] == "application/json"
+    assert "response_schema" in model.generation_config
+
+
+def test_sectioned_analysis_merges_in_section_order(monkeypatch, prompt_routing_model):
+    """Test that per-section results merge deterministically with stable IDs and valid paths"""
+    structured_cv = {
+        "summary": "Developer",
+        "experience": [{"title": "Engineer", "description": "Did things"}],
+        "skills": {"technical": ["Python"]},
+        "education": []
+    }
+    model = prompt_routing_model({
+        "Analyze the experience part": {
+            "sections": [{"name": "Experience"}],
+            "field_suggestions": [
+                {"fieldPath": ["experience", "0", "description"], "improvedValue": "Built X", "severity": "low"},
+                {"fieldPath": ["experience", "3", "description"], "improvedValue": "Missing entry"},
+                {"fieldPath": ["summary"], "improvedValue": "Outside the section"}
+            ],
+            "quick_wins": []
+        },
+        "Analyze the profile part": {
+            "sections": [{"name": "Summary"}],
+            "field_suggestions": [{"fieldPath": ["summary"], "improvedValue": "Senior developer", "severity": "critical"}],
+            "quick_wins": [{"fieldPath": ["summary"], "improvedValue": "Senior developer"}]
+        },
+        "Analyze the skills part": {"sections": [{"name": "Skills"}], "field_suggestions": [], "quick_wins": []},
+        "Score this structured CV": {
+            "general": {"overall_score": 6, "summary": "Fine", "top_priorities": []},
+            "formatting": {"score": 6, "issues": []},
+            "content": {"score": 6, "weaknesses": []}
+        }
+    })
+    monkeypatch.setattr(gemini_api_structured, "get_model", lambda stage, api_key: model)
+    gemini_api_structured._analysis_cache.clear()
+
+    sections = gemini_api_structured.get_analysis_sections(structured_cv)
+    assert sections == ["profile", "experience", "skills"]
+
+    streamed = []
+    # Finish order is reversed on purpose; the merge must not depend on it
+    results = [
+        gemini_api_structured.analyze_cv_section_with_gemini(name, structured_cv, "", "key", on_suggestion=streamed.append)
+        for name in reversed(sections)
+    ]
+    overview = gemini_api_structured.analyze_cv_overview_with_gemini(structured_cv, "", "key")
+    merged = gemini_api_structured.merge_sectioned_analysis(structured_cv, overview, results)
+
+    suggestions = merged["analysis"]["field_suggestions"]
+    assert [s["suggestionId"] for s in suggestions] == [101, 201]
+    assert suggestions[1]["fieldPath"] == ["experience", 0, "description"]
+    assert sorted(s["suggestionId"] for s in streamed) == [101, 201]
+    assert "Did things" not in [p for p in model.prompts if "Analyze the skills part" in p][0]
+
+    # Cache hits report no usage, so callers summing token_usage don't double-count
+    cached = gemini_api_structured.analyze_cv_section_with_gemini("skills", structured_cv, "", "key")
+    assert cached["cached"] is True and cached["token_usage"] == {}
+    cached = gemini_api_structured.analyze_cv_overview_with_gemini(structured_cv, "", "key")
+    assert cached["cached"] is True and cached["token_usage"] == {}
+
+
+def test_incremental_reanalysis_only_sends_changed_sections(monkeypatch, prompt_routing_model):
+    """Test that only changed sections are re-analyzed and merged into the previous analysis"""
+    previous_cv = {
+        "summary": "Developer",
+        "experience": [{"title": "Engineer", "description": "Did things"}],
+        "skills": {"technical": ["Python"]}
+    }
+    previous_analysis = gemini_api_structured._build_analysis_result({
+        "general": {"overall_score": 5, "summary": "Average", "top_priorities": []},
+        "formatting": {"score": 5, "issues": []},
+        "content": {"score": 5, "weaknesses": ["Vague experience"]},
+        "sections": [{"name": "Summary", "feedback": "ok"}, {"name": "Work Experience", "feedback": "vague"}],
+        "field_suggestions": [
+            {"suggestionId": 201, "fieldPath": ["summary"], "improvedValue": "Senior developer"},
+            {"suggestionId": 2, "fieldPath": ["experience", 0, "description"], "improvedValue": "Built X"}
+        ]
+    }, previous_cv)
+    structured_cv = dict(previous_cv, experience=[{"title": "Engineer", "description": "Built X"}])
+    model = prompt_routing_model({
+        "Analyze the experience part": {
+            "sections": [{"name": "Experience", "feedback": "better"}],
+            "field_suggestions": [{"fieldPath": ["experience", 0, "title"], "improvedValue": "Backend Engineer"}],
+            "quick_wins": []
+        },
+        "only these parts changed": {
+            "general": {"overall_score": 7, "summary": "Improved", "top_priorities": []},
+            "formatting": {"score": 6, "issues": []},
+            "content": {"score": 7, "weaknesses": []}
+        }
+    })
+    monkeypatch.setattr(gemini_api_structured, "get_model", lambda stage, api_key: model)
+    gemini_api_structured._analysis_cache.clear()
+
+    changed = gemini_api_structured.diff_analysis_sections(previous_cv, structured_cv)
+    assert changed == ["experience"]
+
+    section = gemini_api_structured.analyze_cv_section_with_gemini("experience", structured_cv, "", "key")
+    overview = gemini_api_structured.update_cv_overview_with_gemini(structured_cv, previous_analysis, changed, "", "key")
+    merged = gemini_api_structured.merge_incremental_analysis(structured_cv, previous_analysis, overview, [section], changed)
+
+    analysis = merged["analysis"]
+    assert len(model.prompts) == 2
+    assert analysis["overall_score"] == 70
+    # The summary suggestion is kept; the new one does not reuse its ID
+    assert [s["suggestionId"] for s in analysis["field_suggestions"]] == [201, 202]
+    assert [s["feedback"] for s in analysis["section_analysis"]] == ["ok", "better"]
+    assert merged["incremental"] == {
+        "changed_sections": ["experience"], "reused_sections": ["profile", "skills"], "stale_sections": []
+    }
@@ -0,0 +1,74 @@
+"""
+Tests for the shared Gemini model registry
+"""
+
+import gemini_client
+
+
+def test_stage_model_names(monkeypatch):
+    """Test per-stage overrides and the shared fallback"""
+    monkeypatch.delenv("GEMINI_MODEL", raising=False)
+    monkeypatch.delenv("GEMINI_STRUCTURE_MODEL", raising=False)
+    monkeypatch.delenv("GEMINI_COMBINED_MODEL", raising=False)
+    monkeypatch.delenv("GEMINI_JOB_PROFILE_MODEL", raising=False)
+    monkeypatch.setenv("GEMINI_ANALYSIS_MODEL", "gemini-2.5-pro")
+
+    assert gemini_client.get_model_name("structure") == gemini_client.DEFAULT_MODEL_NAME
+    assert gemini_client.get_model_name("analysis") == "gemini-2.5-pro"
+
+    monkeypatch.setenv("GEMINI_MODEL", "gemini-2.5-flash")
+    assert gemini_client.get_stage_models() == {
+        "structure": "gemini-2.5-flash",
+        "analysis": "gemini-2.5-pro",
+        "combined": "gemini-2.5-flash",
+        "job_profile": "gemini-2.5-flash"
+    }
+
+
+def test_get_model_configures_once_and_reuses_models(monkeypatch):
+    """Test that the SDK is configured once per key and models are shared"""
+    calls = []
+    monkeypatch.setattr(gemini_client.genai, "configure", lambda api_key: calls.append(api_key))
+    monkeypatch.setattr(gemini_client, "_configured_api_key", None)
+    monkeypatch.setattr(gemini_client, "_models", {})
+    monkeypatch.delenv("GEMINI_STRUCTURE_MODEL", raising=False)
+    monkeypatch.delenv("GEMINI_COMBINED_MODEL", raising=False)
+    monkeypatch.delenv("GEMINI_ANALYSIS_MODEL", raising=False)
+    monkeypatch.delenv("GEMINI_MODEL", raising=False)
+
+    first = gemini_client.get_model("structure", "key-1")
+    second = gemini_client.get_model("analysis", "key-1")
+    third = gemini_client.get_model("structure", "key-2")
+
+    assert first is second
+    assert third is not first
+    assert calls == ["key-1", "key-2"]
+
+
+def test_generate_text_counts_tokens_per_stage(monkeypatch):
+    """Test that usage metadata is added to the stage totals and the caller's usage dict"""
+    class Metadata:
+        def __init__(self, prompt, completion):
+            self.prompt_token_count = prompt
+            self.candidates_token_count = completion
+
+    class Chunk:
+        def __init__(self, text, metadata):
+            self.text = text
+            self.usage_metadata = metadata
+
+    class Model:
+        def generate_content(self, contents, generation_config=None, stream=False):
+            if stream:
+                return [Chunk('{"a":', Metadata(120, 2)), Chunk(' 1}', Metadata(120, 5))]
+            return Chunk('{}', Metadata(100, 1))
+
+    monkeypatch.setattr(gemini_client, "_token_usage", {})
+    usage = {}
+
+    gemini_client.generate_text(Model(), "prompt", stage="analysis", usage=usage)
+    text = gemini_client.generate_text(Model(), "prompt", on_text=lambda chunk: None, stage="analysis", usage=usage)
+
+    assert text == '{"a": 1}'
+    assert usage == {"calls": 2, "prompt_tokens": 220, "completion_tokens": 6}
+    assert gemini_client.get_token_usage() == {"analysis": usage}
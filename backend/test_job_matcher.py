@@ -0,0 +1,43 @@
+"""
+Tests for the local BM25 job-match scorer
+"""
+
+from job_matcher import score_job_match, job_terms
+
+
+STRUCTURED_CV = {
+    "contact": {"name": "Jane Doe", "email": "jane@example.com"},
+    "summary": "Backend developer working with Python and Django",
+    "skills": {"technical": ["Python", "Docker", "PostgreSQL", "REST APIs"]},
+    "experience": [
+        {"id": "exp_1", "title": "Software Engineer", "description": "Built REST APIs in Django, deployed with Docker on AWS"}
+    ]
+}
+
+
+def test_job_terms_skip_stopwords_and_count_repeats():
+    """Test that generic words are dropped and terms are merged across plural forms"""
+    terms = job_terms("We are looking for a Python developer. Python APIs and an API gateway; 5 years experience.")
+
+    assert list(terms) == ["python", "developer", "api", "gateway"]
+    assert terms["python"]["count"] == 2
+    assert terms["api"] == {"surface": "APIs", "count": 2}
+
+
+def test_score_job_match_reports_matched_and_missing_terms():
+    """Test that covered terms raise the score and uncovered ones are listed as missing"""
+    job_description = "Senior Python developer with Django, REST API, Kubernetes and Terraform"
+
+    result = score_job_match(STRUCTURED_CV, job_description)
+
+    assert result["status"] == "success"
+    assert 0 < result["score"] < 100
+    matched = {item["term"] for item in result["matched_terms"]}
+    assert {"Python", "Django", "REST", "API"} <= matched
+    assert {"Senior", "Kubernetes", "Terraform"} <= set(result["missing_terms"])
+    assert "Jane" not in matched
+
+    covered = score_job_match(STRUCTURED_CV, "Python Django Docker")
+    assert covered["score"] == 100
+    assert score_job_match({}, job_description)["score"] == 0
+    assert score_job_match(STRUCTURED_CV, "the and of")["status"] == "error"
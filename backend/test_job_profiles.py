@@ -0,0 +1,47 @@
+"""
+Tests for job-description profiles (with a fake model, no network)
+"""
+
+import json
+import job_profiles
+
+
+JOB_DESCRIPTION = """Senior Backend Developer
+We need Python, Django and PostgreSQL. Kubernetes is a plus.
+You will design REST APIs and mentor developers."""
+
+
+def test_rule_based_profile_keeps_job_terms():
+    """Test the offline profile: frequent job terms as keywords and the full text as prompt fragment"""
+    profile = job_profiles.build_job_profile(JOB_DESCRIPTION, use_gemini=False)
+
+    assert profile["source"] == "rule_based"
+    assert profile["title"] == "Senior Backend Developer"
+    assert profile["keywords"][0] == "Developer"
+    assert "Python" in profile["keywords"]
+    assert profile["prompt_fragment"] == " ".join(JOB_DESCRIPTION.split())
+
+
+def test_gemini_profile_builds_compact_fragment_and_matches_skills(monkeypatch, fake_model):
+    """Test the extracted profile, its prompt fragment and the skill check against a CV"""
+    model = fake_model(json.dumps({
+        "title": "Backend Developer",
+        "seniority": "Senior",
+        "required_skills": ["Python", "Django", "PostgreSQL"],
+        "nice_to_have_skills": ["Kubernetes"],
+        "responsibilities": ["Design REST APIs", "Mentor developers"],
+        "keywords": ["Python", "Django", "REST API"]
+    }))
+    monkeypatch.setattr(job_profiles, "get_model", lambda stage, api_key: model)
+
+    profile = job_profiles.build_job_profile(JOB_DESCRIPTION, "key")
+
+    assert profile["source"] == "gemini"
+    assert profile["prompt_fragment"].startswith("Target role: Backend Developer (Senior)")
+    assert "python" in profile["terms"]
+
+    skills = job_profiles.match_profile_skills(profile, {"skills": {"technical": ["Python", "Django"]}})
+    assert skills["required_skills"] == {"matched": ["Python", "Django"], "missing": ["PostgreSQL"]}
+    assert skills["nice_to_have_skills"]["missing"] == ["Kubernetes"]
+
+    assert job_profiles.job_profile_hash(JOB_DESCRIPTION) == job_profiles.job_profile_hash("  " + JOB_DESCRIPTION)
@@ -0,0 +1,65 @@
+"""
+Tests for JSON recovery of noisy or truncated model output
+"""
+
+import json
+import pytest
+import json_repair
+from json_repair import loads_with_repair, call_with_stage_retry
+
+
+def test_repairs_common_failure_shapes():
+    """Test fences, surrounding prose and unescaped quotes"""
+    assert loads_with_repair('```json\n```json\n{"a": 1}\n```\n```') == {"a": 1}
+    assert loads_with_repair('Here is the result:\n{"a": [1, 2]}\nLet me know!') == {"a": [1, 2]}
+    assert loads_with_repair('{"summary": "Known as "the fixer" at work", "b": 2}') == {
+        "summary": 'Known as "the fixer" at work',
+        "b": 2
+    }
+
+
+def test_truncated_output_drops_the_incomplete_value():
+    """Test that a response cut mid-value keeps only complete values"""
+    truncated = '{"field_suggestions": [{"id": 1, "improvedValue": "Done"}, {"id": 2, "improvedValue": "Half wri'
+    assert loads_with_repair(truncated) == {"field_suggestions": [{"id": 1, "improvedValue": "Done"}, {"id": 2}]}
+
+    truncated = '{"field_suggestions": [{"id": 1, "improvedValue": "Done"}, {"id": 2, "impro'
+    assert loads_with_repair(truncated) == {"field_suggestions": [{"id": 1, "improvedValue": "Done"}, {"id": 2}]}
+
+    assert loads_with_repair('{"skills": ["Python", "SQL"]') == {"skills": ["Python", "SQL"]}
+
+
+def test_report_flags_the_repair_that_was_needed():
+    """Test that the report tells a truncation repair apart from harmless ones"""
+    report = {}
+    loads_with_repair('{"a": 1}', report)
+    assert report["repair"] is None
+    loads_with_repair('```json\n{"a": 1}\n```', report)
+    assert report["repair"] == "fences"
+    loads_with_repair('{"skills": ["Python", "SQL"]', report)
+    assert report["repair"] == "truncated"
+
+
+def test_unrecoverable_output_raises_original_error():
+    """Test that text without any JSON raises JSONDecodeError"""
+    with pytest.raises(json.JSONDecodeError):
+        loads_with_repair("Sorry, I cannot help with that.")
+
+
+def test_stage_retry_reruns_only_until_output_is_usable(monkeypatch):
+    """Test that an unusable response is retried and counted"""
+    monkeypatch.setattr(json_repair, "GEMINI_STAGE_RETRIES", 1)
+    responses = iter(["no json here", '{"ok": true}'])
+    attempts = []
+    before = json_repair.get_repair_stats()
+
+    def generate(attempt):
+        attempts.append(attempt)
+        return next(responses)
+
+    assert call_with_stage_retry("structure", generate, loads_with_repair) == {"ok": True}
+    assert attempts == [0, 1]
+
+    after = json_repair.get_repair_stats()
+    assert after["stage_retries"] == before["stage_retries"] + 1
+    assert after["stage_retry_recovered"] == before["stage_retry_recovered"] + 1
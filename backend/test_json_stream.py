@@ -0,0 +1,33 @@
+"""
+Tests for the incremental JSON array scanner
+"""
+
+import json
+from json_stream import JSONArrayItemStream
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    """Test that each array item is emitted by the chunk that completes it"""
+    stream = JSONArrayItemStream("field_suggestions")
+
+    assert stream.feed('{"score": 5, "field_suggestions": [{"id": 1, "path": ["a", 0]}') == [{"id": 1, "path": ["a", 0]}]
+    assert stream.feed(', {"id": 2, "text": "bra') == []
+    assert stream.feed('ces } and \\"quotes\\" {"}') == [{"id": 2, "text": 'braces } and "quotes" {'}]
+    assert stream.feed('], "other": [{"id": 3}]}') == []
+    assert json.loads(stream.text)["other"] == [{"id": 3}]
+
+
+def test_key_inside_string_values_is_ignored():
+    """Test that the key name appearing as a value or in another array is not tracked"""
+    document = json.dumps({
+        "note": "field_suggestions",
+        "nested": {"list": [{"field_suggestions": "no"}]},
+        "analysis": {"field_suggestions": [{"id": 1, "inner": {"deep": [{"x": 1}]}}]}
+    })
+    stream = JSONArrayItemStream("field_suggestions")
+
+    items = []
+    for char in document:
+        items.extend(stream.feed(char))
+
+    assert items == [{"id": 1, "inner": {"deep": [{"x": 1}]}}]
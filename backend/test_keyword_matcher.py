@@ -0,0 +1,42 @@
+"""
+Tests for the multi-keyword ATS matcher
+"""
+
+from keyword_matcher import KeywordMatcher, clean_keyword
+
+
+def test_scan_matches_whole_words_with_accents_and_plurals():
+    """Test word-boundary matching that ignores case, accents and simple plurals"""
+    matcher = KeywordMatcher(["API", "machine learning", "learning", "C++", "réseaux", "Java"])
+
+    text = "Built REST APIs, Machine-Learning pipelines and C++ tools; administration réseau. JavaScript"
+    matches = matcher.scan(text)
+
+    found = {keyword: text[start:end] for keyword, start, end in matches}
+    assert found == {
+        "API": "APIs",
+        "machine learning": "Machine-Learning",
+        "learning": "Learning",
+        "C++": "C++",
+        "réseaux": "réseau"
+    }
+
+
+def test_scan_values_ignores_keys_and_ids():
+    """Test that only CV values are searched and counts include every occurrence"""
+    structured_cv = {
+        "summary": "Python developer",
+        "experience": [
+            {"id": "exp_1", "title": "Engineer", "description": "Python and Docker"},
+            {"id": "exp_2", "title": "Intern", "description": "Scripts in python"}
+        ]
+    }
+    matcher = KeywordMatcher(["Python (mentioned 3x)", "title", "exp", "Docker"])
+
+    found = matcher.scan_values(structured_cv)
+
+    assert found["Python (mentioned 3x)"]["count"] == 3
+    assert found["Docker"]["positions"] == [{"path": ["experience", 0, "description"], "start": 11, "end": 17}]
+    assert found["title"]["count"] == 0
+    assert found["exp"]["count"] == 0
+    assert clean_keyword("SQL (2x)") == "SQL"
@@ -0,0 +1,136 @@
+"""
+Tests for API helpers in main (no Gemini calls)
+"""
+
+import zipfile
+from io import BytesIO
+import pytest
+from fastapi.testclient import TestClient
+import gemini_api_structured
+import job_profiles
+import main
+from candidate_index import CandidateIndex
+from sessions import SessionStore
+from storage import CVStore
+
+
+STRUCTURED_CV = {
+    "summary": "Developer",
+    "experience": [{"title": "Engineer", "description": "Did things"}],
+    "skills": {"technical": ["Python"]}
+}
+
+GEMINI_ANALYSIS = {
+    "status": "success",
+    "analysis": {
+        "overall_score": 50,
+        "ats_score": 50,
+        "summary": "Average",
+        "critical_issues": [],
+        "field_suggestions": [
+            {"suggestionId": 1, "fieldPath": ["experience", 0, "description"], "improvedValue": "Built X"}
+        ],
+        "section_analysis": [],
+        "quick_wins": [],
+        "top_priorities": [],
+        "grammar_and_clarity": {"issues": []},
+        "job_match_analysis": {"relevance_score": 50, "keyword_matches": [], "missing_keywords": [],
+                               "recommendations": []},
+        "global_analysis": {"formatting_score": 5, "content_score": 5}
+    }
+}
+
+
+def test_start_session_registers_analysis_suggestions(monkeypatch):
+    """Test that the session opened for an analysis can apply its suggestions by ID"""
+    monkeypatch.setattr(main, "sessions", SessionStore())
+
+    session_id = main._start_session(STRUCTURED_CV, GEMINI_ANALYSIS, {"structured_cv": "cv1", "analysis": "an1"})
+
+    result = main.sessions.apply(session_id, [1])
+    assert result["status"] == "success"
+    assert result["patch"] == [{"op": "replace", "path": "/experience/0/description", "value": "Built X"}]
+
+
+def test_reanalyze_session_chains_rounds_without_reusing_ids(monkeypatch, tmp_path, prompt_routing_model):
+    """Test analyze -> apply -> /reanalyze twice on a session opened by an analysis"""
+    monkeypatch.setattr(main, "sessions", SessionStore())
+    monkeypatch.setattr(main, "store", CVStore(str(tmp_path / "store.sqlite3")))
+    monkeypatch.setattr(main, "candidate_index", CandidateIndex())
+    model = prompt_routing_model({
+        "Analyze the experience part": {
+            "sections": [{"name": "Experience", "feedback": "better"}],
+            "field_suggestions": [{"fieldPath": ["experience", 0, "title"], "improvedValue": "Backend Engineer"}],
+            "quick_wins": []
+        },
+        "only these parts changed": {
+            "general": {"overall_score": 7, "summary": "Improved", "top_priorities": []},
+            "formatting": {"score": 6, "issues": []},
+            "content": {"score": 7, "weaknesses": []}
+        }
+    })
+    monkeypatch.setattr(gemini_api_structured, "get_model", lambda stage, api_key: model)
+    gemini_api_structured._analysis_cache.clear()
+    client = TestClient(main.app)
+
+    # A sectioned analysis numbered its experience suggestion 201
+    analysis = {**GEMINI_ANALYSIS, "analysis": {**GEMINI_ANALYSIS["analysis"], "field_suggestions": [
+        {"suggestionId": 201, "fieldPath": ["experience", 0, "description"], "improvedValue": "Built X"}
+    ]}}
+    session_id = main._start_session(STRUCTURED_CV, analysis, {"structured_cv": None, "analysis": None})
+    applied_ids = []
+
+    for _ in range(2):
+        suggestion_id = main.sessions.get(session_id)["available_suggestion_ids"][-1]
+        assert main.sessions.apply(session_id, [suggestion_id])["status"] == "success"
+        applied_ids.append(suggestion_id)
+
+        response = client.post("/reanalyze", json={"session_id": session_id}).json()
+        assert response["gemini_analysis"]["incremental"]["changed_sections"] == ["experience"]
+
+    new_ids = [s["suggestionId"] for s in response["gemini_analysis"]["analysis"]["field_suggestions"]]
+    assert applied_ids == [201, 202]
+    assert new_ids == [203]
+    assert main.sessions.get(session_id)["available_suggestion_ids"] == [203]
+
+
+def test_job_profile_fallback_to_stored_rule_based_profile_is_not_created(monkeypatch, tmp_path):
+    """Test that a Gemini request falling back to an already stored rule-based profile returns that record"""
+    monkeypatch.setattr(main, "store", CVStore(str(tmp_path / "store.sqlite3")))
+    client = TestClient(main.app)
+    job_description = "Backend Developer\nPython, Django and PostgreSQL."
+
+    first = client.post("/job-profiles", json={"job_description": job_description, "use_gemini": False}).json()
+    assert first["created"] is True
+
+    def unavailable(stage, api_key):
+        raise RuntimeError("Gemini unavailable")
+
+    monkeypatch.setattr(job_profiles, "get_model", unavailable)
+    second = client.post("/job-profiles", json={"job_description": job_description}).json()
+
+    assert second["created"] is False
+    assert second["job_profile_id"] == first["job_profile_id"]
+    assert second["profile"] == first["profile"]
+
+
+def _zip(files: dict) -> bytes:
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_unpack_zip_enforces_size_and_count_limits(monkeypatch):
+    """Test that zip entries are capped per file, in total and in number"""
+    monkeypatch.setattr(main, "BATCH_MAX_FILE_BYTES", 1000)
+    monkeypatch.setattr(main, "BATCH_MAX_ZIP_BYTES", 1500)
+
+    assert main._unpack_zip(_zip({"a.txt": b"a" * 800, "notes.md": b"x" * 5000})) == [("a.txt", b"a" * 800)]
+    with pytest.raises(ValueError, match="larger than"):
+        main._unpack_zip(_zip({"bomb.txt": b"0" * 100000}))
+    with pytest.raises(ValueError, match="uncompressed"):
+        main._unpack_zip(_zip({"a.txt": b"a" * 800, "b.txt": b"b" * 800}))
+    with pytest.raises(ValueError, match="Too many"):
+        main._unpack_zip(_zip({"a.txt": b"a", "b.txt": b"b"}), max_files=1)
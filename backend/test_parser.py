@@ -0,0 +1,116 @@
+"""
+Tests for the document parser
+"""
+
+import fitz
+
+from parser import ingest_pdf, parse_document_bytes, parse_document_with_images
+
+
+def _make_pdf(path, page_count):
+    doc = fitz.open()
+    for i in range(page_count):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {i + 1} content")
+    doc.save(str(path))
+    doc.close()
+
+
+def test_ingest_pdf_renders_only_requested_pages(tmp_path):
+    """Test that text covers every page but only the leading pages are rendered"""
+    pdf_path = tmp_path / "cv.pdf"
+    _make_pdf(pdf_path, 5)
+
+    result = ingest_pdf(str(pdf_path), max_image_pages=2)
+
+    assert result['page_count'] == 5
+    assert len(result['images']) == 2
+    assert "Page 1 content" in result['text']
+    assert "Page 5 content" in result['text']
+
+
+def test_parse_document_with_images_cleans_text(tmp_path):
+    """Test that the PDF path returns cleaned text and page images"""
+    pdf_path = tmp_path / "cv.pdf"
+    _make_pdf(pdf_path, 1)
+
+    result = parse_document_with_images(str(pdf_path))
+
+    assert result['text'] == "Page 1 content"
+    assert len(result['images']) == 1
+
+
+def test_parse_document_with_images_txt(tmp_path):
+    """Test that non-PDF files return text without images"""
+    txt_path = tmp_path / "cv.txt"
+    txt_path.write_text("John Doe\n\n\n\nEngineer", encoding="utf-8")
+
+    result = parse_document_with_images(str(txt_path))
+
+    assert result['text'] == "John Doe\n\nEngineer"
+    assert result['images'] == []
+
+
+def test_parse_document_bytes_pdf(tmp_path):
+    """Test that PDFs parse from memory the same way as from disk"""
+    pdf_path = tmp_path / "cv.pdf"
+    _make_pdf(pdf_path, 4)
+
+    result = parse_document_bytes(pdf_path.read_bytes(), "CV.PDF", max_image_pages=1)
+
+    assert result['text'] == parse_document_with_images(str(pdf_path))['text']
+    assert len(result['images']) == 1
+
+
+def test_parse_document_bytes_docx():
+    """Test that DOCX files parse from an in-memory buffer"""
+    from io import BytesIO
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph("Jane Smith")
+    doc.add_paragraph("Data Scientist")
+    buffer = BytesIO()
+    doc.save(buffer)
+
+    result = parse_document_bytes(buffer.getvalue(), "cv.docx")
+
+    assert result['text'] == "Jane Smith\nData Scientist"
+    assert result['images'] == []
+
+
+def test_parse_document_bytes_txt_and_unsupported():
+    """Test TXT decoding fallback and unsupported extensions"""
+    assert parse_document_bytes("Résumé".encode('latin-1'), "cv.txt")['text'] == "Résumé"
+    assert parse_document_bytes(b"data", "cv.xyz")['text'] is None
+
+
+def test_ingested_page_images_are_encoded_blobs(tmp_path):
+    """Test that page images are encoded within the pixel budget"""
+    from io import BytesIO
+    from PIL import Image
+    import parser
+
+    pdf_path = tmp_path / "cv.pdf"
+    _make_pdf(pdf_path, 1)
+
+    blob = ingest_pdf(str(pdf_path))['images'][0]
+    img = Image.open(BytesIO(blob['data']))
+
+    assert blob['mime_type'] == f"image/{parser.PAGE_IMAGE_FORMAT}"
+    assert img.width * img.height <= parser.PAGE_IMAGE_MAX_PIXELS
+
+
+def test_encode_page_image_respects_byte_budget():
+    """Test that oversized pages fall back to lossy encoding and downscaling"""
+    import os
+    from PIL import Image
+    from parser import encode_page_image
+
+    noisy = Image.frombytes("RGB", (800, 800), os.urandom(800 * 800 * 3))
+
+    blob = encode_page_image(noisy, image_format="webp", max_bytes=150000)
+    unlimited = encode_page_image(noisy, image_format="webp", max_bytes=0)
+
+    assert blob['mime_type'] == "image/webp"
+    assert len(blob['data']) <= 150000 < len(unlimited['data'])
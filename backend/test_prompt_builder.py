@@ -0,0 +1,48 @@
+"""
+Tests for compact, token-budgeted prompt data
+"""
+
+import json
+from prompt_builder import build_cv_prompt_data, compact_cv, estimate_tokens
+
+
+def test_compact_cv_drops_placeholders_but_keeps_indexes():
+    """Test that empty fields are removed while list positions are preserved"""
+    structured_cv = {
+        "contact": {"name": "Jane Doe", "phone": "Not provided", "linkedin": ""},
+        "summary": "Not provided",
+        "experience": [
+            {"title": "Not provided", "company": "", "achievements": []},
+            {"title": "Engineer", "company": "Acme", "achievements": ["Shipped X", "Not provided"]}
+        ],
+        "certifications": []
+    }
+
+    compacted = compact_cv(structured_cv)
+
+    assert compacted == {
+        "contact": {"name": "Jane Doe"},
+        "experience": [{}, {"title": "Engineer", "company": "Acme", "achievements": ["Shipped X", ""]}]
+    }
+    # The original is left untouched
+    assert structured_cv["summary"] == "Not provided"
+
+
+def test_build_cv_prompt_data_is_compact_and_fits_budget():
+    """Test compact serialization and shortening of the largest section over budget"""
+    structured_cv = {
+        "summary": "Backend developer",
+        "experience": [{"title": f"Role {i}", "description": "Built services " * 30} for i in range(10)]
+    }
+
+    text = build_cv_prompt_data(structured_cv, token_budget=10000)
+    assert "\n" not in text
+    assert json.loads(text) == structured_cv
+
+    limited = build_cv_prompt_data(structured_cv, token_budget=400)
+    data, note = limited.split("\n", 1)
+    assert estimate_tokens(data) <= 400
+    shortened = json.loads(data)
+    assert shortened["summary"] == "Backend developer"
+    assert shortened["experience"][0]["title"] == "Role 0"
+    assert "experience" in note
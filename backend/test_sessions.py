@@ -0,0 +1,106 @@
+"""
+Tests for versioned CV editing sessions
+"""
+
+from sessions import SessionStore
+
+
+STRUCTURED_CV = {
+    "summary": "Old summary",
+    "contact": {"name": "John Doe", "email": "old@email.com"},
+    "experience": [{"description": "Old description"}, {"description": "Another description"}]
+}
+
+SUGGESTIONS = [
+    {"suggestionId": 1, "fieldPath": ["summary"], "improvedValue": "New summary"},
+    {"suggestionId": 2, "fieldPath": ["experience", 0, "description"], "improvedValue": "New description"},
+    {"suggestionId": 3, "fieldPath": ["contact", "linkedin"], "improvedValue": "linkedin.com/in/john"}
+]
+
+
+def test_apply_by_id_shares_structure_and_returns_patch():
+    """Test applying suggestions by ID: new version, JSON Patch diff and untouched sections shared"""
+    store = SessionStore()
+    session_id = store.create(STRUCTURED_CV, SUGGESTIONS)
+
+    result = store.apply(session_id, [2, 3], base_version=0)
+
+    assert result["status"] == "success"
+    assert result["version"] == 1
+    assert result["patch"] == [
+        {"op": "replace", "path": "/experience/0/description", "value": "New description"},
+        {"op": "add", "path": "/contact/linkedin", "value": "linkedin.com/in/john"}
+    ]
+    first = store.get_structured_cv(session_id, 0)
+    second = store.get_structured_cv(session_id)
+    assert first["experience"][0]["description"] == "Old description"
+    assert second["experience"][1] is first["experience"][1]
+    assert store.get(session_id)["available_suggestion_ids"] == [1]
+
+    # A client still holding version 0 gets a conflict; an applied suggestion is skipped
+    assert store.apply(session_id, [1], base_version=0)["conflict"] is True
+    assert store.apply(session_id, [2])["results"][0]["status"] == "skipped"
+
+
+def test_undo_redo_return_patches():
+    """Test undo reverting with an inverse patch, redo re-applying, and a new edit discarding redo"""
+    store = SessionStore()
+    session_id = store.create(STRUCTURED_CV, SUGGESTIONS)
+    store.apply(session_id, [1, 3])
+
+    undone = store.undo(session_id)
+    assert undone["version"] == 0
+    assert undone["patch"] == [
+        {"op": "remove", "path": "/contact/linkedin"},
+        {"op": "replace", "path": "/summary", "value": "Old summary"}
+    ]
+    assert store.get_structured_cv(session_id)["summary"] == "Old summary"
+
+    redone = store.redo(session_id)
+    assert redone["version"] == 1
+    assert store.get_structured_cv(session_id)["summary"] == "New summary"
+
+    store.undo(session_id)
+    assert store.apply(session_id, [2])["version"] == 2  # version numbers are not reused
+    assert store.redo(session_id)["status"] == "error"
+    assert store.get(session_id)["applied_suggestion_ids"] == [2]
+
+
+def test_atomic_apply_with_unknown_id_changes_nothing():
+    """Test that an unknown suggestion ID rolls back an atomic batch"""
+    store = SessionStore()
+    session_id = store.create(STRUCTURED_CV, SUGGESTIONS)
+
+    result = store.apply(session_id, [1, 99])
+
+    assert result["status"] == "error"
+    assert [item["status"] for item in result["results"]] == ["rolled_back", "failed"]
+    assert store.get(session_id)["current_version"] == 0
+    assert store.apply("missing", [1])["message"] == "Session not found or expired"
+
+
+def test_set_analysis_registers_new_suggestions():
+    """Test that a re-analysis of a version becomes the session's analysis base"""
+    store = SessionStore()
+    session_id = store.create(STRUCTURED_CV, SUGGESTIONS, analysis={"status": "success"})
+    store.apply(session_id, [1])
+
+    new_suggestion = {"suggestionId": 4, "fieldPath": ["summary"], "improvedValue": "Newer summary"}
+    assert store.set_analysis(session_id, {"status": "success", "analysis": {"field_suggestions": [new_suggestion]}}, 1)
+
+    base = store.get_analysis(session_id)
+    assert base["analyzed_version"] == 1
+    assert base["structured_cv"]["summary"] == "New summary"
+    assert store.apply(session_id, [4])["patch"][0]["value"] == "Newer summary"
+
+
+def test_applied_suggestions_survive_version_trimming():
+    """Test that suggestions applied in trimmed versions stay applied"""
+    store = SessionStore(max_versions=2)
+    session_id = store.create(STRUCTURED_CV, SUGGESTIONS)
+    store.apply(session_id, [1])
+    store.apply(session_id, [2])
+
+    assert [item["version"] for item in store.get(session_id)["versions"]] == [1, 2]
+    assert store.get(session_id)["applied_suggestion_ids"] == [1, 2]
+    assert store.apply(session_id, [1])["results"][0]["status"] == "skipped"
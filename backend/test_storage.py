@@ -0,0 +1,90 @@
+"""
+Tests for the SQLite CV store
+"""
+
+import json
+
+from storage import CVStore
+
+
+def _analysis(score):
+    return {"status": "success", "analysis": {"overall_score": score, "ats_score": score // 2}}
+
+
+def test_latest_records_and_unique_ids():
+    """Test that records written in the same second get distinct IDs and the newest wins"""
+    store = CVStore(':memory:')
+
+    first = store.save_structured_cv({"timestamp": "2025-11-01T10:00:00", "structured_cv": {"contact": {"name": "A"}}})
+    second = store.save_structured_cv({"timestamp": "2025-11-01T10:00:00", "structured_cv": {"contact": {"name": "B"}}})
+    store.save_analysis(_analysis(60), cv_id=second)
+
+    latest = store.get_latest_structured_cv()
+
+    assert first != second
+    assert latest["id"] == second
+    assert latest["candidate_name"] == "B"
+    assert store.get_latest_analysis()["cv_id"] == second
+
+
+def test_list_analyses_filters_and_pages():
+    """Test score filtering, score ordering and pagination"""
+    store = CVStore(':memory:')
+    for day, score in enumerate([40, 80, 65, 90], start=1):
+        store.save_analysis(_analysis(score), created_at=f"2025-11-0{day}T09:00:00")
+
+    by_score = store.list_analyses(sort="score")
+    assert [row["overall_score"] for row in by_score] == [90, 80, 65, 40]
+
+    filtered = store.list_analyses(min_score=60, since="2025-11-03")
+    assert [row["overall_score"] for row in filtered] == [90, 65]
+
+    page = store.list_analyses(limit=2, offset=2)
+    assert [row["overall_score"] for row in page] == [80, 40]
+
+
+def test_date_only_until_includes_the_whole_day():
+    """Test that until=YYYY-MM-DD keeps records from later that day, while a timestamp bound stays exact"""
+    store = CVStore(':memory:')
+    for created_at, score in [("2025-11-02T23:59:59", 40), ("2025-11-03T00:00:00", 80), ("2025-11-01T09:00:00", 65)]:
+        store.save_analysis(_analysis(score), created_at=created_at)
+
+    assert [row["overall_score"] for row in store.list_analyses(until="2025-11-02")] == [40, 65]
+    assert [row["overall_score"] for row in store.list_analyses(until="2025-11-02T12:00:00")] == [65]
+
+
+def test_import_json_files_runs_once(tmp_path):
+    """Test that legacy JSON files are imported exactly once"""
+    cv_dir = tmp_path / "cv_data"
+    analysis_dir = tmp_path / "analysis"
+    cv_dir.mkdir()
+    analysis_dir.mkdir()
+    (cv_dir / "structured_cv_20251101_120000.json").write_text(
+        json.dumps({"structured_cv": {"summary": "Imported"}}), encoding="utf-8")
+    (analysis_dir / "structured_analysis_20251101_120001.json").write_text(
+        json.dumps(_analysis(70)), encoding="utf-8")
+
+    store = CVStore(str(tmp_path / "store.sqlite3"))
+
+    assert store.import_json_files(str(cv_dir), str(analysis_dir)) == {
+        "structured_cvs": 1, "analyses": 1, "skipped": 0, "failed": 0}
+    assert store.import_json_files(str(cv_dir), str(analysis_dir))["skipped"] == 2
+
+    latest = store.get_latest_structured_cv()
+    assert latest["created_at"] == "2025-11-01T12:00:00"
+    assert latest["data"]["structured_cv"]["summary"] == "Imported"
+    assert store.get_latest_analysis()["overall_score"] == 70
+
+
+def test_job_profiles_are_deduplicated_by_content_hash():
+    """Test that saving the same job description twice returns the first profile"""
+    store = CVStore(':memory:')
+
+    first = store.save_job_profile({"title": "Backend Developer"}, "hash-1")
+    again = store.save_job_profile({"title": "Backend Developer (copy)"}, "hash-1")
+    other = store.save_job_profile({"title": "Data Engineer"}, "hash-2")
+
+    assert again == first
+    assert other != first
+    assert store.find_job_profile("hash-1")["data"]["title"] == "Backend Developer"
+    assert [row["id"] for row in store.list_job_profiles()] == [other, first]
@@ -0,0 +1,120 @@
+"""
+Tests for the Gemini worker pool
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+
+from workers import run_gemini_call
+
+
+def _slow_call(delay, value):
+    time.sleep(delay)
+    return value
+
+
+def _crash(marker):
+    with open(marker, "a") as handle:
+        handle.write("x")
+    os._exit(1)
+
+
+def test_run_gemini_call_returns_result():
+    """Test that the wrapped function result is returned"""
+    result = asyncio.run(run_gemini_call(_slow_call, 0, value="ok"))
+    assert result == "ok"
+
+
+def test_run_gemini_call_does_not_block_event_loop():
+    """Test that several blocking calls run concurrently"""
+    async def run_many():
+        start = time.perf_counter()
+        results = await asyncio.gather(*[run_gemini_call(_slow_call, 0.2, i) for i in range(5)])
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run_many())
+
+    assert results == [0, 1, 2, 3, 4]
+    assert elapsed < 0.8  # Sequential execution would take ~1s
+
+
+def test_run_parser_task_in_process_pool():
+    """Test that parser tasks run in a separate process"""
+    import os
+    import workers
+
+    pid = asyncio.run(workers.run_parser_task(os.getpid))
+
+    if workers.PARSER_PROCESS_WORKERS:
+        assert pid != os.getpid()
+    else:
+        assert pid == os.getpid()
+
+
+def test_run_parser_task_timeout():
+    """Test that a stuck parser task times out instead of hanging the caller"""
+    import pytest
+    import workers
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(workers.run_parser_task(time.sleep, 5, timeout=0.5))
+
+    # The pool is still usable afterwards
+    assert asyncio.run(workers.run_parser_task(abs, -3)) == 3
+
+
+def test_parser_timeout_does_not_fail_other_tasks():
+    """Test that concurrent tasks survive a timed-out task (they are retried on the replacement pool)"""
+    import pytest
+    import workers
+
+    async def run_both():
+        return await asyncio.gather(
+            workers.run_parser_task(time.sleep, 5, timeout=0.5),
+            workers.run_parser_task(_slow_call, 1, "ok", timeout=10),
+            return_exceptions=True
+        )
+
+    stuck, other = asyncio.run(run_both())
+
+    assert isinstance(stuck, asyncio.TimeoutError)
+    assert other == "ok"
+
+
+def test_parser_workers_exit_after_many_tasks():
+    """Test that task bookkeeping never blocks workers from exiting"""
+    import pytest
+    import workers
+
+    if not workers.PARSER_PROCESS_WORKERS:
+        pytest.skip("parser tasks run in threads")
+
+    async def run_many():
+        return await asyncio.gather(*[workers.run_parser_task(abs, -i) for i in range(5000)])
+
+    assert asyncio.run(run_many())[-1] == 4999
+
+    workers._reset_parser_pool(workers._get_parser_pool())
+    deadline = time.monotonic() + 10
+    while multiprocessing.active_children() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    assert multiprocessing.active_children() == []
+
+
+def test_parser_crash_is_not_retried(tmp_path):
+    """Test that a task whose worker crashed fails once instead of breaking the next pool"""
+    import pytest
+    import workers
+    from concurrent.futures.process import BrokenProcessPool
+
+    if not workers.PARSER_PROCESS_WORKERS:
+        pytest.skip("parser tasks run in threads")
+
+    marker = tmp_path / "attempts"
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(workers.run_parser_task(_crash, str(marker)))
+
+    assert marker.read_text() == "x"
+    assert asyncio.run(workers.run_parser_task(abs, -3)) == 3
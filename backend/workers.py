@@ -0,0 +1,204 @@
+"""
+Worker Pool Module
+Bounded executors that keep blocking work (Gemini calls, document parsing)
+off the event loop
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+
+# Maximum number of Gemini calls allowed in flight at the same time.
+# Each call mostly waits on the network, so a thread per call is cheap.
+GEMINI_MAX_CONCURRENCY = max(1, int(os.getenv("GEMINI_MAX_CONCURRENCY", "32")))
+
+# Worker processes for CPU-bound document extraction and page rendering.
+# 0 runs parser tasks in a thread instead (no isolation, no hard timeout).
+PARSER_PROCESS_WORKERS = max(0, int(os.getenv("PARSER_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1)))))
+
+# Seconds a single parser task may run before it is abandoned
+PARSER_TASK_TIMEOUT = float(os.getenv("PARSER_TASK_TIMEOUT", "60"))
+
+_gemini_executor = ThreadPoolExecutor(
+    max_workers=GEMINI_MAX_CONCURRENCY,
+    thread_name_prefix="gemini"
+)
+
+_parser_pool = None  # _ParserPool, created on first use
+_parser_pool_lock = threading.Lock()
+_task_ids = itertools.count()
+
+# Worker side: set by _init_parser_worker
+_worker_pid_queue = None
+
+
+async def run_gemini_call(func, *args, **kwargs):
+    """
+    Run a blocking Gemini helper in the bounded Gemini executor.
+
+    Args:
+        func: Synchronous function that talks to Gemini
+        *args, **kwargs: Arguments forwarded to func
+
+    Returns:
+        Whatever func returns. Calls beyond GEMINI_MAX_CONCURRENCY wait
+        in the executor queue instead of blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_gemini_executor, partial(func, *args, **kwargs))
+
+
+async def run_parser_task(func, *args, timeout: float = None, **kwargs):
+    """
+    Run a CPU-bound parser function in the parser process pool.
+
+    Args:
+        func: Module-level (picklable) function, e.g. parser.parse_document_bytes
+        *args, **kwargs: Arguments forwarded to func (must be picklable)
+        timeout: Seconds before giving up (defaults to PARSER_TASK_TIMEOUT)
+
+    Returns:
+        Whatever func returns.
+
+    Raises:
+        asyncio.TimeoutError: If the task exceeds the timeout. In process mode
+        the worker running it is killed so it does not keep burning a core.
+        ProcessPoolExecutor then fails every task on that pool, so the pool
+        is replaced and the other tasks are retried once on the new one.
+        BrokenProcessPool: If a worker crashed. Crashed tasks are not retried:
+        the document that crashed one pool would take down the next one too.
+    """
+    timeout = PARSER_TASK_TIMEOUT if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    call = partial(func, *args, **kwargs)
+
+    if PARSER_PROCESS_WORKERS == 0:
+        return await asyncio.wait_for(loop.run_in_executor(None, call), timeout=timeout)
+
+    for attempt in range(2):
+        pool = _get_parser_pool()
+        task_id = next(_task_ids)
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(pool.executor, partial(_run_tracked, task_id, call)), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            print(f"⏱️  Parser task exceeded {timeout}s, stopping its worker process")
+            _stop_task(pool, task_id)
+            raise
+        except BrokenProcessPool:
+            _reset_parser_pool(pool)
+            if attempt or not pool.stopped:
+                raise
+            print("🔁 Parser pool was replaced after a timeout, retrying task on the new pool")
+
+
+class _ParserPool:
+    """
+    Process pool plus the pids of the workers currently running each task.
+    
+    Workers report task start and end on a queue that a parent thread drains
+    continuously; an unread queue would fill up and keep workers from exiting.
+    """
+    
+    def __init__(self):
+        # spawn avoids forking a process that already holds gRPC threads
+        context = multiprocessing.get_context("spawn")
+        self.pid_queue = context.Queue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=PARSER_PROCESS_WORKERS,
+            mp_context=context,
+            initializer=_init_parser_worker,
+            initargs=(self.pid_queue,)
+        )
+        self.pids = {}          # task id -> pid of the worker running it
+        self.stopped = False    # A worker was killed on purpose (see _stop_task)
+        self.closed = False
+        threading.Thread(target=self._read_pids, name="parser-pids", daemon=True).start()
+    
+    def _read_pids(self):
+        # Keep draining after close so exiting workers can flush their last reports
+        while True:
+            try:
+                task_id, pid = self.pid_queue.get(timeout=0.5)
+            except queue.Empty:
+                if self.closed:
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+            if pid is None:
+                self.pids.pop(task_id, None)
+            else:
+                self.pids[task_id] = pid
+    
+    def close(self, cancel_futures: bool = False):
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=cancel_futures)
+
+
+def _init_parser_worker(pid_queue):
+    global _worker_pid_queue
+    _worker_pid_queue = pid_queue
+
+
+def _run_tracked(task_id: int, call):
+    """Worker side: report which process runs the task while it runs."""
+    _worker_pid_queue.put((task_id, os.getpid()))
+    try:
+        return call()
+    finally:
+        _worker_pid_queue.put((task_id, None))
+
+
+def _get_parser_pool() -> _ParserPool:
+    global _parser_pool
+    with _parser_pool_lock:
+        if _parser_pool is None:
+            _parser_pool = _ParserPool()
+        return _parser_pool
+
+
+def _stop_task(pool: _ParserPool, task_id: int):
+    """
+    Kill the worker running a timed-out task (a running task can't be
+    cancelled) and replace the pool, which breaks when a worker dies.
+    A task that has not started yet is cancelled by the caller instead.
+    """
+    pid = pool.pids.get(task_id)
+    if pid is None:
+        return
+    pool.stopped = True
+    _reset_parser_pool(pool)
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except OSError:
+        pass  # The task finished in the meantime
+
+
+def _reset_parser_pool(pool: _ParserPool):
+    """Stop handing out pool; tasks still running on it finish or fail on their own."""
+    global _parser_pool
+    with _parser_pool_lock:
+        if _parser_pool is pool:
+            _parser_pool = None
+    pool.close()
+
+
+def shutdown_workers():
+    """Release executor threads and processes (called on application shutdown)."""
+    global _parser_pool
+    _gemini_executor.shutdown(wait=False, cancel_futures=True)
+
+    with _parser_pool_lock:
+        pool, _parser_pool = _parser_pool, None
+    if pool is not None:
+        pool.close(cancel_futures=True)
@@ -5,6 +5,7 @@
  */
 import React, { useState, useEffect } from 'react';
 import { Download, Eye, FileText } from 'lucide-react';
+import { getOriginalFileUrl } from '../../services/api';
 
 export default function CVViewer({ originalFile, cvText }) {
   const [fileUrl, setFileUrl] = useState(null);
@@ -12,38 +13,23 @@ export default function CVViewer({ originalFile, cvText }) {
   const [error, setError] = useState(null);
 
   useEffect(() => {
-    if (!originalFile || !originalFile.data) {
+    // The file is served by the backend on demand (with Range support)
+    const url = getOriginalFileUrl(originalFile);
+    if (!url) {
       setShowOriginal(false);
+      setError(originalFile ? 'Failed to load original file' : null);
       return;
     }
 
-    try {
-      // Convert base64 to blob efficiently
-      const binaryString = atob(originalFile.data);
-      const bytes = Uint8Array.from(binaryString, c => c.charCodeAt(0));
-      
-      const blob = new Blob([bytes], { type: originalFile.content_type });
-      const url = URL.createObjectURL(blob);
-      setFileUrl(url);
-
-      // Cleanup on unmount
-      return () => {
-        if (url) {
-          URL.revokeObjectURL(url);
-        }
-      };
-    } catch (err) {
-      console.error('Error creating file URL:', err);
-      setError('Failed to load original file');
-      setShowOriginal(false);
-    }
+    setFileUrl(url);
+    setShowOriginal(true);
   }, [originalFile]);
 
   const handleDownload = () => {
     if (!fileUrl) return;
     
     const link = document.createElement('a');
-    link.href = fileUrl;
+    link.href = getOriginalFileUrl(originalFile, true);
     link.download = originalFile?.filename || 'cv-document';
     document.body.appendChild(link);
     link.click();
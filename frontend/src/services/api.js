@@ -48,6 +48,55 @@ export async function analyzeStructuredCV(cvFile, jobDescription = '') {
   return data;
 }
 
+/**
+ * Analyzes a CV file and reports pipeline stages as they finish
+ * @param {File} cvFile - The CV file to analyze
+ * @param {string} jobDescription - Optional job description for targeted analysis
+ * @param {Function} onEvent - Called with ({event, data}) for every stage event
+ *   ("extracted", "structured_cv", "suggestion" (one per field suggestion,
+ *   before "analysis" arrives), "analysis", "saved", "done")
+ * @returns {Promise<void>} Resolves when the stream ends
+ */
+export async function analyzeStructuredCVStream(cvFile, jobDescription = '', onEvent = () => {}) {
+  const formData = new FormData();
+  formData.append('cv_file', cvFile);
+  formData.append('job_description', jobDescription);
+
+  const response = await fetch(`${API_BASE_URL}/analyze-structured/stream`, {
+    method: 'POST',
+    body: formData,
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  const handleLine = (line) => {
+    if (!line.trim()) return;
+    const message = JSON.parse(line);
+    if (message.event === 'error') {
+      throw new Error(message.data?.message || 'Analysis failed');
+    }
+    onEvent(message);
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    lines.forEach(handleLine);
+  }
+
+  handleLine(buffer);
+}
+
 /**
  * Applies a suggestion to the structured CV data
  * @param {Object} structuredCV - The structured CV object
@@ -79,6 +128,163 @@ export async function applySuggestion(structuredCV, suggestion) {
   return data;
 }
 
+/**
+ * Applies several suggestions to the structured CV data in one request
+ * @param {Object} structuredCV - The structured CV object
+ * @param {Array<Object>} suggestions - The suggestions to apply
+ * @param {boolean} atomic - Apply all suggestions or none
+ * @returns {Promise<Object>} Updated CV data and a status per suggestion
+ */
+export async function applySuggestions(structuredCV, suggestions, atomic = true) {
+  const response = await fetch(`${API_BASE_URL}/apply-suggestions`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      structured_cv: structuredCV,
+      suggestions: suggestions,
+      atomic: atomic
+    }),
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const data = await response.json();
+
+  if (data.status === 'error') {
+    throw new Error(data.message || 'Failed to apply suggestions');
+  }
+
+  return data;
+}
+
+/**
+ * Applies suggestions of an editing session by ID (see session_id in analysis responses)
+ * @param {string} sessionId - The editing session ID
+ * @param {Array<number>} suggestionIds - IDs of the suggestions to apply
+ * @param {number|null} version - The CV version the client holds (rejected if outdated)
+ * @returns {Promise<Object>} New version number and the JSON Patch from the previous version
+ */
+export async function applySessionSuggestions(sessionId, suggestionIds, version = null) {
+  const response = await fetch(`${API_BASE_URL}/sessions/${sessionId}/apply`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      suggestion_ids: suggestionIds,
+      version: version
+    }),
+  });
+
+  const data = await response.json();
+
+  if (!response.ok || data.status === 'error') {
+    throw new Error(data.message || data.error || `HTTP error! status: ${response.status}`);
+  }
+
+  return data;
+}
+
+/**
+ * Undoes or redoes the last applied suggestions of an editing session
+ * @param {string} sessionId - The editing session ID
+ * @param {string} action - 'undo' or 'redo'
+ * @returns {Promise<Object>} New version number and the JSON Patch to apply
+ */
+export async function moveSessionVersion(sessionId, action = 'undo') {
+  const response = await fetch(`${API_BASE_URL}/sessions/${sessionId}/${action}`, {
+    method: 'POST',
+  });
+
+  const data = await response.json();
+
+  if (!response.ok || data.status === 'error') {
+    throw new Error(data.message || data.error || `HTTP error! status: ${response.status}`);
+  }
+
+  return data;
+}
+
+/**
+ * Updates the analysis of an editing session after suggestions were applied,
+ * re-analyzing only the CV sections that changed
+ * @param {string} sessionId - The editing session ID
+ * @param {number|null} version - The CV version to analyze (default: the current one)
+ * @returns {Promise<Object>} Updated gemini_analysis (with incremental.changed_sections)
+ */
+export async function reanalyzeSession(sessionId, version = null) {
+  const response = await fetch(`${API_BASE_URL}/reanalyze`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      session_id: sessionId,
+      version: version
+    }),
+  });
+
+  const data = await response.json();
+
+  if (!response.ok || data.error) {
+    throw new Error(data.error || `HTTP error! status: ${response.status}`);
+  }
+
+  if (data.gemini_analysis?.error) {
+    throw new Error(data.gemini_analysis.error);
+  }
+
+  return data;
+}
+
+/**
+ * Scores a structured CV against a job description locally (no Gemini call)
+ * @param {Object} structuredCV - The structured CV object
+ * @param {string} jobDescription - The job description text
+ * @returns {Promise<Object>} Score (0-100) with matched and missing job terms
+ */
+export async function getJobMatch(structuredCV, jobDescription) {
+  const response = await fetch(`${API_BASE_URL}/job-match`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({
+      structured_cv: structuredCV,
+      job_description: jobDescription
+    }),
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+
+  const data = await response.json();
+
+  if (data.status !== 'success') {
+    throw new Error(data.error || 'Failed to score job match');
+  }
+
+  return data;
+}
+
+/**
+ * Builds the download URL of an original uploaded file
+ * @param {Object} originalFile - The original_file object from an analysis response
+ * @param {boolean} download - Request an attachment instead of inline content
+ * @returns {string|null} Absolute URL of the file, or null if unavailable
+ */
+export function getOriginalFileUrl(originalFile, download = false) {
+  if (!originalFile?.url) {
+    return null;
+  }
+  return `${API_BASE_URL}${originalFile.url}${download ? '?download=true' : ''}`;
+}
+
 /**
  * Validates file type and size before upload
  * @param {File} file - File to validate